@@ -0,0 +1,87 @@
+"""
+Benchmark ``parse_json`` against the previous multi-strategy implementation.
+
+The corpus mirrors the shapes of answers returned by the classification and
+topic cleaning prompts: bare JSON, fenced JSON, JSON wrapped in prose, lists
+and invalid answers. Pass a folder of ``*.txt`` files to benchmark on real
+responses instead.
+
+Usage::
+
+    python benchmarks/bench_parser.py [responses_folder]
+"""
+
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import sys
+import timeit
+
+from graphrag_tagger.utilities.parser import parse_json
+
+CORPUS = [
+    '{"content_type": "paragraph", "is_sufficient": true, "topics": ["Topic 1", "Topic 4"]}',
+    '```json\n{\n  "content_type": "paragraph",\n  "is_sufficient": true,\n  "topics": ["Topic 2"]\n}\n```',
+    'Here is the classification:\n```json\n{"content_type": "footer", "is_sufficient": false, "topics": []}\n```\nThe excerpt is a footer.',
+    'Sure! {"content_type": "list", "is_sufficient": true, "topics": ["Topic 3", "Topic 7", "Topic 9"]} Let me know if you need more.',
+    '["Graph Retrieval", "Topic Modeling", "PDF Processing", "Community Detection"]',
+    'The cleaned topics are:\n["Climate Change Causes", "Renewable Energy", "Public Health"]',
+    '{"content_type": "paragraph", "is_sufficient": true, "topics": ["Topic 1",]}',
+    "I cannot classify this text because it is too short.",
+]
+
+
+def legacy_parse_json(json_str: str):
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        pass
+    match = re.search(r"```json\s*(.*?)\s*```", json_str, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(1))
+        except json.JSONDecodeError as e:
+            print("Error parsing JSON block:", e)
+            return
+    for opening, closing in (("{", "}"), ("[", "]")):
+        start = json_str.find(opening)
+        end = json_str.rfind(closing)
+        if start != -1 and end != -1 and end > start:
+            try:
+                return json.loads(json_str[start : end + 1])
+            except json.JSONDecodeError as e:
+                print("Error parsing fallback JSON block:", e)
+                return
+    return
+
+
+def load_corpus(folder: str):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            corpus.append(f.read())
+    return corpus
+
+
+def bench(fn, corpus, number: int) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = min(
+            timeit.repeat(lambda: [fn(s) for s in corpus], number=number, repeat=5)
+        )
+    return seconds / (number * len(corpus)) * 1e6
+
+
+if __name__ == "__main__":
+    corpus = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else CORPUS
+    number = 2000
+    with contextlib.redirect_stdout(io.StringIO()):
+        agree = sum(parse_json(s) == legacy_parse_json(s) for s in corpus)
+    legacy = bench(legacy_parse_json, corpus, number)
+    current = bench(parse_json, corpus, number)
+    print(f"responses: {len(corpus)} (same result as legacy: {agree})")
+    print(f"legacy parse_json: {legacy:8.2f} us/response")
+    print(f"parse_json:        {current:8.2f} us/response")
+    print(f"speedup:           {legacy / current:8.2f}x")
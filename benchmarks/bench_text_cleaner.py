@@ -0,0 +1,131 @@
+"""
+Benchmark ``TextCleaner.is_valid_file`` and ``TextCleaner.merge_sentences``
+against their previous implementations.
+
+The corpus is synthetic PDF-like text: prose paragraphs with hyphenated line
+breaks, headings, and table of contents pages that ``is_valid_file`` rejects.
+Pass a folder of ``*.txt`` files to benchmark on real extracted text instead.
+
+Usage::
+
+    python benchmarks/bench_text_cleaner.py [text_folder]
+"""
+
+import glob
+import os
+import random
+import re
+import string
+import sys
+import timeit
+
+from graphrag_tagger.utilities.text_cleaner import TextCleaner
+
+WORDS = (
+    "graph retrieval community summary model answer question corpus source "
+    "index entity relation global local query language private dataset"
+).split()
+
+
+def legacy_merge_sentences(text: str) -> str:
+    punctuation = {".", "?", "!"}
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    if not lines:
+        return ""
+    merged = [lines[0]]
+    for line in lines[1:]:
+        last_line = merged[-1]
+        if last_line.endswith("-"):
+            merged[-1] = last_line[:-1] + line
+        elif last_line and last_line[-1] in punctuation:
+            merged.append(line)
+        elif line.isupper():
+            merged.append(line)
+        elif (
+            line
+            and line[0].isupper()
+            and (not last_line or last_line[-1] not in punctuation)
+        ):
+            merged.append(line)
+        else:
+            merged[-1] = last_line + " " + line
+    return "\n".join(merged).strip()
+
+
+def legacy_is_potential_title(line: str) -> bool:
+    line = line.strip()
+    if re.match(r"^\d+\.", line):
+        return True
+    if len(line.split()) <= 10 and not line.endswith(tuple(string.punctuation)):
+        if line[0].isupper():
+            words = line.split()
+            capitalized_words = sum(1 for word in words if word[0].isupper())
+            if capitalized_words >= len(words) / 2:
+                return True
+    return False
+
+
+def legacy_is_valid_file(raw: str):
+    lines = [i for i in raw.split("\n") if i.strip()]
+    count = [i for i in lines if "........" in i]
+    count2 = [i for i in lines if "—." in i]
+    count3 = [1 for i in lines if legacy_is_potential_title(i)]
+    return (len(lines) > 3) and len(count) < 5 and len(count2) < 5 and len(count3) < 5
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(6, 16))
+    return " ".join(words).capitalize() + rng.choice(".?!,")
+
+
+def synthetic_corpus(n_chunks: int = 200, seed: int = 0):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n_chunks):
+        if i % 5 == 0:  # table of contents page
+            lines = [
+                f"{n}. {rng.choice(WORDS).title()} {'.' * 20} {rng.randint(1, 99)}"
+                for n in range(1, 30)
+            ]
+        else:
+            text = " ".join(_sentence(rng) for _ in range(rng.randint(5, 15)))
+            lines = [rng.choice(WORDS).upper()]
+            while text:
+                cut = rng.randint(50, 80)
+                head, text = text[:cut], text[cut:]
+                lines.append(head + ("-" if text and rng.random() < 0.2 else ""))
+        corpus.append("\n".join(lines) + "\n\n")
+    return corpus
+
+
+def load_corpus(folder: str):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            corpus.append(f.read())
+    return corpus
+
+
+def bench(fn, corpus, number: int) -> float:
+    seconds = min(
+        timeit.repeat(lambda: [fn(s) for s in corpus], number=number, repeat=5)
+    )
+    return seconds / (number * len(corpus)) * 1e6
+
+
+if __name__ == "__main__":
+    corpus = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthetic_corpus()
+    number = 20
+    pairs = [
+        ("is_valid_file", legacy_is_valid_file, TextCleaner.is_valid_file),
+        ("merge_sentences", legacy_merge_sentences, TextCleaner.merge_sentences),
+    ]
+    print(f"chunks: {len(corpus)}")
+    for name, legacy_fn, current_fn in pairs:
+        agree = sum(legacy_fn(s) == current_fn(s) for s in corpus)
+        legacy = bench(legacy_fn, corpus, number)
+        current = bench(current_fn, corpus, number)
+        print(f"{name} (same result as legacy: {agree})")
+        print(f"  legacy:  {legacy:8.2f} us/chunk")
+        print(f"  current: {current:8.2f} us/chunk")
+        print(f"  speedup: {legacy / current:8.2f}x")
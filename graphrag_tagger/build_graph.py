@@ -3,6 +3,7 @@ import json
 import os
 
 from .graph.graph_manager import GraphManager
+from .graph.graph_store import GraphStore
 
 
 def process_graph(
@@ -10,6 +11,8 @@ def process_graph(
     output_folder: str,
     threshold_percentile: float = 97.5,
     content_type_filter="",
+    save_graph_store: bool = False,
+    n_jobs: int = 1,
 ):
     print("Processing graph...")
     pattern = "chunk_*.json"
@@ -20,14 +23,24 @@ def process_graph(
     graph_manager = GraphManager()
     raws = graph_manager.load_raw_files(input_folder, pattern, content_type_filter)
     scores_map = graph_manager.compute_scores(raws)
-    G = graph_manager.build_graph(raws, scores_map)
-    G_pruned = graph_manager.prune_graph(G, threshold_percentile)
+    # Edges stay arrays until pruned: only the kept ones become graph edges.
+    topic_table, edges = graph_manager.compute_edge_arrays(
+        raws, scores_map, n_jobs=n_jobs
+    )
+    edges = graph_manager.prune_edges(edges, threshold_percentile)
+    G_pruned = graph_manager.graph_from_edges(raws, topic_table, edges)
     component_map = graph_manager.update_graph_components(G_pruned)
 
     output_file = os.path.join(output_folder, "connected_components.json")
     with open(output_file, "w") as f:
         json.dump(component_map, f)
     print(f"Connected components map saved to {output_file}")
+    if save_graph_store:
+        graph_folder = os.path.join(output_folder, "graph")
+        GraphStore.from_edges(raws, topic_table, edges, scores_map, component_map).save(
+            graph_folder
+        )
+        print(f"Graph store saved to {graph_folder}")
     print("Graph processing complete.")
     return G_pruned
 
@@ -58,6 +71,17 @@ if __name__ == "__main__":
         default="",
         help="Percentile threshold for pruning edges.",
     )
+    parser.add_argument(
+        "--save_graph_store",
+        action="store_true",
+        help="Also save the pruned graph as a binary graph store.",
+    )
+    parser.add_argument(
+        "--n_jobs",
+        type=int,
+        default=1,
+        help="Number of processes used to build graph edges.",
+    )
     args = parser.parse_args()
 
     process_graph(
@@ -65,4 +89,6 @@ if __name__ == "__main__":
         args.output_folder,
         threshold_percentile=args.threshold_percentile,
         content_type_filter=args.content_type_filter,
+        save_graph_store=args.save_graph_store,
+        n_jobs=args.n_jobs,
     )
@@ -1,75 +1,383 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional
+
 import aisuite as ai
 
 from ..utilities.parser import parse_json
-from .prompts import CLASSIFY_PROMPT, CREATE_TOPICS, EXAMPLE1, EXAMPLE2
+from ..utilities.schema import validate
+from .prompts import (
+    CLASSIFY_SCHEMA,
+    CLASSIFY_SYSTEM_PROMPT,
+    CLASSIFY_USER_PROMPT,
+    CREATE_TOPICS,
+    EXAMPLE1,
+    EXAMPLE2,
+    MERGE_TOPICS,
+    REPAIR_PROMPT,
+    STRUCTURED_TOPICS_NOTE,
+    TOPICS_SCHEMA,
+)
+from .resilience import AdaptiveLimiter, CircuitBreaker, RetryPolicy, is_transient
 
 
 class LLMService:
     """
     Handles communication with the LLM model.
+
+    Requests go through an adaptive concurrency limiter and a circuit breaker.
+    Requests failing with a timeout, a connection error or a 5xx answer are
+    retried with jittered exponential backoff; other errors are raised at
+    once.
     """
 
-    def __init__(self, model="ollama:phi4"):
-        self.model = ai.Client()
+    def __init__(
+        self,
+        model="ollama:phi4",
+        timeout: Optional[float] = 120.0,
+        max_retries: int = 3,
+        max_concurrency: int = 16,
+        latency_target: Optional[float] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        keep_alive: Optional[str] = None,
+        api_url: Optional[str] = None,
+    ):
+        """
+        :param model: Model identifier in aisuite's ``provider:model`` format.
+        :type model: str
+        :param timeout: Per-request timeout in seconds, passed to the provider.
+        :type timeout: Optional[float]
+        :param max_retries: Retries after the first failed attempt.
+        :type max_retries: int
+        :param max_concurrency: Upper bound of concurrent in-flight requests.
+        :type max_concurrency: int
+        :param latency_target: Latency in seconds above which the concurrency
+                               limit is reduced. None only reacts to errors.
+        :type latency_target: Optional[float]
+        :param failure_threshold: Consecutive failures that open the circuit.
+        :type failure_threshold: int
+        :param reset_timeout: Seconds the circuit stays open before a trial call.
+        :type reset_timeout: float
+        :param keep_alive: How long the backend keeps the model loaded between
+                           requests (e.g. ``"30m"``), for providers that support it.
+        :type keep_alive: Optional[str]
+        :param api_url: Endpoint of the backend (e.g. ``"http://gpu1:11434"`` for
+                        Ollama), None for the provider default.
+        :type api_url: Optional[str]
+        """
+        provider_config = {}
+        if timeout is not None:
+            provider_config["timeout"] = timeout
+        if api_url is not None:
+            provider_config["api_url"] = api_url
+        provider_configs = {}
+        if provider_config and ":" in model:
+            provider_configs[model.split(":", 1)[0]] = provider_config
+        # The client builds its providers when created, which imports their
+        # SDK; it is created on the first request instead.
+        self.provider_configs = provider_configs
+        self._client = None
+        self._client_lock = threading.Lock()
         self.model_name = model
+        self.api_url = api_url
         self.example_messages = [""""""]
+        self.retry_policy = RetryPolicy(max_retries=max_retries)
+        self.limiter = AdaptiveLimiter(
+            initial_limit=min(4, max_concurrency),
+            max_limit=max_concurrency,
+            latency_target=latency_target,
+        )
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.request_kwargs = {}
+        if keep_alive is not None and self.provider == "ollama":
+            self.request_kwargs["keep_alive"] = keep_alive
 
-    def __call__(self, messages: list):
+    @property
+    def model(self) -> ai.Client:
         """
-        Send a chat completion request to the underlying LLM.
+        The aisuite client, created on first use.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = ai.Client(self.provider_configs)
+        return self._client
 
-        :param messages: A list of message dictionaries as per the LLM API.
-        :type messages: list
-        :return: The content of the first choice's message from the LLM response.
-        :rtype: str
+    @property
+    def provider(self) -> str:
+        return self.model_name.split(":", 1)[0]
+
+    def _schema_kwargs(self, schema: Optional[dict]) -> dict:
         """
+        Provider-specific request arguments that constrain the output to ``schema``.
+        """
+        if schema is None:
+            return {}
+        if self.provider == "ollama":
+            return {"format": schema}
+        if self.provider in ("openai", "azure", "groq", "mistral", "fireworks"):
+            return {
+                "response_format": {
+                    "type": "json_schema",
+                    "json_schema": {"name": "response", "schema": schema},
+                }
+            }
+        # Other backends have no known constrained decoding option; the caller
+        # still validates the answer against the schema.
+        return {}
+
+    def _create(self, messages: list, **kwargs) -> str:
         return (
             self.model.chat.completions.create(
-                model=self.model_name, temperature=0.75, messages=messages
+                model=self.model_name, temperature=0.75, messages=messages, **kwargs
             )
             .choices[0]
             .message.content
         )
 
+    def __call__(
+        self,
+        messages: list,
+        schema: Optional[dict] = None,
+        max_wait: Optional[float] = None,
+    ):
+        """
+        Send a chat completion request to the underlying LLM.
+
+        :param messages: A list of message dictionaries as per the LLM API.
+        :type messages: list
+        :param schema: JSON schema to constrain the output to, where the
+                       provider supports it.
+        :type schema: Optional[dict]
+        :param max_wait: Longest wait for an open circuit breaker, None to
+                         wait until it lets a call through.
+        :type max_wait: Optional[float]
+        :raises CircuitOpenError: If the circuit stays open for ``max_wait``.
+        :raises Exception: A non-transient error, or the last error once all
+                           retries have failed.
+        :return: The content of the first choice's message from the LLM response.
+        :rtype: str
+        """
+        kwargs = {**self.request_kwargs, **self._schema_kwargs(schema)}
+        attempt = 0
+        while True:
+            self.breaker.wait(max_wait)
+            self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                content = self._create(messages, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    # The backend answered: it is neither down nor overloaded.
+                    self.limiter.release(time.monotonic() - start, success=True)
+                    self.breaker.record_success()
+                    raise
+                self.limiter.release(time.monotonic() - start, success=False)
+                self.breaker.record_failure()
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+                time.sleep(self.retry_policy.delay(attempt))
+                attempt += 1
+                continue
+            self.limiter.release(time.monotonic() - start, success=True)
+            self.breaker.record_success()
+            return content
+
+
+@lru_cache(maxsize=256)
+def classify_system_prompt(topics: tuple, numbers: Optional[tuple] = None) -> str:
+    """
+    Build the classification system prompt for a topic list.
+
+    The result is cached because it is identical for every chunk of a run.
+
+    :param topics: Candidate topic labels.
+    :type topics: tuple
+    :param numbers: Number shown for each topic. Defaults to 1..len(topics).
+    :type numbers: Optional[tuple]
+    """
+    numbers = numbers or range(1, len(topics) + 1)
+    topics_str = "\n".join(
+        ["Topic " + str(n) + ": " + topic for n, topic in zip(numbers, topics)]
+    )
+    return CLASSIFY_SYSTEM_PROMPT.format(
+        topics=topics_str, example1=EXAMPLE1, example2=EXAMPLE2
+    )
+
 
 class LLM:
     """
     A wrapper for the LLM model to clean topics and classify document chunks.
     """
 
-    def __init__(self, llm_service: LLMService):
+    structured = False
+    max_repairs = 1
+
+    def __init__(
+        self, llm_service: LLMService, structured: bool = False, max_repairs: int = 1
+    ):
+        """
+        :param llm_service: Service used to send requests.
+        :type llm_service: LLMService
+        :param structured: Request schema-constrained JSON output and validate it.
+        :type structured: bool
+        :param max_repairs: In structured mode, how many times an invalid answer
+                            is sent back to the model for correction.
+        :type max_repairs: int
+        """
         self.llm_service = llm_service
+        self.structured = structured
+        self.max_repairs = max_repairs
+
+    def _structured_call(self, messages: list, schema: dict):
+        """
+        Request schema-constrained output, re-asking only while it is invalid.
+
+        :return: The validated JSON value, or None if it is still invalid after
+                 ``max_repairs`` corrections.
+        """
+        messages = list(messages)
+        for attempt in range(self.max_repairs + 1):
+            results = self.llm_service(messages, schema=schema)
+            parsed = parse_json(results) if results else None
+            if parsed is None:
+                errors = ["the answer is not valid JSON"]
+            else:
+                errors = validate(parsed, schema)
+                if not errors:
+                    return parsed
+            if attempt < self.max_repairs:
+                messages += [
+                    {"role": "assistant", "content": results or ""},
+                    {
+                        "role": "user",
+                        "content": REPAIR_PROMPT.format(errors="\n".join(errors)),
+                    },
+                ]
+        return None
 
-    def clean_topics(self, topics: list):
+    def _clean_topics_prompt(self, prompt: str):
+        if self.structured:
+            parsed = self._structured_call(
+                [{"role": "system", "content": prompt + STRUCTURED_TOPICS_NOTE}],
+                TOPICS_SCHEMA,
+            )
+            return parsed["topics"] if parsed is not None else None
+        results = self.llm_service([{"role": "system", "content": prompt}])
+        return parse_json(results)
+
+    @staticmethod
+    def _as_labels(result) -> List[str]:
+        if isinstance(result, dict):
+            result = result.get("topics")
+        if not isinstance(result, list):
+            return []
+        return [label for label in result if isinstance(label, str)]
+
+    def clean_topics(
+        self, topics: list, batch_size: Optional[int] = None, max_workers: int = 4
+    ):
         """
         Clean a list of messy topics by transforming them into concise, clear topic labels.
 
+        When ``batch_size`` is set and there are more topics than that, the topics
+        are cleaned in batches of ``batch_size`` concurrently, and the resulting
+        labels are merged and deduplicated by :meth:`merge_topics`.
+
         :param topics: A list of raw topics generated by a topic extractor.
         :type topics: list
-        :return: Parsed JSON object containing cleaned topics.
+        :param batch_size: Maximum number of topics per cleaning request.
+                           None sends every topic in a single request.
+        :type batch_size: Optional[int]
+        :param max_workers: Number of batches cleaned concurrently.
+        :type max_workers: int
+        :return: Parsed JSON object containing cleaned topics. In structured
+                 mode or when batching, the list of labels (or None).
         :rtype: dict
         """
-        topics_str = "\n".join(topics)
-        prompt = CREATE_TOPICS.format(topics=topics_str)
-        results = self.llm_service([{"role": "system", "content": prompt}])
-        return parse_json(results)
+        if batch_size is None or len(topics) <= batch_size:
+            return self._clean_topics_prompt(
+                CREATE_TOPICS.format(topics="\n".join(topics))
+            )
+        batches = [
+            topics[i : i + batch_size] for i in range(0, len(topics), batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda batch: self._clean_topics_prompt(
+                    CREATE_TOPICS.format(topics="\n".join(batch))
+                ),
+                batches,
+            )
+            labels = [label for result in results for label in self._as_labels(result)]
+        return self.merge_topics(labels)
+
+    def merge_topics(self, labels: List[str]) -> List[str]:
+        """
+        Merge duplicate and near-duplicate topic labels.
+
+        Exact duplicates (ignoring case and surrounding whitespace) are removed
+        first, then the LLM merges labels describing the same theme. If the
+        merge answer cannot be used, the deduplicated labels are returned.
+
+        :param labels: Topic labels, possibly with duplicates.
+        :type labels: List[str]
+        :return: Merged topic labels.
+        :rtype: List[str]
+        """
+        unique = {}
+        for label in labels:
+            unique.setdefault(label.strip().lower(), label.strip())
+        deduplicated = list(unique.values())
+        if len(deduplicated) <= 1:
+            return deduplicated
+        merged = self._as_labels(
+            self._clean_topics_prompt(
+                MERGE_TOPICS.format(topics="\n".join(deduplicated))
+            )
+        )
+        return merged or deduplicated
 
-    def classify(self, document_chunk: str, topics: list):
+    def classify(
+        self,
+        document_chunk: str,
+        topics: list,
+        topic_numbers: Optional[List[int]] = None,
+    ):
         """
         Classify a given text chunk by selecting relevant topics from a provided list.
 
+        The instructions and topic list are sent as a system message that is
+        the same for every chunk, followed by the chunk in a user message, so
+        backends with prefix caching only process the chunk on each call.
+
         :param document_chunk: The text excerpt that needs to be classified.
         :type document_chunk: str
         :param topics: A list of candidate topic labels.
         :type topics: list
+        :param topic_numbers: Number of each topic in the full topic list, when
+                              ``topics`` is a shortlist, so that topic ids stay
+                              consistent across chunks.
+        :type topic_numbers: Optional[List[int]]
         :return: Parsed JSON object containing the selected topics.
         :rtype: list
         """
-        topics_str = "\n".join(
-            ["Topic " + str(i + 1) + ": " + topic for i, topic in enumerate(topics)]
-        )
-        prompt = CLASSIFY_PROMPT.format(
-            text=document_chunk, topics=topics_str, example1=EXAMPLE1, example2=EXAMPLE2
-        )
-        results = self.llm_service([{"role": "system", "content": prompt}])
+        messages = [
+            {
+                "role": "system",
+                "content": classify_system_prompt(
+                    tuple(topics), tuple(topic_numbers) if topic_numbers else None
+                ),
+            },
+            {
+                "role": "user",
+                "content": CLASSIFY_USER_PROMPT.format(text=document_chunk),
+            },
+        ]
+        if self.structured:
+            return self._structured_call(messages, CLASSIFY_SCHEMA)
+        results = self.llm_service(messages)
         return parse_json(results)
@@ -0,0 +1,331 @@
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+import httpx
+
+from .llm import LLMService
+from .resilience import CircuitOpenError, RetryPolicy, is_transient
+
+STRATEGIES = ("least_outstanding", "latency")
+
+
+def ollama_health_check(service: LLMService, timeout: float = 2.0) -> bool:
+    """
+    Check that the Ollama server of a service answers ``GET /api/version``.
+
+    Backends of other providers have no known health endpoint and are
+    reported healthy.
+
+    :param service: Service to check.
+    :type service: LLMService
+    :param timeout: Request timeout in seconds.
+    :type timeout: float
+    :rtype: bool
+    """
+    if service.provider != "ollama":
+        return True
+    url = service.api_url or os.getenv("OLLAMA_API_URL", "http://localhost:11434")
+    try:
+        response = httpx.get(url.rstrip("/") + "/api/version", timeout=timeout)
+    except httpx.HTTPError:
+        return False
+    return response.status_code == 200
+
+
+class Backend:
+    """
+    A service of an :class:`LLMPool` with its routing statistics.
+    """
+
+    def __init__(self, service: LLMService):
+        self.service = service
+        self.outstanding = 0
+        self.latency: Optional[float] = None  # moving average of successful calls
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        """
+        Healthy, and its circuit breaker is closed or ready for a trial call.
+        """
+        breaker = self.service.breaker
+        if not self.healthy:
+            return False
+        if not breaker.is_open:
+            return True
+        return time.monotonic() >= breaker.opened_at + breaker.reset_timeout
+
+
+class LLMPool:
+    """
+    Spreads requests over several LLM services, e.g. one per Ollama host.
+
+    Each request goes to the available backend with the fewest outstanding
+    requests (``"least_outstanding"``) or the lowest expected latency given
+    its queue (``"latency"``). A request failing with a transient error (see
+    :func:`~graphrag_tagger.chat.resilience.is_transient`) is retried on the
+    next best backend that has not been tried yet, and other errors are
+    raised at once; once every backend has failed, the
+    round is repeated after a backoff, up to ``max_retries`` times. Backends
+    whose circuit breaker is open, or that failed their last health check,
+    receive no traffic until they recover. When a breaker's reset timeout has
+    passed, a single request probes the backend while the others go
+    elsewhere. When no backend is available, a request waits up to
+    ``max_wait`` seconds for the earliest breaker reset or health check.
+
+    A pool is called like an :class:`LLMService` and can be passed to
+    :class:`~graphrag_tagger.chat.llm.LLM`.
+    """
+
+    def __init__(
+        self,
+        services: Sequence[LLMService],
+        strategy: str = "least_outstanding",
+        latency_smoothing: float = 0.3,
+        health_check: Callable[[LLMService], bool] = ollama_health_check,
+        max_retries: int = 3,
+        max_wait: Optional[float] = 120.0,
+    ):
+        """
+        :param services: Backends of the pool. Their own ``max_retries`` should
+                         be 0, so that failed requests move to other backends.
+        :type services: Sequence[LLMService]
+        :param strategy: ``"least_outstanding"`` or ``"latency"``.
+        :type strategy: str
+        :param latency_smoothing: Weight of the newest latency in the moving
+                                  average.
+        :type latency_smoothing: float
+        :param health_check: Returns whether a backend is up.
+        :type health_check: Callable[[LLMService], bool]
+        :param max_retries: Extra rounds over the backends after all failed.
+        :type max_retries: int
+        :param max_wait: Seconds a request waits for a backend to become
+                         available, None to wait as long as one may recover.
+        :type max_wait: Optional[float]
+        :raises ValueError: If there are no services or the strategy is unknown.
+        """
+        if not services:
+            raise ValueError("An LLM pool needs at least one service.")
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}."
+            )
+        self.backends = [Backend(service) for service in services]
+        self.strategy = strategy
+        self.latency_smoothing = latency_smoothing
+        self.health_check = health_check
+        self.retry_policy = RetryPolicy(max_retries=max_retries)
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+        self._next_check: Optional[float] = None
+
+    @classmethod
+    def from_specs(
+        cls,
+        specs: Sequence[str],
+        strategy: str = "least_outstanding",
+        max_retries: int = 3,
+        max_wait: Optional[float] = 120.0,
+        **service_options,
+    ) -> "LLMPool":
+        """
+        Build a pool from ``provider:model@url`` specs, e.g.
+        ``"ollama:phi4@http://gpu1:11434"``. The ``@url`` part is optional.
+
+        The services do not retry on their own: failed requests move to other
+        backends, and ``max_retries`` rounds over all of them are made.
+
+        :param specs: One spec per backend.
+        :type specs: Sequence[str]
+        :param strategy: Routing strategy.
+        :type strategy: str
+        :param max_retries: Extra rounds over the backends after all failed.
+        :type max_retries: int
+        :param max_wait: Seconds a request waits for an available backend.
+        :type max_wait: Optional[float]
+        :param service_options: Other :class:`LLMService` arguments.
+        :rtype: LLMPool
+        """
+        service_options["max_retries"] = 0
+        services = []
+        for spec in specs:
+            model, _, api_url = spec.partition("@")
+            services.append(
+                LLMService(model=model, api_url=api_url or None, **service_options)
+            )
+        return cls(
+            services, strategy=strategy, max_retries=max_retries, max_wait=max_wait
+        )
+
+    @property
+    def model_name(self) -> str:
+        return self.backends[0].service.model_name
+
+    def _score(self, backend: Backend) -> tuple:
+        if self.strategy == "latency":
+            # Unknown latency first, so every backend gets measured.
+            latency = backend.latency or 0.0
+            return (latency * (backend.outstanding + 1), backend.outstanding)
+        return (backend.outstanding, backend.latency or 0.0)
+
+    def _acquire(self, tried: List[Backend]) -> Optional[Backend]:
+        with self._lock:
+            candidates = [b for b in self.backends if b not in tried and b.available]
+            if not candidates:
+                return None
+            backend = min(candidates, key=self._score)
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def _release(self, backend: Backend, latency: Optional[float], failed: bool = True):
+        with self._lock:
+            backend.outstanding -= 1
+            if latency is None:
+                backend.failures += int(failed)
+            elif backend.latency is None:
+                backend.latency = latency
+            else:
+                alpha = self.latency_smoothing
+                backend.latency = alpha * latency + (1 - alpha) * backend.latency
+
+    def _time_until_available(self) -> Optional[float]:
+        # Seconds until a backend may take requests again: the earliest
+        # breaker reset, or the next health check for unhealthy backends.
+        # None if no backend can recover on its own.
+        now = time.monotonic()
+        waits = []
+        for backend in self.backends:
+            breaker = backend.service.breaker
+            if backend.healthy:
+                reset_at = (breaker.opened_at or now) + breaker.reset_timeout
+                waits.append(max(0.0, reset_at - now) if breaker.is_open else 0.0)
+            elif self._next_check is not None:
+                waits.append(max(0.0, self._next_check - now))
+        return min(waits) if waits else None
+
+    def __call__(self, messages: list, schema: Optional[dict] = None):
+        """
+        Send a chat completion request to the best available backend, failing
+        over to the others.
+
+        :raises CircuitOpenError: If no backend became available within
+                                  ``max_wait`` seconds.
+        :raises Exception: The last error when every round over the available
+                           backends failed.
+        :return: The content of the first choice's message.
+        :rtype: str
+        """
+        deadline = None if self.max_wait is None else time.monotonic() + self.max_wait
+        error: Optional[Exception] = None
+        attempt = 0
+        while True:
+            tried: List[Backend] = []
+            failed = False
+            while (backend := self._acquire(tried)) is not None:
+                tried.append(backend)
+                start = time.monotonic()
+                try:
+                    # Never wait for a breaker: a backend whose half-open trial
+                    # is taken by another request is skipped instead.
+                    content = backend.service(messages, schema=schema, max_wait=0)
+                except CircuitOpenError as e:
+                    self._release(backend, None, failed=False)
+                    error = error or e
+                    continue
+                except Exception as e:
+                    if not is_transient(e):
+                        # e.g. a bad request: other backends would reject it too.
+                        self._release(backend, None, failed=False)
+                        raise
+                    self._release(backend, None)
+                    error, failed = e, True
+                    continue
+                self._release(backend, time.monotonic() - start)
+                return content
+            if failed:
+                if attempt >= self.retry_policy.max_retries:
+                    raise error
+                time.sleep(self.retry_policy.delay(attempt))
+                attempt += 1
+                continue
+            # No backend could take the request: wait for one to recover.
+            wait = self._time_until_available()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if wait is None or (remaining is not None and remaining <= 0):
+                raise error or CircuitOpenError("No LLM backend is available.")
+            # A probe in flight frees its backend at an unknown time: poll.
+            wait = max(wait, 0.05)
+            time.sleep(wait if remaining is None else min(wait, remaining))
+
+    def check_health(self) -> List[bool]:
+        """
+        Run the health check of every backend. A backend that passes is
+        available again at once, even if its circuit breaker was open.
+
+        :return: Health of each backend.
+        :rtype: List[bool]
+        """
+        results = []
+        for backend in self.backends:
+            healthy = self.health_check(backend.service)
+            if healthy and not backend.healthy:
+                backend.service.breaker.record_success()
+            backend.healthy = healthy
+            results.append(healthy)
+        return results
+
+    def start_health_checks(self, interval: float = 30.0):
+        """
+        Check the health of the backends every ``interval`` seconds in a
+        background thread, until :meth:`close`.
+        """
+        if self._checker is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self.check_health()
+                self._next_check = time.monotonic() + interval
+                self._stop.wait(interval)
+
+        self._checker = threading.Thread(
+            target=run, name="llm-pool-health", daemon=True
+        )
+        self._checker.start()
+
+    def close(self):
+        """
+        Stop the background health checks.
+        """
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join()
+            self._checker = None
+            self._next_check = None
+
+    def stats(self) -> List[dict]:
+        """
+        Routing statistics of each backend.
+        """
+        with self._lock:
+            return [
+                {
+                    "model": b.service.model_name,
+                    "api_url": b.service.api_url,
+                    "healthy": b.healthy,
+                    "circuit_open": b.service.breaker.is_open,
+                    "outstanding": b.outstanding,
+                    "requests": b.requests,
+                    "failures": b.failures,
+                    "latency": b.latency,
+                }
+                for b in self.backends
+            ]
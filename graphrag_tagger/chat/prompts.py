@@ -37,7 +37,10 @@ EXAMPLE2 = """
 }
 """
 
-CLASSIFY_PROMPT = """
+# Static part of the classification request. It only depends on the topic
+# list, so it is identical for every chunk of a run and forms a prompt prefix
+# that backends can cache; the chunk itself goes in CLASSIFY_USER_PROMPT.
+CLASSIFY_SYSTEM_PROMPT = """
 You are an expert content classifier. Your task is to analyze a given text excerpt and perform the following:
 
 1. **Determine the type of the content.**
@@ -45,13 +48,6 @@ You are an expert content classifier. Your task is to analyze a given text excer
 3. **If sufficient, select up to 3 topics from the provided list that best describe the content.**
 4. **Only the topic id is required in the output**
 
-Here is the text excerpt you need to analyze:
-```
-<text>
-{text}
-</text>
-```
-
 Here are the candidate topics to choose from:
 ```
 <topics>
@@ -103,4 +99,59 @@ Output your answer as a JSON object with the following keys:
 - For ambiguous headers like "Chapter 3: Results", classify as `header` and mark insufficient.
 
 **Final Warning:** Strictly adhere to JSON syntax. Do not include any extra text or explanations outside of the JSON object.
+
+The text excerpt to analyze is given in the next message.
 """.strip()
+
+CLASSIFY_USER_PROMPT = """Here is the text excerpt you need to analyze:
+```
+<text>
+{text}
+</text>
+```"""
+
+CLASSIFY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "content_type": {"type": "string"},
+        "is_sufficient": {"type": "boolean"},
+        "topics": {"type": "array", "items": {"type": "string"}, "maxItems": 3},
+    },
+    "required": ["content_type", "is_sufficient", "topics"],
+}
+
+# Object wrapper rather than a bare list: several backends only accept
+# object schemas for structured output.
+TOPICS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "topics": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+    },
+    "required": ["topics"],
+}
+
+STRUCTURED_TOPICS_NOTE = """
+Wrap the JSON list in an object under the key "topics", for example:
+{"topics": ["Technology", "Environmental Issues"]}"""
+
+REPAIR_PROMPT = """Your previous answer is not valid:
+{errors}
+
+Answer again with only the corrected JSON, without any extra text."""
+
+MERGE_TOPICS = """
+You are an expert in organizing topic labels. The following topic labels were produced independently for different groups of topics, so some of them are duplicates or near-duplicates.
+
+Here is the list of topic labels:
+<topics>
+{topics}
+</topics>
+
+Follow these steps to complete the task:
+
+1. Identify labels that describe the same theme, even if they are worded differently.
+2. Merge each group of such labels into a single clear, concise label (preferably 1-5 words).
+3. Keep every label that has no duplicate unchanged.
+4. Do not invent themes that are not present in the list.
+
+Present your answer as a JSON list of strings. Do not include any extra text or explanations outside of the JSON list."""
@@ -0,0 +1,209 @@
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a failed request is worth retrying: a timeout, a connection error
+    or a 5xx answer. Other errors, such as a 4xx answer, would fail again.
+
+    The exception chain is searched, since providers wrap the errors of their
+    HTTP client (e.g. aisuite's ``LLMError``).
+
+    :param error: Error raised by the request.
+    :type error: BaseException
+    :rtype: bool
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError)):
+            return True
+        status = getattr(error, "status_code", None)
+        if status is None:
+            status = getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status >= 500
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    The delay before retry ``attempt`` (0-based) is drawn uniformly from
+    ``[0, min(max_delay, base_delay * 2 ** attempt)]``, which spreads retries
+    from concurrent callers instead of synchronizing them into retry storms.
+    """
+
+    def __init__(
+        self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0
+    ):
+        """
+        :param max_retries: Number of retries after the first attempt.
+        :type max_retries: int
+        :param base_delay: Backoff ceiling of the first retry, in seconds.
+        :type base_delay: float
+        :param max_delay: Upper bound of any backoff, in seconds.
+        :type max_delay: float
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limiter whose limit follows an AIMD rule.
+
+    Each successful request completed under ``latency_target`` adds
+    ``1 / limit`` to the limit (about +1 per full window of requests). A failed
+    or slow request multiplies it by ``backoff``, at most once per window, so a
+    burst of errors from the same window only shrinks it once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_target: Optional[float] = None,
+        backoff: float = 0.5,
+    ):
+        """
+        :param initial_limit: Starting number of concurrent requests.
+        :type initial_limit: int
+        :param min_limit: Lower bound of the limit.
+        :type min_limit: int
+        :param max_limit: Upper bound of the limit.
+        :type max_limit: int
+        :param latency_target: Latency in seconds above which a request counts
+                               as congestion. None only reacts to errors.
+        :type latency_target: Optional[float]
+        :param backoff: Multiplicative decrease factor.
+        :type backoff: float
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self._completed = 0
+        self._last_decrease = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, success: bool):
+        with self._cond:
+            self.in_flight -= 1
+            self._completed += 1
+            congested = not success or (
+                self.latency_target is not None and latency > self.latency_target
+            )
+            if congested:
+                if self._completed - self._last_decrease >= int(self.limit):
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = self._completed
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised when a call is rejected because the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that stops traffic to a failing backend.
+
+    After ``failure_threshold`` consecutive failures the circuit opens for
+    ``reset_timeout`` seconds. Once that time has passed a single trial call is
+    let through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        :param failure_threshold: Consecutive failures that open the circuit.
+        :type failure_threshold: int
+        :param reset_timeout: Seconds to wait before a trial call.
+        :type reset_timeout: float
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> float:
+        """
+        Check whether a call may proceed.
+
+        :return: 0 if the call may proceed, otherwise the number of seconds
+                 to wait before asking again.
+        :rtype: float
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                return remaining
+            if self._trial_running:
+                return min(1.0, self.reset_timeout)
+            self._trial_running = True
+            return 0.0
+
+    def wait(self, max_wait: Optional[float] = None):
+        """
+        Block until a call may proceed.
+
+        :param max_wait: Give up after this many seconds. None waits forever.
+        :type max_wait: Optional[float]
+        :raises CircuitOpenError: If ``max_wait`` elapsed with the circuit still open.
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            delay = self.allow()
+            if delay == 0:
+                return
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise CircuitOpenError("Circuit breaker is open.")
+                delay = min(delay, left)
+            time.sleep(delay)
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
@@ -0,0 +1,179 @@
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import tiktoken
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Measurements of one dispatched request.
+
+    :ivar tokens: Tokens of the request, prompt included.
+    :ivar in_flight: Requests in flight once it was sent, itself included.
+    :ivar in_flight_tokens: Tokens in flight once it was sent, its own included.
+    :ivar latency: Seconds from dispatch until it finished.
+    :ivar failed: Whether the request raised.
+    """
+
+    tokens: int
+    in_flight: int
+    in_flight_tokens: int
+    latency: float
+    failed: bool = False
+
+
+class TokenBatchScheduler:
+    """
+    Keeps requests of similar length in flight within a token budget.
+
+    Texts are measured with the tiktoken encoding of the text splitter, plus
+    the tokens of the prompt sent with every text, and dispatched longest
+    first. A request is sent as soon as the tokens in flight leave room for
+    it, so batch-serving backends (e.g. vLLM) keep receiving sequences of
+    similar length without waiting for the slowest request of a batch.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 8192,
+        max_in_flight: int = 64,
+        encoding_name: str = "cl100k_base",
+        prompt: str = "",
+    ):
+        """
+        :param token_budget: Maximum total tokens of the requests in flight. A
+                             longer request is sent once nothing else is.
+        :type token_budget: int
+        :param max_in_flight: Maximum number of requests in flight.
+        :type max_in_flight: int
+        :param encoding_name: tiktoken encoding the texts are measured with.
+        :type encoding_name: str
+        :param prompt: Text sent along with every item, e.g. the system
+                       prompt, counted into the tokens of each request.
+        :type prompt: str
+        :raises ValueError: If the budget or the number of requests in flight
+                            is not positive.
+        """
+        if token_budget < 1 or max_in_flight < 1:
+            raise ValueError(
+                "The token budget and number of requests in flight must be positive."
+            )
+        self.token_budget = token_budget
+        self.max_in_flight = max_in_flight
+        self.encoding = tiktoken.get_encoding(encoding_name)
+        self.prompt_tokens = self.count_tokens([prompt])[0] if prompt else 0
+        self.metrics: List[RequestMetrics] = []
+        self.elapsed = 0.0
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(texts)]
+
+    def map(
+        self,
+        fn: Callable[[T], R],
+        items: Sequence[T],
+        text: Callable[[T], str] = lambda item: item["chunk"],
+    ) -> Iterator[Tuple[int, R]]:
+        """
+        Apply ``fn`` to every item, keeping the budget full.
+
+        :param fn: Function sending the request of one item.
+        :type fn: Callable[[T], R]
+        :param items: Items to process.
+        :type items: Sequence[T]
+        :param text: Text of an item, measured to schedule its request.
+        :type text: Callable[[T], str]
+        :raises Exception: The first error of a request, once the requests in
+                           flight have finished. No request is sent after it.
+        :return: Index and result of every item, in completion order.
+        :rtype: Iterator[Tuple[int, R]]
+        """
+        lengths = [
+            n + self.prompt_tokens
+            for n in self.count_tokens([text(item) for item in items])
+        ]
+        pending = deque(sorted(range(len(items)), key=lambda i: -lengths[i]))
+        if not pending:
+            return
+        done = queue.Queue()
+        started = {}
+        in_flight, tokens = 0, 0
+        start = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+                while pending or in_flight:
+                    while pending and (
+                        not in_flight
+                        or in_flight < self.max_in_flight
+                        and tokens + lengths[pending[0]] <= self.token_budget
+                    ):
+                        i = pending.popleft()
+                        in_flight += 1
+                        tokens += lengths[i]
+                        started[i] = (time.monotonic(), in_flight, tokens)
+                        future = executor.submit(fn, items[i])
+                        future.add_done_callback(lambda f, i=i: done.put((i, f)))
+                    i, future = done.get()
+                    in_flight -= 1
+                    tokens -= lengths[i]
+                    sent, in_flight_then, tokens_then = started.pop(i)
+                    error = future.exception()
+                    self.metrics.append(
+                        RequestMetrics(
+                            tokens=lengths[i],
+                            in_flight=in_flight_then,
+                            in_flight_tokens=tokens_then,
+                            latency=time.monotonic() - sent,
+                            failed=error is not None,
+                        )
+                    )
+                    if error is not None:
+                        pending.clear()
+                        raise error
+                    yield i, future.result()
+        finally:
+            self.elapsed += time.monotonic() - start
+
+    def summary(self) -> Optional[dict]:
+        """
+        Totals over the requests sent so far, None before the first one.
+        """
+        if not self.metrics:
+            return None
+        count = len(self.metrics)
+        tokens = sum(m.tokens for m in self.metrics)
+        return {
+            "requests": count,
+            "tokens": tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "failures": sum(m.failed for m in self.metrics),
+            "mean_in_flight": sum(m.in_flight for m in self.metrics) / count,
+            "mean_in_flight_tokens": sum(m.in_flight_tokens for m in self.metrics)
+            / count,
+            "mean_latency": sum(m.latency for m in self.metrics) / count,
+            "max_latency": max(m.latency for m in self.metrics),
+            "tokens_per_second": tokens / self.elapsed if self.elapsed else 0.0,
+        }
+
+    def report(self) -> str:
+        """
+        One line summary of the requests, for progress output.
+        """
+        summary = self.summary()
+        if summary is None:
+            return "No requests sent."
+        return (
+            f"Sent {summary['requests']} requests "
+            f"(mean {summary['mean_in_flight']:.1f} in flight holding "
+            f"{summary['mean_in_flight_tokens']:.0f} tokens, "
+            f"mean latency {summary['mean_latency']:.2f}s, "
+            f"{summary['tokens_per_second']:.0f} tokens/s)"
+        )
@@ -0,0 +1,266 @@
+import argparse
+import os
+import socket
+import time
+import uuid
+from typing import Dict, Optional
+
+from .tagger import (
+    build_parser,
+    build_topics,
+    classification_tasks,
+    classify_task,
+    extract_chunks,
+    make_llm,
+    write_chunk,
+)
+from .utilities.work_queue import WorkQueue
+
+# Pipeline parameters the workers need to build their LLM.
+LLM_PARAMS = (
+    "llm_model",
+    "llm_timeout",
+    "llm_max_retries",
+    "llm_latency_target",
+    "keep_alive",
+    "structured_output",
+)
+
+
+def run_coordinator(
+    params: dict, queue_path: str, wait: bool = False, poll_interval: float = 5.0
+) -> int:
+    """
+    Extract and chunk the PDFs, fit and clean the topics, then publish one
+    classification task per chunk to the work queue.
+
+    Any previous job in the queue is replaced. A new job id, the topics,
+    output folder and LLM settings are stored in the queue for the workers.
+
+    :param params: Pipeline parameters, as for :func:`graphrag_tagger.tagger.main`.
+    :type params: dict
+    :param queue_path: Path of the SQLite work queue.
+    :type queue_path: str
+    :param wait: Wait until the workers have processed every task.
+    :type wait: bool
+    :param poll_interval: Seconds between progress checks while waiting.
+    :type poll_interval: float
+    :return: Number of published tasks.
+    :rtype: int
+    """
+    all_chunks = extract_chunks(params)
+    if not all_chunks:
+        print("No texts extracted from PDFs.")
+        return 0
+    print(f"Total chunk texts: {len(all_chunks)}")
+
+    llm = make_llm(params)
+    cleaned_topics, shortlists = build_topics(params, all_chunks, llm)
+
+    with WorkQueue(queue_path) as queue:
+        queue.reset()
+        n_tasks = queue.publish(
+            classification_tasks(all_chunks, shortlists),
+            meta={
+                "job": uuid.uuid4().hex,
+                "topics": cleaned_topics,
+                "output_folder": params["output_folder"],
+                # Unset keys are left out, so the workers' defaults apply.
+                "llm": {
+                    key: params[key]
+                    for key in LLM_PARAMS
+                    if params.get(key) is not None
+                },
+            },
+        )
+        print(f"Published {n_tasks} classification tasks to {queue_path}")
+        if wait:
+            wait_for_workers(queue, poll_interval)
+    return n_tasks
+
+
+def wait_for_workers(queue: WorkQueue, poll_interval: float = 5.0) -> Dict[str, int]:
+    """
+    Block until no task is pending or leased, printing progress.
+
+    :return: Final number of tasks in each status.
+    :rtype: Dict[str, int]
+    """
+    while not queue.is_finished():
+        counts = queue.counts()
+        print(
+            f"Tasks done: {counts['done']}, in progress: {counts['leased']}, "
+            f"pending: {counts['pending']}, failed: {counts['failed']}"
+        )
+        time.sleep(poll_interval)
+    counts = queue.counts()
+    print(f"Tasks done: {counts['done']}, failed: {counts['failed']}")
+    for task_id, error in queue.errors().items():
+        print(f"Task {task_id} failed: {error}")
+    return counts
+
+
+def run_worker(
+    queue_path: str,
+    llm=None,
+    llm_params: Optional[dict] = None,
+    api_url: Optional[str] = None,
+    output_folder: Optional[str] = None,
+    worker_id: Optional[str] = None,
+    lease_seconds: float = 300.0,
+    batch_size: int = 1,
+    poll_interval: float = 2.0,
+    exit_when_idle: bool = True,
+) -> int:
+    """
+    Claim classification tasks from the work queue until it is empty, classify
+    their chunks and write the chunk files.
+
+    The job settings (topics, output folder, LLM) are read from the queue when
+    the first task of a job is claimed, and again whenever the coordinator
+    publishes a new job, so workers can be started before the coordinator and
+    can serve several jobs in turn.
+
+    Each task result is also stored in the queue. A task whose lease expired
+    while it was being classified may be completed by another worker; the
+    late result is then discarded.
+
+    :param queue_path: Path of the SQLite work queue.
+    :type queue_path: str
+    :param llm: LLM used to classify, by default built from the job's LLM
+                settings updated with ``llm_params``.
+    :param llm_params: Overrides of the job's ``llm_*`` parameters.
+    :type llm_params: Optional[dict]
+    :param api_url: Endpoint of this worker's LLM backend.
+    :type api_url: Optional[str]
+    :param output_folder: Folder of the chunk files, by default the job's one.
+    :type output_folder: Optional[str]
+    :param worker_id: Lease owner name, by default ``<host>:<pid>``.
+    :type worker_id: Optional[str]
+    :param lease_seconds: Lease duration of a claimed task.
+    :type lease_seconds: float
+    :param batch_size: Number of tasks claimed at a time.
+    :type batch_size: int
+    :param poll_interval: Seconds to wait when there is no task to claim.
+    :type poll_interval: float
+    :param exit_when_idle: Return once a job has been published and none of
+                           its tasks is pending or leased; otherwise keep
+                           polling for new jobs.
+    :type exit_when_idle: bool
+    :return: Number of tasks this worker completed.
+    :rtype: int
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    completed = 0
+    job = topics = job_folder = None
+    job_llm = llm
+    with WorkQueue(queue_path) as queue:
+        while True:
+            tasks = queue.claim(worker_id, lease_seconds, batch_size)
+            if not tasks:
+                # Before the coordinator has published, there is nothing to
+                # finish: keep waiting for the first job.
+                published = queue.get_meta("job") is not None
+                if exit_when_idle and published and queue.is_finished():
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            current = queue.get_meta("job")
+            if current != job:
+                job = current
+                topics = queue.get_meta("topics")
+                job_folder = output_folder or queue.get_meta("output_folder")
+                if llm is None:
+                    params = {**queue.get_meta("llm", {}), **(llm_params or {})}
+                    job_llm = make_llm(params, api_url=api_url)
+                os.makedirs(job_folder, exist_ok=True)
+                print(f"Worker {worker_id} joined job {job}")
+
+            for task in tasks:
+                # Earlier tasks of the batch took time: keep this one's lease.
+                if not queue.renew(task.id, worker_id, lease_seconds):
+                    continue
+                try:
+                    output_data = classify_task(job_llm, task.payload, topics)
+                    write_chunk(job_folder, task.payload["index"], output_data)
+                except Exception as e:
+                    queue.fail(task.id, worker_id, f"{type(e).__name__}: {e}")
+                    continue
+                if queue.complete(task.id, worker_id, output_data):
+                    completed += 1
+    print(f"Worker {worker_id} completed {completed} tasks")
+    return completed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Distributed tagging: a coordinator publishes classification "
+        "tasks to a shared queue, and workers classify them with their own LLM."
+    )
+    subparsers = parser.add_subparsers(dest="role", required=True)
+
+    coordinator = subparsers.add_parser(
+        "coordinator",
+        parents=[build_parser(add_help=False)],
+        help="Extract, chunk and fit topics, then publish the classification tasks",
+    )
+    coordinator.add_argument(
+        "--queue", type=str, required=True, help="Path of the SQLite work queue"
+    )
+    coordinator.add_argument(
+        "--wait", action="store_true", help="Wait until every task is processed"
+    )
+
+    worker = subparsers.add_parser("worker", help="Classify tasks from the queue")
+    worker.add_argument(
+        "--queue", type=str, required=True, help="Path of the SQLite work queue"
+    )
+    worker.add_argument(
+        "--llm_model", type=str, default=None, help="LLM model, default: the job's"
+    )
+    worker.add_argument(
+        "--api_url",
+        type=str,
+        default=None,
+        help='Endpoint of this worker\'s LLM, e.g. "http://localhost:11434"',
+    )
+    worker.add_argument(
+        "--output_folder",
+        type=str,
+        default=None,
+        help="Folder to save chunk files, default: the job's",
+    )
+    worker.add_argument(
+        "--worker_id", type=str, default=None, help="Worker name, default: host:pid"
+    )
+    worker.add_argument(
+        "--lease_seconds",
+        type=float,
+        default=300.0,
+        help="Seconds before an unfinished task can be claimed by another worker",
+    )
+    worker.add_argument(
+        "--batch_size", type=int, default=1, help="Tasks claimed at a time"
+    )
+    worker.add_argument(
+        "--keep_running",
+        action="store_true",
+        help="Keep polling for new tasks when the queue is empty",
+    )
+
+    args = parser.parse_args()
+    if args.role == "coordinator":
+        params = vars(args)
+        run_coordinator(params, params.pop("queue"), wait=params.pop("wait"))
+    else:
+        run_worker(
+            args.queue,
+            llm_params={"llm_model": args.llm_model} if args.llm_model else None,
+            api_url=args.api_url,
+            output_folder=args.output_folder,
+            worker_id=args.worker_id,
+            lease_seconds=args.lease_seconds,
+            batch_size=args.batch_size,
+            exit_when_idle=not args.keep_running,
+        )
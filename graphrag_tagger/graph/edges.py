@@ -0,0 +1,247 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+EDGE_ARRAYS = (
+    "edge_src",
+    "edge_dst",
+    "edge_weight",
+    "edge_detail_offsets",
+    "detail_topic",
+    "detail_rank_i",
+    "detail_rank_j",
+    "detail_contribution",
+)
+
+# Corpus shared with worker processes, set once per process by ``_init_worker``.
+_corpus: Optional["_Corpus"] = None
+
+
+class _Corpus:
+    """
+    Topic lists of all chunks plus an inverted index, as flat numpy arrays.
+
+    ``postings_nodes[postings_indptr[t]:postings_indptr[t + 1]]`` are the chunks
+    tagged with topic ``t`` in increasing order, and ``postings_ranks`` holds the
+    rank of ``t`` in each of those chunks.
+    """
+
+    def __init__(self, offsets: np.ndarray, topics: np.ndarray, scores: np.ndarray):
+        self.offsets = offsets
+        self.topics = topics
+        self.scores = scores
+        n_nodes = len(offsets) - 1
+        counts = np.diff(offsets)
+        nodes = np.repeat(np.arange(n_nodes, dtype=np.int64), counts)
+        ranks = np.arange(len(topics), dtype=np.int64) - np.repeat(offsets[:-1], counts)
+        order = np.lexsort((nodes, topics))
+        self.postings_nodes = nodes[order]
+        self.postings_ranks = ranks[order]
+        self.postings_indptr = np.zeros(len(scores) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(topics, minlength=len(scores)), out=self.postings_indptr[1:]
+        )
+
+
+def encode_classifications(
+    classifications: Iterable[Sequence[str]], scores_map: Dict[str, float]
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Encode per-chunk topic lists as CSR integer arrays against a topic table.
+
+    Only the first occurrence of a topic in a chunk is kept, which matches the
+    ``list.index`` rank used by ``GraphManager.build_graph``.
+
+    :param classifications: Ordered topic list of every chunk.
+    :type classifications: Iterable[Sequence[str]]
+    :param scores_map: Score of every topic.
+    :type scores_map: Dict[str, float]
+    :return: ``(topic_table, offsets, topic_ids, scores)``.
+    :rtype: Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]
+    """
+    topic_ids: Dict[str, int] = {}
+    offsets = [0]
+    flat: List[int] = []
+    for topics in classifications:
+        seen = set()
+        for topic in topics:
+            if topic in seen:
+                continue
+            seen.add(topic)
+            flat.append(topic_ids.setdefault(topic, len(topic_ids)))
+        offsets.append(len(flat))
+    table = list(topic_ids)
+    scores = np.asarray([scores_map[t] for t in table], dtype=np.float64)
+    return (
+        table,
+        np.asarray(offsets, dtype=np.int64),
+        np.asarray(flat, dtype=np.int64),
+        scores,
+    )
+
+
+def _init_worker(offsets: np.ndarray, topics: np.ndarray, scores: np.ndarray):
+    global _corpus
+    _corpus = _Corpus(offsets, topics, scores)
+
+
+def _empty_edges() -> Dict[str, np.ndarray]:
+    return {
+        "edge_src": np.zeros(0, dtype=np.int32),
+        "edge_dst": np.zeros(0, dtype=np.int32),
+        "edge_weight": np.zeros(0, dtype=np.float64),
+        "edge_detail_offsets": np.zeros(1, dtype=np.int64),
+        "detail_topic": np.zeros(0, dtype=np.int32),
+        "detail_rank_i": np.zeros(0, dtype=np.int16),
+        "detail_rank_j": np.zeros(0, dtype=np.int16),
+        "detail_contribution": np.zeros(0, dtype=np.float64),
+    }
+
+
+def _shard_edges(bounds: Tuple[int, int]) -> Dict[str, np.ndarray]:
+    """
+    Compute the edges ``(i, j)`` with ``start <= i < stop`` and ``j > i``.
+
+    Edges are ordered by ``i`` then ``j`` and the details of an edge by the rank
+    of the topic in chunk ``i``.
+    """
+    corpus = _corpus
+    start, stop = bounds
+    parts: Dict[str, list] = {name: [] for name in EDGE_ARRAYS}
+    for i in range(start, stop):
+        lo, hi = corpus.offsets[i], corpus.offsets[i + 1]
+        rows_j, rows_topic, rows_rank_i, rows_rank_j = [], [], [], []
+        for rank_i, topic in enumerate(corpus.topics[lo:hi]):
+            p_lo, p_hi = corpus.postings_indptr[topic : topic + 2]
+            nodes = corpus.postings_nodes[p_lo:p_hi]
+            first = p_lo + np.searchsorted(nodes, i, side="right")
+            if first == p_hi:
+                continue
+            rows_j.append(corpus.postings_nodes[first:p_hi])
+            rows_rank_j.append(corpus.postings_ranks[first:p_hi])
+            rows_topic.append(np.full(p_hi - first, topic, dtype=np.int64))
+            rows_rank_i.append(np.full(p_hi - first, rank_i, dtype=np.int64))
+        if not rows_j:
+            continue
+        j = np.concatenate(rows_j)
+        # Stable sort keeps the details of each edge in rank order of chunk i.
+        order = np.argsort(j, kind="stable")
+        j = j[order]
+        topic = np.concatenate(rows_topic)[order]
+        rank_i = np.concatenate(rows_rank_i)[order]
+        rank_j = np.concatenate(rows_rank_j)[order]
+        contribution = 1.0 / (rank_i + 1) + 1.0 / (rank_j + 1) + corpus.scores[topic]
+        starts = np.flatnonzero(np.r_[True, j[1:] != j[:-1]])
+        parts["edge_src"].append(np.full(len(starts), i, dtype=np.int32))
+        parts["edge_dst"].append(j[starts].astype(np.int32))
+        parts["edge_weight"].append(np.add.reduceat(contribution, starts))
+        parts["edge_detail_offsets"].append(np.diff(np.r_[starts, len(j)]))
+        parts["detail_topic"].append(topic.astype(np.int32))
+        parts["detail_rank_i"].append(rank_i.astype(np.int16))
+        parts["detail_rank_j"].append(rank_j.astype(np.int16))
+        parts["detail_contribution"].append(contribution)
+    return _pack(parts) if parts["edge_src"] else _empty_edges()
+
+
+def _pack(parts: Dict[str, list]) -> Dict[str, np.ndarray]:
+    counts = np.concatenate(parts.pop("edge_detail_offsets"))
+    packed = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+    packed["edge_detail_offsets"] = np.r_[0, np.cumsum(counts)].astype(np.int64)
+    return packed
+
+
+def _concat_shards(shards: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Concatenate shard outputs in the given order, rebasing the detail offsets.
+    """
+    merged = {
+        name: np.concatenate([s[name] for s in shards])
+        for name in EDGE_ARRAYS
+        if name != "edge_detail_offsets"
+    }
+    counts = [np.diff(s["edge_detail_offsets"]) for s in shards]
+    merged["edge_detail_offsets"] = np.r_[0, np.cumsum(np.concatenate(counts))].astype(
+        np.int64
+    )
+    return merged
+
+
+def select_edges(
+    edges: Dict[str, np.ndarray], keep: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Keep the edges selected by a boolean mask, with their details.
+
+    :param edges: Edge arrays keyed by the names in ``EDGE_ARRAYS``.
+    :type edges: Dict[str, np.ndarray]
+    :param keep: Whether to keep each edge.
+    :type keep: np.ndarray
+    :return: The selected edge arrays, in the same order.
+    :rtype: Dict[str, np.ndarray]
+    """
+    counts = np.diff(edges["edge_detail_offsets"])
+    keep_details = np.repeat(keep, counts)
+    selected = {
+        name: edges[name][keep_details if name.startswith("detail_") else keep]
+        for name in EDGE_ARRAYS
+        if name != "edge_detail_offsets"
+    }
+    selected["edge_detail_offsets"] = np.r_[0, np.cumsum(counts[keep])].astype(np.int64)
+    return selected
+
+
+def compute_edges(
+    offsets: np.ndarray,
+    topics: np.ndarray,
+    scores: np.ndarray,
+    n_jobs: int = 1,
+    shard_size: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute all weighted edges between chunks sharing at least one topic.
+
+    Candidate pairs come from a topic inverted index rather than all ``n^2``
+    pairs. The chunk-id range is split into shards that are processed in a
+    process pool when ``n_jobs > 1``; each worker returns plain numpy arrays and
+    shards are merged in chunk-id order, so the result does not depend on
+    ``n_jobs`` or on scheduling.
+
+    :param offsets: CSR offsets of the per-chunk topic ids (see
+                    :func:`encode_classifications`).
+    :type offsets: np.ndarray
+    :param topics: Flat topic ids.
+    :type topics: np.ndarray
+    :param scores: Score of every topic id.
+    :type scores: np.ndarray
+    :param n_jobs: Number of worker processes. 1 runs in the current process.
+    :type n_jobs: int
+    :param shard_size: Chunks per shard. Defaults to enough shards for
+                       ``8 * n_jobs`` tasks so that uneven shards balance out.
+    :type shard_size: Optional[int]
+    :return: Edge arrays keyed by the names in ``EDGE_ARRAYS``.
+    :rtype: Dict[str, np.ndarray]
+    """
+    n_nodes = len(offsets) - 1
+    if n_nodes == 0:
+        return _empty_edges()
+    if shard_size is None:
+        shard_size = max(1, -(-n_nodes // (8 * max(n_jobs, 1))))
+    shards = [(s, min(s + shard_size, n_nodes)) for s in range(0, n_nodes, shard_size)]
+    progress = dict(total=len(shards), desc="Building edges")
+    if n_jobs <= 1:
+        global _corpus
+        _init_worker(offsets, topics, scores)
+        try:
+            results = [_shard_edges(bounds) for bounds in tqdm(shards, **progress)]
+        finally:
+            _corpus = None
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_worker,
+            initargs=(offsets, topics, scores),
+        ) as executor:
+            results = list(tqdm(executor.map(_shard_edges, shards), **progress))
+    return _concat_shards(results)
@@ -1,43 +1,160 @@
 import json
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from glob import glob
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import networkx as nx
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+from ..utilities.records import ChunkTable
+from .edges import compute_edges, encode_classifications, select_edges
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional, faster JSON parser
+    orjson = None
+
+
+def _read_json(path: str):
+    with open(path, "rb") as f:
+        data = f.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _load_chunk_file(
+    path: str, content_type_filter: str = "", keep_raw: bool = False
+) -> Optional[dict]:
+    """
+    Read one chunk file and reduce it to the fields used to build the graph.
+
+    :return: ``None`` if the chunk is rejected by ``content_type_filter``.
+    """
+    raw = _read_json(path)
+    classification = raw.get("classification") or {}
+    if isinstance(classification, list):
+        classification = {"topics": classification}
+    if content_type_filter:
+        content_type = classification.get("content_type") or ""
+        if not content_type or content_type not in content_type_filter:
+            return None
+    record = {
+        "chunk": raw["chunk"],
+        "source_file": raw["source_file"],
+        "classification": classification.get("topics") or [],
+        "content_type": classification.get("content_type"),
+    }
+    if keep_raw:
+        record["all_raw"] = classification
+    return record
+
 
 class GraphManager:
-    def __init__(self):
-        pass
+    def __init__(self, n_workers: int = 8):
+        """
+        :param n_workers: Number of threads used to read chunk files.
+        :type n_workers: int
+        """
+        self.n_workers = n_workers
 
-    def load_raw_files(
-        self, input_folder: str, pattern: str = "*.json", content_type_filter=""
-    ):
+    def iter_raw_files(
+        self,
+        input_folder: str,
+        pattern: str = "*.json",
+        content_type_filter="",
+        keep_raw: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Lazily read chunk files in sorted order, parsing them in a thread pool.
+
+        At most a few files per worker are in flight at any time, and chunks
+        rejected by ``content_type_filter`` are dropped before being yielded.
+
+        :param input_folder: Folder containing the chunk JSON files.
+        :type input_folder: str
+        :param pattern: Glob pattern of the chunk files.
+        :type pattern: str
+        :param content_type_filter: Only keep chunks whose ``content_type`` is in
+                                    this string, e.g. ``"paragraph,list"``.
+        :type content_type_filter: str
+        :param keep_raw: Keep the full classification under ``"all_raw"``.
+        :type keep_raw: bool
+        :return: Records with ``chunk``, ``source_file``, ``classification``
+                 (the list of topics) and ``content_type``.
+        :rtype: Iterator[dict]
+        """
         files = sorted(glob(os.path.join(input_folder, pattern)))
         print(f"Found {len(files)} files in {input_folder}.")
-        raws = []
         if content_type_filter:
             print(f"Filtering by content type: {content_type_filter}")
-        for f in tqdm(files, desc="Loading raw files"):
-            raw = json.load(open(f))
-            raw["all_raw"] = raw["classification"]
-            if content_type_filter:
-                content_type = raw["classification"].get("content_type", None)
-                if content_type not in content_type_filter:
-                    continue
-            raw["classification"] = raw["classification"].get("topics", [])
-            raws.append(raw)
+        window = max(1, self.n_workers) * 4
+        with ThreadPoolExecutor(max_workers=max(1, self.n_workers)) as executor:
+            pending: deque = deque()
+            for f in tqdm(files, desc="Loading raw files"):
+                pending.append(
+                    executor.submit(_load_chunk_file, f, content_type_filter, keep_raw)
+                )
+                if len(pending) >= window:
+                    record = pending.popleft().result()
+                    if record is not None:
+                        yield record
+            while pending:
+                record = pending.popleft().result()
+                if record is not None:
+                    yield record
+
+    def load_raw_files(
+        self,
+        input_folder: str,
+        pattern: str = "*.json",
+        content_type_filter="",
+        keep_raw: bool = False,
+    ) -> ChunkTable:
+        """
+        Read every chunk file, see :meth:`iter_raw_files`.
+
+        :param keep_raw: Also keep the full classification of each record, in
+                         the ``raw`` list of the table (aligned with its
+                         records).
+        :type keep_raw: bool
+        :return: The records.
+        :rtype: ChunkTable
+        """
+        records = self.iter_raw_files(
+            input_folder, pattern, content_type_filter, keep_raw
+        )
+        if keep_raw:
+            raw: list[dict] = []
+
+            def collect(records):
+                for record in records:
+                    raw.append(record.pop("all_raw"))
+                    yield record
+
+            raws = ChunkTable.from_dicts(collect(records))
+            raws.raw = raw
+        else:
+            raws = ChunkTable.from_dicts(records)
         print(f"Loaded {len(raws)} raw documents.")
         return raws
 
-    def compute_scores(self, raws: list[dict]) -> dict:
+    @staticmethod
+    def _as_table(raws: Union[ChunkTable, list[dict]]) -> ChunkTable:
+        if isinstance(raws, ChunkTable):
+            return raws
+        return ChunkTable.from_dicts(raws)
+
+    def compute_scores(self, raws: Union[ChunkTable, list[dict]]) -> dict:
         print("Computing scores...")
         # Count topic rankings
         counter: dict[str, dict] = {}
-        for raw in raws:
-            for i, topic in enumerate(raw["classification"], start=1):
+        for topics in self._as_table(raws).topic_lists():
+            for i, topic in enumerate(topics, start=1):
                 if topic not in counter:
                     counter[topic] = {}
                 counter[topic][i] = counter[topic].get(i, 0) + 1
@@ -51,43 +168,144 @@ class GraphManager:
         print("Scores computed.")
         return scores_map
 
-    def build_graph(self, raws: list[dict], scores_map: dict[str, float]):
-        print("Building graph...")
-        chunks = raws
+    def compute_edge_arrays(
+        self,
+        raws: Union[ChunkTable, list[dict]],
+        scores_map: dict[str, float],
+        n_jobs: int = 1,
+    ) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        Compute the weighted edges between chunks sharing a topic, as arrays.
+
+        :param raws: Chunk records.
+        :type raws: Union[ChunkTable, list[dict]]
+        :param scores_map: Score of every topic, see :meth:`compute_scores`.
+        :type scores_map: dict[str, float]
+        :param n_jobs: Number of processes computing the edges.
+        :type n_jobs: int
+        :return: The topic table the ``detail_topic`` ids index into, and the
+                 edge arrays, see :func:`compute_edges`.
+        :rtype: Tuple[List[str], Dict[str, np.ndarray]]
+        """
+        print("Computing edges...")
+        topic_table, offsets, topic_ids, scores = encode_classifications(
+            self._as_table(raws).topic_lists(), scores_map
+        )
+        edges = compute_edges(offsets, topic_ids, scores, n_jobs=n_jobs)
+        print("Edges computed:", len(edges["edge_src"]))
+        return topic_table, edges
+
+    def prune_edges(
+        self, edges: Dict[str, np.ndarray], threshold_percentile: float
+    ) -> Dict[str, np.ndarray]:
+        """
+        Drop the edges weighing less than a percentile of the edge weights,
+        like :meth:`prune_graph` does on a graph.
+
+        :param edges: Edge arrays, see :meth:`compute_edge_arrays`.
+        :type edges: Dict[str, np.ndarray]
+        :param threshold_percentile: Percentile of the weights below which an
+                                     edge is dropped.
+        :type threshold_percentile: float
+        :return: The remaining edge arrays.
+        :rtype: Dict[str, np.ndarray]
+        """
+        print("Starting edge pruning...")
+        weights = edges["edge_weight"]
+        if not len(weights):
+            print("No edges to prune.")
+            return edges
+        print("Min weight:", weights.min())
+        print("Max weight:", weights.max())
+        print("Mean weight:", weights.mean())
+        print("Median weight:", np.median(weights))
+        threshold = np.percentile(weights, threshold_percentile)
+        print(f"Pruning threshold ({threshold_percentile}th percentile):", threshold)
+        keep = weights >= threshold
+        print(f"Removing {len(keep) - keep.sum()} edges out of {len(keep)}...")
+        pruned = select_edges(edges, keep)
+        print("Edges pruned. Edges:", len(pruned["edge_src"]))
+        return pruned
+
+    def graph_from_edges(
+        self,
+        raws: Union[ChunkTable, list[dict]],
+        topic_table: List[str],
+        edges: Dict[str, np.ndarray],
+    ) -> nx.Graph:
+        """
+        Build the networkx graph of the chunks and the given edges.
+
+        Prune the edges first with :meth:`prune_edges`: the ``common`` details
+        are built as Python objects for every edge given.
+
+        :param raws: Chunk records, the nodes of the graph.
+        :type raws: Union[ChunkTable, list[dict]]
+        :param topic_table: Topic table of the edges, see
+                            :meth:`compute_edge_arrays`.
+        :type topic_table: List[str]
+        :param edges: Edge arrays.
+        :type edges: Dict[str, np.ndarray]
+        :rtype: nx.Graph
+        """
+        chunks = self._as_table(raws)
         G = nx.Graph()
-        for idx, chunk in enumerate(chunks):
-            G.add_node(
+        G.add_nodes_from(
+            (
                 idx,
-                chunk_text=chunk["chunk"],
-                source=chunk["source_file"],
-                classifications=chunk["classification"],
+                {
+                    "chunk_text": chunk.chunk,
+                    "source": chunks.source_of(chunk),
+                    "classifications": chunks.topics_of(chunk),
+                },
             )
-
-        def compute_contribution(rank1: int, rank2: int, topic: str) -> float:
-            return 1.0 / (rank1 + 1) + 1.0 / (rank2 + 1) + scores_map[topic]
-
-        for i in tqdm(range(len(chunks)), desc="Building nodes & edges"):
-            for j in range(i + 1, len(chunks)):
-                common_details = []
-                total_weight = 0.0
-                classifications_i: list = list(chunks[i]["classification"])
-                classifications_j: list = list(chunks[j]["classification"])
-                topics = set(classifications_i).intersection(classifications_j)
-                for topic in topics:
-                    rank_i = classifications_i.index(topic)
-                    rank_j = classifications_j.index(topic)
-                    contribution = compute_contribution(rank_i, rank_j, topic)
-                    common_details.append(
+            for idx, chunk in enumerate(chunks)
+        )
+        detail_offsets = edges["edge_detail_offsets"].tolist()
+        detail_topic = edges["detail_topic"].tolist()
+        detail_rank_i = edges["detail_rank_i"].tolist()
+        detail_rank_j = edges["detail_rank_j"].tolist()
+        detail_contribution = edges["detail_contribution"].tolist()
+        G.add_edges_from(
+            (
+                i,
+                j,
+                {
+                    "weight": weight,
+                    "common": [
                         {
-                            "topic": topic,
-                            "rank_i": rank_i,
-                            "rank_j": rank_j,
-                            "contribution": contribution,
+                            "topic": topic_table[detail_topic[d]],
+                            "rank_i": detail_rank_i[d],
+                            "rank_j": detail_rank_j[d],
+                            "contribution": detail_contribution[d],
                         }
-                    )
-                    total_weight += contribution
-                if common_details:
-                    G.add_edge(i, j, weight=total_weight, common=common_details)
+                        for d in range(detail_offsets[k], detail_offsets[k + 1])
+                    ],
+                },
+            )
+            for k, (i, j, weight) in enumerate(
+                zip(
+                    edges["edge_src"].tolist(),
+                    edges["edge_dst"].tolist(),
+                    edges["edge_weight"].tolist(),
+                )
+            )
+        )
+        return G
+
+    def build_graph(
+        self,
+        raws: Union[ChunkTable, list[dict]],
+        scores_map: dict[str, float],
+        n_jobs: int = 1,
+    ):
+        """
+        Build the graph of every edge. On large corpora, prune the edge arrays
+        before building the graph instead, see :meth:`prune_edges`.
+        """
+        print("Building graph...")
+        topic_table, edges = self.compute_edge_arrays(raws, scores_map, n_jobs)
+        G = self.graph_from_edges(raws, topic_table, edges)
         print("Graph built. Nodes:", G.number_of_nodes(), "Edges:", G.number_of_edges())
         return G
 
@@ -0,0 +1,410 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import networkx as nx
+import numpy as np
+
+from ..utilities.records import ChunkTable
+
+FORMAT_NAME = "graphrag-tagger-graph"
+FORMAT_VERSION = 1
+
+_META_FILE = "meta.json"
+_TABLES_FILE = "tables.json"
+_ARRAYS = (
+    "node_ids",
+    "node_text",
+    "node_text_offsets",
+    "node_source",
+    "node_topic_offsets",
+    "node_topics",
+    "node_component",
+    "edge_src",
+    "edge_dst",
+    "edge_weight",
+    "edge_detail_offsets",
+    "detail_topic",
+    "detail_rank_i",
+    "detail_rank_j",
+    "detail_contribution",
+)
+
+
+class GraphStore:
+    """
+    Compact, versioned on-disk representation of a chunk graph.
+
+    A store is a folder of ``.npy`` arrays plus two small JSON files:
+
+    * ``meta.json`` holds the format name, version and sizes.
+    * ``tables.json`` holds the shared topic table (with optional topic scores)
+      and the source file table.
+
+    Node attributes are stored column-wise: chunk texts as one UTF-8 byte array
+    with offsets, sources and topics as integer ids into the shared tables.
+    Edges are stored as ``src``/``dst``/``weight`` arrays, and the per-topic
+    ``common`` details of every edge as a CSR table indexed by edge position.
+    Arrays are loaded with memory mapping, so opening a store is cheap
+    regardless of the graph size.
+    """
+
+    def __init__(
+        self,
+        arrays: Dict[str, np.ndarray],
+        topics: List[str],
+        sources: List[str],
+        topic_scores: Optional[List[float]] = None,
+    ):
+        """
+        :param arrays: Mapping of array name to numpy array (see ``_ARRAYS``).
+        :type arrays: Dict[str, np.ndarray]
+        :param topics: Topic table; topic ids index into this list.
+        :type topics: List[str]
+        :param sources: Source file table; source ids index into this list.
+        :type sources: List[str]
+        :param topic_scores: Optional score of each topic, aligned with ``topics``.
+        :type topic_scores: Optional[List[float]]
+        """
+        missing = [name for name in _ARRAYS if name not in arrays]
+        if missing:
+            raise ValueError(f"Missing graph arrays: {missing}")
+        self.arrays = arrays
+        self.topics = topics
+        self.sources = sources
+        self.topic_scores = topic_scores
+        self._node_index: Optional[Dict[int, int]] = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.arrays["node_ids"])
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.arrays["edge_src"])
+
+    @classmethod
+    def from_networkx(
+        cls, G: nx.Graph, scores_map: Optional[Dict[str, float]] = None
+    ) -> "GraphStore":
+        """
+        Convert a graph produced by ``GraphManager.build_graph`` into a store.
+
+        Edge endpoints are stored as node positions (``0..num_nodes-1``) and the
+        original node ids are kept in ``node_ids``.
+
+        :param G: Graph with ``chunk_text``, ``source``, ``classifications`` and
+                  optionally ``component_id`` node attributes.
+        :type G: nx.Graph
+        :param scores_map: Optional topic scores from ``GraphManager.compute_scores``.
+        :type scores_map: Optional[Dict[str, float]]
+        :return: The in-memory store.
+        :rtype: GraphStore
+        """
+        topic_ids: Dict[str, int] = {}
+        source_ids: Dict[str, int] = {}
+        if scores_map:
+            for topic in scores_map:
+                topic_ids.setdefault(topic, len(topic_ids))
+
+        def topic_id(topic: str) -> int:
+            return topic_ids.setdefault(topic, len(topic_ids))
+
+        nodes = list(G.nodes(data=True))
+        position = {node: pos for pos, (node, _) in enumerate(nodes)}
+
+        text_parts: List[bytes] = []
+        text_offsets = [0]
+        node_source = []
+        node_topics: List[int] = []
+        node_topic_offsets = [0]
+        node_component = []
+        for _, data in nodes:
+            encoded = str(data.get("chunk_text", "")).encode("utf-8")
+            text_parts.append(encoded)
+            text_offsets.append(text_offsets[-1] + len(encoded))
+            source = str(data.get("source", ""))
+            node_source.append(source_ids.setdefault(source, len(source_ids)))
+            node_topics.extend(topic_id(t) for t in data.get("classifications", []))
+            node_topic_offsets.append(len(node_topics))
+            node_component.append(data.get("component_id", -1))
+
+        edge_src, edge_dst, edge_weight = [], [], []
+        detail_offsets = [0]
+        detail_topic, detail_rank_i, detail_rank_j = [], [], []
+        detail_contribution = []
+        for u, v, data in G.edges(data=True):
+            edge_src.append(position[u])
+            edge_dst.append(position[v])
+            edge_weight.append(data.get("weight", 0.0))
+            for detail in data.get("common", []):
+                detail_topic.append(topic_id(detail["topic"]))
+                detail_rank_i.append(detail["rank_i"])
+                detail_rank_j.append(detail["rank_j"])
+                detail_contribution.append(detail["contribution"])
+            detail_offsets.append(len(detail_topic))
+
+        arrays = {
+            "node_ids": np.asarray([n for n, _ in nodes], dtype=np.int64),
+            "node_text": np.frombuffer(b"".join(text_parts), dtype=np.uint8),
+            "node_text_offsets": np.asarray(text_offsets, dtype=np.int64),
+            "node_source": np.asarray(node_source, dtype=np.int32),
+            "node_topic_offsets": np.asarray(node_topic_offsets, dtype=np.int64),
+            "node_topics": np.asarray(node_topics, dtype=np.int32),
+            "node_component": np.asarray(node_component, dtype=np.int32),
+            "edge_src": np.asarray(edge_src, dtype=np.int32),
+            "edge_dst": np.asarray(edge_dst, dtype=np.int32),
+            "edge_weight": np.asarray(edge_weight, dtype=np.float64),
+            "edge_detail_offsets": np.asarray(detail_offsets, dtype=np.int64),
+            "detail_topic": np.asarray(detail_topic, dtype=np.int32),
+            "detail_rank_i": np.asarray(detail_rank_i, dtype=np.int16),
+            "detail_rank_j": np.asarray(detail_rank_j, dtype=np.int16),
+            "detail_contribution": np.asarray(detail_contribution, dtype=np.float32),
+        }
+        topics = list(topic_ids)
+        topic_scores = None
+        if scores_map:
+            topic_scores = [float(scores_map.get(t, np.nan)) for t in topics]
+        return cls(arrays, topics, list(source_ids), topic_scores)
+
+    @classmethod
+    def from_edges(
+        cls,
+        chunks: ChunkTable,
+        topic_table: List[str],
+        edges: Dict[str, np.ndarray],
+        scores_map: Optional[Dict[str, float]] = None,
+        component_map: Optional[Dict[int, int]] = None,
+    ) -> "GraphStore":
+        """
+        Build a store from chunk records and edge arrays, without a networkx
+        graph.
+
+        Node ids are the positions of the chunks in ``chunks``, as in
+        ``GraphManager.build_graph``.
+
+        :param chunks: Chunk records, the nodes of the graph.
+        :type chunks: ChunkTable
+        :param topic_table: Topic table the ``detail_topic`` ids index into.
+        :type topic_table: List[str]
+        :param edges: Edge arrays from ``GraphManager.compute_edge_arrays``,
+                      usually pruned.
+        :type edges: Dict[str, np.ndarray]
+        :param scores_map: Optional topic scores from ``GraphManager.compute_scores``.
+        :type scores_map: Optional[Dict[str, float]]
+        :param component_map: Optional component id of each node.
+        :type component_map: Optional[Dict[int, int]]
+        :return: The in-memory store.
+        :rtype: GraphStore
+        """
+        topic_ids: Dict[str, int] = {}
+        for topic in list(scores_map or ()) + chunks.topics + list(topic_table):
+            topic_ids.setdefault(topic, len(topic_ids))
+        chunk_topics = np.asarray([topic_ids[t] for t in chunks.topics], dtype=np.int32)
+        edge_topics = np.asarray([topic_ids[t] for t in topic_table], dtype=np.int32)
+
+        text_parts = [record.chunk.encode("utf-8") for record in chunks]
+        node_topics = [
+            np.asarray(record.topic_ids, dtype=np.int64) for record in chunks
+        ]
+        component_map = component_map or {}
+        arrays = {
+            "node_ids": np.arange(len(chunks), dtype=np.int64),
+            "node_text": np.frombuffer(b"".join(text_parts), dtype=np.uint8),
+            "node_text_offsets": np.r_[
+                0, np.cumsum([len(part) for part in text_parts], dtype=np.int64)
+            ].astype(np.int64),
+            "node_source": np.asarray(
+                [record.source_id for record in chunks], dtype=np.int32
+            ),
+            "node_topic_offsets": np.r_[
+                0, np.cumsum([len(t) for t in node_topics], dtype=np.int64)
+            ].astype(np.int64),
+            "node_topics": chunk_topics[
+                np.concatenate(node_topics) if node_topics else np.zeros(0, int)
+            ],
+            "node_component": np.asarray(
+                [component_map.get(idx, -1) for idx in range(len(chunks))],
+                dtype=np.int32,
+            ),
+            "edge_src": edges["edge_src"].astype(np.int32),
+            "edge_dst": edges["edge_dst"].astype(np.int32),
+            "edge_weight": edges["edge_weight"].astype(np.float64),
+            "edge_detail_offsets": edges["edge_detail_offsets"].astype(np.int64),
+            "detail_topic": edge_topics[edges["detail_topic"]],
+            "detail_rank_i": edges["detail_rank_i"].astype(np.int16),
+            "detail_rank_j": edges["detail_rank_j"].astype(np.int16),
+            "detail_contribution": edges["detail_contribution"].astype(np.float32),
+        }
+        topics = list(topic_ids)
+        topic_scores = None
+        if scores_map:
+            topic_scores = [float(scores_map.get(t, np.nan)) for t in topics]
+        return cls(arrays, topics, list(chunks.sources), topic_scores)
+
+    def save(self, folder: str):
+        """
+        Write the store to ``folder``, creating it if needed.
+
+        :param folder: Destination folder.
+        :type folder: str
+        """
+        os.makedirs(folder, exist_ok=True)
+        meta_path = os.path.join(folder, _META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for name in _ARRAYS:
+            np.save(os.path.join(folder, name + ".npy"), np.asarray(self.arrays[name]))
+        with open(os.path.join(folder, _TABLES_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "topics": self.topics,
+                    "topic_scores": self.topic_scores,
+                    "sources": self.sources,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        # Written last so a partially written store is never seen as valid.
+        with open(meta_path, "w") as f:
+            json.dump(
+                {
+                    "format": FORMAT_NAME,
+                    "version": FORMAT_VERSION,
+                    "num_nodes": self.num_nodes,
+                    "num_edges": self.num_edges,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True) -> "GraphStore":
+        """
+        Open a store written by :meth:`save`.
+
+        :param folder: Folder containing the store.
+        :type folder: str
+        :param mmap: Memory-map the arrays instead of reading them into memory.
+        :type mmap: bool
+        :raises ValueError: If the folder is not a store or its version is unsupported.
+        :return: The loaded store.
+        :rtype: GraphStore
+        """
+        meta = read_meta(folder)
+        if meta.get("format") != FORMAT_NAME:
+            raise ValueError(f"{folder} does not contain a {FORMAT_NAME} store.")
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported graph store version {meta.get('version')}, "
+                f"expected {FORMAT_VERSION}."
+            )
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(folder, name + ".npy"), mmap_mode=mmap_mode)
+            for name in _ARRAYS
+        }
+        with open(os.path.join(folder, _TABLES_FILE), encoding="utf-8") as f:
+            tables = json.load(f)
+        return cls(arrays, tables["topics"], tables["sources"], tables["topic_scores"])
+
+    def position(self, node_id: int) -> int:
+        """
+        Return the position of a node id in the node arrays.
+        """
+        if self._node_index is None:
+            self._node_index = {
+                int(n): pos for pos, n in enumerate(self.arrays["node_ids"])
+            }
+        return self._node_index[node_id]
+
+    def chunk_text(self, pos: int) -> str:
+        offsets = self.arrays["node_text_offsets"]
+        data = self.arrays["node_text"][offsets[pos] : offsets[pos + 1]]
+        return bytes(data).decode("utf-8")
+
+    def source(self, pos: int) -> str:
+        return self.sources[self.arrays["node_source"][pos]]
+
+    def node_topic_ids(self, pos: int) -> np.ndarray:
+        offsets = self.arrays["node_topic_offsets"]
+        return self.arrays["node_topics"][offsets[pos] : offsets[pos + 1]]
+
+    def classifications(self, pos: int) -> List[str]:
+        return [self.topics[t] for t in self.node_topic_ids(pos)]
+
+    def edge_details(self, edge: int) -> List[dict]:
+        """
+        Rebuild the ``common`` detail list of the edge at position ``edge``.
+        """
+        offsets = self.arrays["edge_detail_offsets"]
+        start, end = offsets[edge], offsets[edge + 1]
+        return [
+            {
+                "topic": self.topics[self.arrays["detail_topic"][k]],
+                "rank_i": int(self.arrays["detail_rank_i"][k]),
+                "rank_j": int(self.arrays["detail_rank_j"][k]),
+                "contribution": float(self.arrays["detail_contribution"][k]),
+            }
+            for k in range(start, end)
+        ]
+
+    def to_networkx(self, with_details: bool = True) -> nx.Graph:
+        """
+        Rebuild a networkx graph equivalent to the one the store was created from.
+
+        :param with_details: Also rebuild the ``common`` edge attribute.
+        :type with_details: bool
+        :rtype: nx.Graph
+        """
+        G = nx.Graph()
+        node_ids = self.arrays["node_ids"]
+        components = self.arrays["node_component"]
+        for pos in range(self.num_nodes):
+            attrs = {
+                "chunk_text": self.chunk_text(pos),
+                "source": self.source(pos),
+                "classifications": self.classifications(pos),
+            }
+            if components[pos] >= 0:
+                attrs["component_id"] = int(components[pos])
+            G.add_node(int(node_ids[pos]), **attrs)
+        src, dst = self.arrays["edge_src"], self.arrays["edge_dst"]
+        weights = self.arrays["edge_weight"]
+        for edge in range(self.num_edges):
+            attrs = {"weight": float(weights[edge])}
+            if with_details:
+                attrs["common"] = self.edge_details(edge)
+            G.add_edge(int(node_ids[src[edge]]), int(node_ids[dst[edge]]), **attrs)
+        return G
+
+
+def read_meta(folder: str) -> dict:
+    """
+    Read the metadata of a graph store without loading it.
+
+    Consumers can use this to check ``version`` against ``FORMAT_VERSION``.
+
+    :param folder: Folder containing the store.
+    :type folder: str
+    :rtype: dict
+    """
+    with open(os.path.join(folder, _META_FILE)) as f:
+        return json.load(f)
+
+
+def save_graph(
+    G: nx.Graph, folder: str, scores_map: Optional[Dict[str, float]] = None
+) -> GraphStore:
+    """
+    Convert ``G`` to a :class:`GraphStore` and save it to ``folder``.
+    """
+    store = GraphStore.from_networkx(G, scores_map)
+    store.save(folder)
+    return store
+
+
+def load_graph(folder: str, mmap: bool = True) -> GraphStore:
+    """
+    Load a :class:`GraphStore` from ``folder``.
+    """
+    return GraphStore.load(folder, mmap=mmap)
@@ -0,0 +1,256 @@
+from typing import List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from .graph_store import GraphStore
+
+
+def _csr(keys: np.ndarray, values: np.ndarray, n_keys: int):
+    """
+    Group ``values`` by ``keys`` (already sorted by key) into CSR arrays.
+    """
+    counts = np.bincount(keys, minlength=n_keys)
+    indptr = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, np.ascontiguousarray(values)
+
+
+class GraphQueryEngine:
+    """
+    Read-only query API over a chunk graph.
+
+    All indexes are built once at construction time as CSR arrays, so every
+    lookup is an array slice:
+
+    * topic -> chunks, ordered by the rank of the topic in each chunk,
+    * chunk -> neighbours, ordered by decreasing edge weight,
+    * component (and optionally community) -> chunks.
+
+    Nodes are addressed by the ids used in the graph (the chunk index assigned
+    by ``GraphManager.build_graph``).
+    """
+
+    def __init__(self, store: GraphStore, communities: bool = False):
+        """
+        :param store: Graph store to serve queries from.
+        :type store: GraphStore
+        :param communities: Also detect Louvain communities so that
+                            :meth:`same_community` can be used. This rebuilds the
+                            graph with networkx and is slow on large graphs.
+        :type communities: bool
+        """
+        self.store = store
+        self.node_ids = np.asarray(store.arrays["node_ids"])
+        self._position = {int(n): pos for pos, n in enumerate(self.node_ids)}
+        self._topic_ids = {topic: i for i, topic in enumerate(store.topics)}
+        self._build_adjacency()
+        self._build_topic_index()
+        components = np.asarray(store.arrays["node_component"])
+        self._component_indptr, self._component_nodes = self._group(components)
+        self.node_community = None
+        if communities:
+            self._build_communities()
+
+    @classmethod
+    def from_folder(cls, folder: str, communities: bool = False):
+        """
+        Create an engine from a graph store folder.
+        """
+        return cls(GraphStore.load(folder), communities=communities)
+
+    @classmethod
+    def from_networkx(cls, G: nx.Graph, communities: bool = False):
+        """
+        Create an engine from an in-memory graph.
+        """
+        return cls(GraphStore.from_networkx(G), communities=communities)
+
+    def _build_adjacency(self):
+        n = self.store.num_nodes
+        src = np.asarray(self.store.arrays["edge_src"], dtype=np.int64)
+        dst = np.asarray(self.store.arrays["edge_dst"], dtype=np.int64)
+        weight = np.asarray(self.store.arrays["edge_weight"])
+        heads = np.concatenate([src, dst])
+        tails = np.concatenate([dst, src])
+        weights = np.concatenate([weight, weight])
+        # Sort by head, then by decreasing weight, then by tail for stable ties.
+        order = np.lexsort((tails, -weights, heads))
+        self._adj_indptr, self._adj_nodes = _csr(heads[order], tails[order], n)
+        self._adj_weights = np.ascontiguousarray(weights[order])
+
+    def _build_topic_index(self):
+        offsets = np.asarray(self.store.arrays["node_topic_offsets"])
+        topics = np.asarray(self.store.arrays["node_topics"], dtype=np.int64)
+        counts = np.diff(offsets)
+        nodes = np.repeat(np.arange(self.store.num_nodes), counts)
+        ranks = np.arange(len(topics)) - np.repeat(offsets[:-1], counts)
+        order = np.lexsort((nodes, ranks, topics))
+        self._topic_indptr, self._topic_nodes = _csr(
+            topics[order], nodes[order], len(self.store.topics)
+        )
+
+    @staticmethod
+    def _group(labels: np.ndarray):
+        """
+        Index node positions by a non-negative label per node (-1 = no label).
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        nodes = np.flatnonzero(labels >= 0)
+        order = np.argsort(labels[nodes], kind="stable")
+        n_labels = int(labels.max()) + 1 if len(nodes) else 0
+        return _csr(labels[nodes][order], nodes[order], n_labels)
+
+    def _build_communities(self):
+        G = nx.Graph()
+        G.add_nodes_from(range(self.store.num_nodes))
+        G.add_weighted_edges_from(
+            zip(
+                self.store.arrays["edge_src"].tolist(),
+                self.store.arrays["edge_dst"].tolist(),
+                self.store.arrays["edge_weight"].tolist(),
+            )
+        )
+        labels = np.full(self.store.num_nodes, -1, dtype=np.int64)
+        for community_id, members in enumerate(
+            nx.community.louvain_communities(G, weight="weight", seed=0)
+        ):
+            labels[list(members)] = community_id
+        self.node_community = labels
+        self._community_indptr, self._community_nodes = self._group(labels)
+
+    def _pos(self, node_id: int) -> int:
+        try:
+            return self._position[node_id]
+        except KeyError:
+            raise KeyError(f"Unknown chunk id: {node_id}") from None
+
+    def _ids(self, positions: np.ndarray, limit: Optional[int]) -> List[int]:
+        if limit is not None:
+            positions = positions[:limit]
+        return self.node_ids[positions].tolist()
+
+    def chunks_by_topic(self, topic: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Return the chunks classified under ``topic``, best ranked first.
+
+        :param topic: Topic label.
+        :type topic: str
+        :param limit: Maximum number of results.
+        :type limit: Optional[int]
+        :return: Chunk ids; empty if the topic is unknown.
+        :rtype: List[int]
+        """
+        topic_id = self._topic_ids.get(topic)
+        if topic_id is None:
+            return []
+        start, end = self._topic_indptr[topic_id], self._topic_indptr[topic_id + 1]
+        return self._ids(self._topic_nodes[start:end], limit)
+
+    def neighbours(
+        self, node_id: int, limit: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Return the neighbours of a chunk ranked by decreasing edge weight.
+
+        :param node_id: Chunk id.
+        :type node_id: int
+        :param limit: Maximum number of results.
+        :type limit: Optional[int]
+        :return: ``(chunk_id, weight)`` pairs.
+        :rtype: List[Tuple[int, float]]
+        """
+        pos = self._pos(node_id)
+        start, end = self._adj_indptr[pos], self._adj_indptr[pos + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return list(
+            zip(
+                self.node_ids[self._adj_nodes[start:end]].tolist(),
+                self._adj_weights[start:end].tolist(),
+            )
+        )
+
+    def same_component(self, node_id: int, limit: Optional[int] = None) -> List[int]:
+        """
+        Return the other chunks in the connected component of ``node_id``.
+
+        Components are those computed by ``GraphManager.update_graph_components``.
+        """
+        component = self.store.arrays["node_component"][self._pos(node_id)]
+        if component < 0:
+            return []
+        start = self._component_indptr[component]
+        end = self._component_indptr[component + 1]
+        members = self._component_nodes[start:end]
+        return self._ids(members[members != self._pos(node_id)], limit)
+
+    def same_community(self, node_id: int, limit: Optional[int] = None) -> List[int]:
+        """
+        Return the other chunks in the Louvain community of ``node_id``.
+
+        :raises ValueError: If the engine was created without ``communities=True``.
+        """
+        if self.node_community is None:
+            raise ValueError("Communities not computed. Pass communities=True.")
+        pos = self._pos(node_id)
+        community = self.node_community[pos]
+        start = self._community_indptr[community]
+        end = self._community_indptr[community + 1]
+        members = self._community_nodes[start:end]
+        return self._ids(members[members != pos], limit)
+
+    def expand(
+        self, node_id: int, hops: int = 1, limit: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Breadth-first k-hop expansion from a chunk.
+
+        Neighbours are visited by decreasing edge weight, so when ``limit`` cuts
+        the expansion short the strongest connections are kept.
+
+        :param node_id: Starting chunk id (not included in the results).
+        :type node_id: int
+        :param hops: Maximum distance from the starting chunk.
+        :type hops: int
+        :param limit: Maximum number of results.
+        :type limit: Optional[int]
+        :return: ``(chunk_id, distance)`` pairs in visiting order.
+        :rtype: List[Tuple[int, int]]
+        """
+        start = self._pos(node_id)
+        seen = {start}
+        frontier = [start]
+        results: List[Tuple[int, int]] = []
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for pos in frontier:
+                lo, hi = self._adj_indptr[pos], self._adj_indptr[pos + 1]
+                for neighbour in self._adj_nodes[lo:hi].tolist():
+                    if neighbour in seen:
+                        continue
+                    seen.add(neighbour)
+                    next_frontier.append(neighbour)
+                    results.append((int(self.node_ids[neighbour]), hop))
+                    if limit is not None and len(results) >= limit:
+                        return results
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return results
+
+    def describe(self, node_id: int) -> dict:
+        """
+        Return the stored metadata of a chunk.
+        """
+        pos = self._pos(node_id)
+        info = {
+            "id": node_id,
+            "chunk": self.store.chunk_text(pos),
+            "source_file": self.store.source(pos),
+            "classification": self.store.classifications(pos),
+            "component_id": int(self.store.arrays["node_component"][pos]),
+        }
+        if self.node_community is not None:
+            info["community_id"] = int(self.node_community[pos])
+        return info
@@ -0,0 +1,97 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _analyzer(text: str) -> List[str]:
+    # Lowercase words with a naive plural strip, so "Energies"/"Energy" and
+    # "Models"/"Model" share a term.
+    words = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def _similarity(texts: List[str]) -> np.ndarray:
+    try:
+        vectors = TfidfVectorizer(analyzer=_analyzer).fit_transform(texts)
+    except ValueError:  # no words at all
+        return np.eye(len(texts))
+    return (vectors @ vectors.T).toarray()
+
+
+def consolidate_topics(
+    labels: List[str],
+    lda_topics: Optional[List[str]] = None,
+    threshold: float = 0.6,
+    label_weight: float = 0.7,
+) -> Tuple[List[str], List[Dict]]:
+    """
+    Merge near-duplicate topic labels before classification.
+
+    Labels are compared with the cosine similarity of their TF-IDF word
+    vectors. When ``lda_topics`` is given and aligned with ``labels`` (one LDA
+    topic per label), the similarity of the LDA topic words is blended in with
+    weight ``1 - label_weight``. Labels whose similarity reaches ``threshold``
+    are grouped (single linkage) and each group keeps its first label.
+
+    :param labels: Cleaned topic labels.
+    :type labels: List[str]
+    :param lda_topics: Raw LDA topic strings, aligned with ``labels``.
+    :type lda_topics: Optional[List[str]]
+    :param threshold: Minimum similarity for two labels to be merged.
+    :type threshold: float
+    :param label_weight: Weight of the label similarity when LDA words are used.
+    :type label_weight: float
+    :return: The consolidated labels, and for each of them a mapping entry with
+             the merged ``labels`` and the indices of their ``lda_topics``
+             (empty when the LDA topics are not aligned).
+    :rtype: Tuple[List[str], List[Dict]]
+    """
+    if not labels:
+        return [], []
+    aligned = lda_topics is not None and len(lda_topics) == len(labels)
+
+    similarity = _similarity(labels)
+    if aligned:
+        similarity = label_weight * similarity + (1 - label_weight) * _similarity(
+            lda_topics
+        )
+
+    parent = list(range(len(labels)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows, cols = np.nonzero(np.triu(similarity >= threshold, k=1))
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(labels)):
+        groups.setdefault(find(i), []).append(i)
+
+    consolidated, mapping = [], []
+    for members in groups.values():
+        consolidated.append(labels[members[0]])
+        mapping.append(
+            {
+                "label": labels[members[0]],
+                "labels": [labels[i] for i in members],
+                "lda_topics": members if aligned else [],
+            }
+        )
+    return consolidated, mapping
@@ -1,5 +1,6 @@
-from typing import List
+from typing import List, Optional
 
+import numpy as np
 from ktrain.text import get_topic_model
 
 
@@ -39,6 +40,8 @@ class KtrainTopicExtractor:
         self.threshold = threshold
         self.n_components = n_components
         self.topic_model = None  # To store the ktrain topic model instance
+        self._texts: Optional[List[str]] = None  # Training texts
+        self._doc_topic: Optional[np.ndarray] = None
 
     def fit(self, texts: List[str]):
         """
@@ -61,8 +64,30 @@ class KtrainTopicExtractor:
             n_topics=self.n_components,
         )
         self.topic_model.build(texts, threshold=self.threshold)
+        self._texts = texts
+        self._doc_topic = None
         return self
 
+    def transform(self, texts: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Compute the document-topic distribution of a list of texts.
+
+        :param texts: A list of strings, where each string is a document. None
+                      for the texts the model was built on, whose distributions
+                      are computed once and then cached.
+        :type texts: Optional[List[str]]
+        :raises ValueError: If the topic model has not been built yet.
+        :return: Array of shape (len(texts), number of topics).
+        :rtype: np.ndarray
+        """
+        if self.topic_model is None:
+            raise ValueError("Topic model not built. Call fit() first.")
+        if texts is None:
+            if self._doc_topic is None:
+                self._doc_topic = self.transform(self._texts)
+            return self._doc_topic
+        return np.asarray(self.topic_model.predict(texts, threshold=None))
+
     def get_topics(self) -> List[str]:
         """
         Retrieve the topics generated by the LDA model.
@@ -0,0 +1,160 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.feature_extraction.text import CountVectorizer
+
+METRICS = ("perplexity", "coherence")
+
+# Train and held-out matrices shared with worker processes, set once per
+# process by ``_init_worker``.
+_train: Optional[sparse.csr_matrix] = None
+_holdout: Optional[sparse.csr_matrix] = None
+
+
+def _init_worker(train: sparse.csr_matrix, holdout: sparse.csr_matrix):
+    global _train, _holdout
+    _train, _holdout = train, holdout
+
+
+def umass_coherence(
+    components: np.ndarray, doc_term: sparse.csr_matrix, n_top_words: int = 10
+) -> float:
+    """
+    Mean UMass coherence of the topics of an LDA model.
+
+    For the top words ``w_1..w_N`` of a topic, ordered by weight, the coherence
+    is ``sum_{i > j} log((D(w_i, w_j) + 1) / D(w_j))`` where ``D`` counts the
+    documents containing the words. Higher is better.
+
+    :param components: Topic-word weights, shape (n_topics, n_words).
+    :type components: np.ndarray
+    :param doc_term: Document-term counts the document frequencies are taken from.
+    :type doc_term: sparse.csr_matrix
+    :param n_top_words: Number of top words per topic.
+    :type n_top_words: int
+    :return: Coherence averaged over topics.
+    :rtype: float
+    """
+    present = (doc_term > 0).astype(np.float64).tocsc()
+    scores = []
+    for weights in components:
+        top = np.argsort(weights)[::-1][:n_top_words]
+        columns = present[:, top]
+        co_occurrence = (columns.T @ columns).toarray()
+        doc_freq = np.diag(co_occurrence)
+        i, j = np.tril_indices(len(top), k=-1)
+        valid = doc_freq[j] > 0
+        scores.append(
+            np.log((co_occurrence[i, j][valid] + 1) / doc_freq[j][valid]).sum()
+        )
+    return float(np.mean(scores))
+
+
+def _score(n_components: int) -> Dict[str, float]:
+    lda = LatentDirichletAllocation(n_components=n_components, random_state=0)
+    lda.fit(_train)
+    return {
+        "n_components": n_components,
+        "perplexity": float(lda.perplexity(_holdout)),
+        "coherence": umass_coherence(lda.components_, _train),
+    }
+
+
+def select_n_components(
+    texts: Sequence[str],
+    candidates: Sequence[int],
+    n_features: int = 512,
+    min_df: int = 2,
+    max_df: float = 0.95,
+    metric: str = "perplexity",
+    sample_size: Optional[int] = None,
+    holdout_fraction: float = 0.2,
+    n_jobs: int = 1,
+    random_state: int = 0,
+) -> Tuple[int, List[Dict[str, float]]]:
+    """
+    Choose the number of LDA topics among candidate counts.
+
+    A random sample of at most ``sample_size`` texts is vectorized once with
+    the extractor settings and split into training and held-out documents.
+    One model per candidate count is fitted on the training documents, in
+    ``n_jobs`` processes, and scored by the perplexity of the held-out
+    documents (lower is better) and by UMass coherence on the training
+    documents (higher is better).
+
+    :param texts: Documents.
+    :type texts: Sequence[str]
+    :param candidates: Topic counts to try.
+    :type candidates: Sequence[int]
+    :param n_features: Maximum vocabulary size.
+    :type n_features: int
+    :param min_df: Minimum document frequency of a word.
+    :type min_df: int
+    :param max_df: Maximum document frequency of a word.
+    :type max_df: float
+    :param metric: ``"perplexity"`` or ``"coherence"``, used to pick the count.
+    :type metric: str
+    :param sample_size: Maximum number of texts used, None for all of them.
+    :type sample_size: Optional[int]
+    :param holdout_fraction: Fraction of the sample held out for perplexity.
+    :type holdout_fraction: float
+    :param n_jobs: Number of worker processes.
+    :type n_jobs: int
+    :param random_state: Seed of the sample and of the split.
+    :type random_state: int
+    :raises ValueError: If there are no candidates or the metric is unknown.
+    :return: The best count and the scores of every candidate, in the order
+             of ``candidates``.
+    :rtype: Tuple[int, List[Dict[str, float]]]
+    """
+    if not candidates:
+        raise ValueError("At least one candidate topic count is required.")
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {METRICS}.")
+
+    rng = np.random.default_rng(random_state)
+    indices = np.arange(len(texts))
+    if sample_size is not None and sample_size < len(texts):
+        indices = np.sort(rng.choice(len(texts), size=sample_size, replace=False))
+    X = CountVectorizer(
+        max_features=n_features, min_df=min_df, max_df=max_df
+    ).fit_transform([texts[i] for i in indices])
+    order = rng.permutation(X.shape[0])
+    n_holdout = max(1, int(round(holdout_fraction * X.shape[0])))
+    train, holdout = X[order[n_holdout:]], X[order[:n_holdout]]
+
+    if n_jobs <= 1:
+        global _train, _holdout
+        _init_worker(train, holdout)
+        try:
+            curve = [_score(k) for k in candidates]
+        finally:
+            _train = _holdout = None
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_init_worker, initargs=(train, holdout)
+        ) as executor:
+            curve = list(executor.map(_score, candidates))
+
+    if metric == "perplexity":
+        best = min(curve, key=lambda point: point["perplexity"])
+    else:
+        best = max(curve, key=lambda point: point["coherence"])
+    return best["n_components"], curve
+
+
+def format_curve(curve: List[Dict[str, float]], best: int) -> str:
+    """
+    Format the scores returned by :func:`select_n_components` as a table.
+    """
+    lines = [f"{'topics':>8} {'perplexity':>12} {'coherence':>10}"]
+    for point in curve:
+        marker = " *" if point["n_components"] == best else ""
+        lines.append(
+            f"{point['n_components']:>8} {point['perplexity']:>12.2f} "
+            f"{point['coherence']:>10.3f}{marker}"
+        )
+    return "\n".join(lines)
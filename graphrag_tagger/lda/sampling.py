@@ -0,0 +1,154 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+def stratified_sample(
+    strata: Sequence[int], size: int, random_state: int = 0
+) -> np.ndarray:
+    """
+    Draw a random sample of item indices, stratified by source.
+
+    Each stratum (e.g. source file id) contributes in proportion to its size,
+    and at least one item while the sample is large enough to cover every
+    stratum. Items are taken from the front of one fixed random order per
+    stratum, so samples of different sizes drawn with the same seed are
+    nested wherever their per-stratum quotas grow.
+
+    :param strata: Stratum of every item.
+    :type strata: Sequence[int]
+    :param size: Number of items to draw. All items are returned if there are
+                 no more than ``size``.
+    :type size: int
+    :param random_state: Seed of the random order.
+    :type random_state: int
+    :return: Sorted indices of the sampled items.
+    :rtype: np.ndarray
+    """
+    return nested_samples(strata, [size], random_state)[0]
+
+
+def nested_samples(
+    strata: Sequence[int], sizes: Sequence[int], random_state: int = 0
+) -> List[np.ndarray]:
+    """
+    Draw one stratified sample per size, see :func:`stratified_sample`.
+
+    :return: Sorted indices of each sample, in the order of ``sizes``.
+    :rtype: List[np.ndarray]
+    """
+    strata = np.asarray(strata)
+    rng = np.random.default_rng(random_state)
+    labels, inverse, counts = np.unique(strata, return_inverse=True, return_counts=True)
+    # Items of each stratum in a random order, drawn from the front.
+    members = [
+        rng.permutation(np.flatnonzero(inverse == k)) for k in range(len(labels))
+    ]
+
+    samples = []
+    for size in sizes:
+        if size >= len(strata):
+            samples.append(np.arange(len(strata)))
+            continue
+        quotas = _allocate(counts, size)
+        taken = [items[:quota] for items, quota in zip(members, quotas)]
+        samples.append(np.sort(np.concatenate(taken)))
+    return samples
+
+
+def _allocate(counts: np.ndarray, size: int) -> np.ndarray:
+    # Largest remainder allocation of ``size`` items over strata of ``counts``
+    # items, with one item per stratum first when possible.
+    quotas = np.zeros(len(counts), dtype=np.int64)
+    if size >= len(counts):
+        quotas += 1
+    remaining = size - quotas.sum()
+    capacity = counts - quotas
+    if remaining > 0:
+        share = remaining * capacity / capacity.sum()
+        extra = np.floor(share).astype(np.int64)
+        order = np.argsort(-(share - extra), kind="stable")
+        extra[order[: remaining - extra.sum()]] += 1
+        quotas += np.minimum(extra, capacity)
+    elif size < len(counts):
+        quotas[np.argsort(-counts, kind="stable")[:size]] = 1
+    return quotas
+
+
+def topic_similarity(topics_a: Sequence[str], topics_b: Sequence[str]) -> float:
+    """
+    Similarity of two topic models from their topic word strings.
+
+    Topics are matched one to one to maximise the Jaccard similarity of their
+    word sets; the mean similarity of the matched pairs is returned, counting
+    unmatched topics (when the models differ in size) as 0.
+
+    :param topics_a: Space separated top words of each topic.
+    :type topics_a: Sequence[str]
+    :param topics_b: Space separated top words of each topic.
+    :type topics_b: Sequence[str]
+    :return: Similarity between 0 and 1.
+    :rtype: float
+    """
+    if not topics_a or not topics_b:
+        return 0.0
+    words_a = [set(topic.split()) for topic in topics_a]
+    words_b = [set(topic.split()) for topic in topics_b]
+    jaccard = np.array(
+        [[len(a & b) / len(a | b) if a | b else 0.0 for b in words_b] for a in words_a]
+    )
+    rows, cols = linear_sum_assignment(jaccard, maximize=True)
+    return float(jaccard[rows, cols].sum() / max(len(topics_a), len(topics_b)))
+
+
+def check_convergence(
+    fit_model: Callable[[List[str], Optional[int]], Any],
+    texts: Sequence[str],
+    strata: Sequence[int],
+    size: int,
+    threshold: float = 0.5,
+    random_state: int = 0,
+) -> Tuple[bool, Dict[str, float], Any]:
+    """
+    Check whether a topic model fitted on a sample has stopped changing with
+    the sample size.
+
+    Topics fitted on a stratified sample of ``size`` texts are compared with
+    those fitted on the nested sample of half the size. When they are similar,
+    a larger sample is unlikely to give different topics.
+
+    The larger sample is ``stratified_sample(strata, size, random_state)``, so
+    its model can be used instead of fitting that sample again. It is fitted
+    first, and the smaller sample is fitted with as many topics, since
+    unmatched topics would count as dissimilar.
+
+    :param fit_model: Fits a fresh model with the given number of topics (None
+                      to let the model choose) on texts and returns it; the
+                      model's ``get_topics()`` gives its topics.
+    :type fit_model: Callable[[List[str], Optional[int]], Any]
+    :param texts: All texts.
+    :type texts: Sequence[str]
+    :param strata: Stratum (source) of every text.
+    :type strata: Sequence[int]
+    :param size: Size of the larger sample.
+    :type size: int
+    :param threshold: Minimum :func:`topic_similarity` to call it converged.
+    :type threshold: float
+    :param random_state: Seed of the samples.
+    :type random_state: int
+    :return: Whether the topics converged, the sizes and similarity, and the
+             model fitted on the larger sample.
+    :rtype: Tuple[bool, Dict[str, float], Any]
+    """
+    small, large = nested_samples(strata, [size // 2, size], random_state)
+    model_large = fit_model([texts[i] for i in large], None)
+    topics_large = model_large.get_topics()
+    model_small = fit_model([texts[i] for i in small], len(topics_large))
+    similarity = topic_similarity(model_small.get_topics(), topics_large)
+    report = {
+        "small_size": len(small),
+        "large_size": len(large),
+        "similarity": similarity,
+    }
+    return similarity >= threshold, report, model_large
@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def topic_label_matrix(
+    n_lda_topics: int, labels: List[str], topic_map: Optional[List[Dict]] = None
+) -> Optional[np.ndarray]:
+    """
+    Build the matrix linking LDA topics to cleaned topic labels.
+
+    Entry ``(t, k)`` is 1 when LDA topic ``t`` contributes to label ``k``. The
+    link comes from ``topic_map`` (see ``consolidate_topics``) when it has LDA
+    indices, otherwise labels are assumed to be aligned with the LDA topics.
+
+    :return: Array of shape (n_lda_topics, len(labels)), or None if labels
+             cannot be linked to LDA topics.
+    :rtype: Optional[np.ndarray]
+    """
+    matrix = np.zeros((n_lda_topics, len(labels)))
+    if topic_map and len(topic_map) == len(labels):
+        for k, entry in enumerate(topic_map):
+            for t in entry.get("lda_topics", []):
+                if t < n_lda_topics:
+                    matrix[t, k] = 1.0
+        if matrix.any(axis=0).all():
+            return matrix
+        return None
+    if len(labels) == n_lda_topics:
+        return np.eye(n_lda_topics)
+    return None
+
+
+def shortlist_topics(
+    doc_topic: np.ndarray,
+    labels: List[str],
+    top_k: Optional[int],
+    topic_map: Optional[List[Dict]] = None,
+) -> Optional[List[List[int]]]:
+    """
+    Pick the ``top_k`` most plausible topic labels of every chunk.
+
+    The score of a label for a chunk is the chunk's LDA probability mass on the
+    LDA topics behind the label, computed for all chunks in one matrix product.
+    The selected indices of each chunk are returned in label order, so that
+    chunks with the same shortlist get identical prompts.
+
+    :param doc_topic: Document-topic distribution, shape (n_chunks, n_lda_topics).
+    :type doc_topic: np.ndarray
+    :param labels: Cleaned topic labels.
+    :type labels: List[str]
+    :param top_k: Number of labels to keep per chunk.
+    :type top_k: Optional[int]
+    :param topic_map: Mapping returned by ``consolidate_topics``, if used.
+    :type topic_map: Optional[List[Dict]]
+    :return: Label indices per chunk, or None when every label should be used
+             (no ``top_k``, ``top_k`` not smaller than the label count, or labels
+             that cannot be linked to LDA topics).
+    :rtype: Optional[List[List[int]]]
+    """
+    if not top_k or top_k >= len(labels):
+        return None
+    doc_topic = np.asarray(doc_topic, dtype=np.float64)
+    matrix = topic_label_matrix(doc_topic.shape[1], labels, topic_map)
+    if matrix is None:
+        return None
+    scores = doc_topic @ matrix
+    top = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    top.sort(axis=1)
+    return top.tolist()
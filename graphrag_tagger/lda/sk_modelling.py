@@ -1,12 +1,23 @@
 from typing import List, Optional
 
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
 from sklearn.decomposition import LatentDirichletAllocation
 from sklearn.feature_extraction.text import CountVectorizer
 
 
+def _doc_topic_batch(vectorizer, lda, texts: List[str]) -> np.ndarray:
+    return lda.transform(vectorizer.transform(texts))
+
+
 class SklearnTopicExtractor:
     """
     Topic extractor using scikit-learn's Latent Dirichlet Allocation (LDA).
+
+    The document-term matrix of the training texts is kept after fitting, so
+    their document-topic distributions are computed once, without vectorizing
+    the texts again.
     """
 
     def __init__(
@@ -37,6 +48,10 @@ class SklearnTopicExtractor:
         # Initialize CountVectorizer and LDA model (will be fitted later)
         self.vectorizer: Optional[CountVectorizer] = None
         self.lda: Optional[LatentDirichletAllocation] = None
+        # Document-term matrix of the training texts and, once requested,
+        # their document-topic distributions
+        self.doc_term: Optional[sparse.csr_matrix] = None
+        self._doc_topic: Optional[np.ndarray] = None
 
     def fit(self, texts: List[str]):
         """
@@ -64,12 +79,69 @@ class SklearnTopicExtractor:
             n_components=self.n_components, random_state=0
         )
 
-        # Fit CountVectorizer to create document-term matrix
-        X = self.vectorizer.fit_transform(texts)
+        # Fit CountVectorizer to create document-term matrix, kept for transform
+        self.doc_term = self.vectorizer.fit_transform(texts)
+        self._doc_topic = None
         # Fit LDA model
-        self.lda.fit(X)
+        self.lda.fit(self.doc_term)
         return self
 
+    def transform(
+        self,
+        texts: Optional[List[str]] = None,
+        n_jobs: int = 1,
+        batch_size: int = 2048,
+    ) -> np.ndarray:
+        """
+        Computes the document-topic distribution of a list of texts.
+
+        Without ``texts``, the distributions of the training texts are computed
+        from the stored document-term matrix on the first call and returned
+        from cache afterwards. Otherwise the texts are vectorized and
+        transformed in batches of ``batch_size``, in ``n_jobs`` parallel jobs
+        when ``n_jobs`` is not 1. Batching does not change the result.
+
+        :param texts: List of strings, where each string is a document. None for
+                      the texts the model was fitted on.
+        :type texts: Optional[List[str]]
+        :param n_jobs: Number of parallel jobs (joblib convention, -1 for all
+                       cores).
+        :type n_jobs: int
+        :param batch_size: Number of texts per job.
+        :type batch_size: int
+        :raises ValueError: If the model has not been fitted yet.
+        :return: Array of shape (len(texts), n_components) whose rows sum to 1.
+        :rtype: np.ndarray
+        """
+        if self.vectorizer is None or self.lda is None:
+            raise ValueError(
+                "The model must be fitted first. Call 'fit' method before 'transform'."
+            )
+        if texts is None:
+            if self._doc_topic is None:
+                self._doc_topic = self._transform_batches(
+                    self.doc_term, n_jobs, batch_size
+                )
+            return self._doc_topic
+        if n_jobs == 1 or len(texts) <= batch_size:
+            return _doc_topic_batch(self.vectorizer, self.lda, texts)
+        batches = Parallel(n_jobs=n_jobs)(
+            delayed(_doc_topic_batch)(
+                self.vectorizer, self.lda, texts[i : i + batch_size]
+            )
+            for i in range(0, len(texts), batch_size)
+        )
+        return np.vstack(batches)
+
+    def _transform_batches(self, X, n_jobs: int, batch_size: int) -> np.ndarray:
+        if n_jobs == 1 or X.shape[0] <= batch_size:
+            return self.lda.transform(X)
+        batches = Parallel(n_jobs=n_jobs)(
+            delayed(self.lda.transform)(X[i : i + batch_size])
+            for i in range(0, X.shape[0], batch_size)
+        )
+        return np.vstack(batches)
+
     def get_topics(
         self, threshold_fraction: float = 0.8, n_word_limit: int = 10
     ) -> List[str]:
@@ -0,0 +1,329 @@
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterable, List, Optional
+
+from .chat.llm import LLM
+from .tagger import (
+    build_parser,
+    build_topics,
+    classification_tasks,
+    classify_task,
+    make_caches,
+    make_llm,
+    write_chunk,
+)
+from .utilities.pdf_loader import join_pages, load_pdf_file, page_span, pdf_files
+from .utilities.records import ChunkTable
+from .utilities.text_cleaner import TextCleaner
+
+logger = logging.getLogger(__name__)
+
+# End of stream marker passed between stages.
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class Sink(ABC):
+    """
+    Destination of the tagged chunk records of a :class:`TaggingPipeline`.
+
+    Records are written one at a time, in chunk order, before the pipeline
+    yields them.
+    """
+
+    @abstractmethod
+    async def write(self, record: dict):
+        """
+        Stores one record.
+        """
+
+    async def close(self):
+        """
+        Called once the pipeline stops, even after an error.
+        """
+
+
+class JsonFolderSink(Sink):
+    """
+    Writes each record to ``chunk_<index>.json`` in a folder, like
+    :func:`graphrag_tagger.tagger.main`.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    async def write(self, record: dict):
+        data = {key: value for key, value in record.items() if key != "index"}
+        await asyncio.to_thread(write_chunk, self.folder, record["index"], data)
+
+
+class QueueSink(Sink):
+    """
+    Puts each record on an asyncio queue, e.g. one drained by an uploader.
+    """
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+
+    async def write(self, record: dict):
+        await self.queue.put(record)
+
+
+def pipeline_params(pdf_folder: str, **overrides) -> dict:
+    """
+    Pipeline parameters with the command line defaults of
+    :mod:`graphrag_tagger.tagger`.
+
+    No output folder is set unless given, so no file is written.
+
+    :param pdf_folder: Folder of the PDFs to tag.
+    :type pdf_folder: str
+    :param overrides: Parameters to change, named as the command line options.
+    :rtype: dict
+    """
+    params = vars(
+        build_parser().parse_args(
+            ["--pdf_folder", pdf_folder, "--output_folder", "unused"]
+        )
+    )
+    params["output_folder"] = None
+    params.update(overrides)
+    return params
+
+
+class TaggingPipeline:
+    """
+    Tags the chunks of a folder of PDFs as an async stream of records.
+
+    PDF extraction, chunking, classification and the sinks run as concurrent
+    asyncio stages connected by bounded queues; blocking work runs in
+    threads. Topics are fitted once every chunk is known, so classification
+    starts after chunking, unless fixed ``topics`` are given: chunks then
+    stream to classification as soon as they are split.
+
+    Records are the contents of the ``chunk_<index>.json`` files of
+    :func:`graphrag_tagger.tagger.main` with their 1-based ``index``, and are
+    yielded in chunk order. Progress, such as the fitted topics and the cache
+    statistics, is logged to the ``graphrag_tagger.pipeline`` logger rather
+    than printed.
+    """
+
+    def __init__(
+        self,
+        params: dict,
+        llm: Optional[LLM] = None,
+        topics: Optional[List[str]] = None,
+        sinks: Iterable[Sink] = (),
+        concurrency: int = 4,
+        queue_size: int = 64,
+    ):
+        """
+        :param params: Pipeline parameters, see :func:`pipeline_params`.
+        :type params: dict
+        :param llm: LLM used to clean topics and classify, by default built
+                    from the ``llm_*`` parameters.
+        :type llm: Optional[LLM]
+        :param topics: Topic labels to classify with, instead of fitting them.
+        :type topics: Optional[List[str]]
+        :param sinks: Destinations of the records.
+        :type sinks: Iterable[Sink]
+        :param concurrency: Number of chunks classified at a time.
+        :type concurrency: int
+        :param queue_size: Capacity of each queue between stages, and maximum
+                           number of records classified ahead of the next one
+                           to yield.
+        :type queue_size: int
+        """
+        self.params = params
+        self.llm = llm
+        self.topics = topics
+        self.sinks = list(sinks)
+        self.concurrency = concurrency
+        self.queue_size = max(queue_size, concurrency + 1)
+        self.cleaner = TextCleaner(params["chunk_size"], params["chunk_overlap"])
+        self.extraction_cache, self.chunk_cache = make_caches(params)
+
+    async def _extract(self, documents: asyncio.Queue):
+        for file_path in pdf_files(self.params["pdf_folder"]):
+            pages = await asyncio.to_thread(
+                load_pdf_file,
+                file_path,
+                self.params.get("layout", False),
+                self.params.get("page_range"),
+                self.params.get("max_pages"),
+                self.extraction_cache,
+                self.params.get("cache_key", "mtime"),
+            )
+            await documents.put((file_path, pages))
+        if self.extraction_cache is not None:
+            logger.info(self.extraction_cache.report("Extraction"))
+        await documents.put(_DONE)
+
+    def _split(self, text: str) -> list:
+        if self.chunk_cache is None:
+            return self.cleaner.split_text_spans(text)
+        key = self.cleaner.cache_key(text)
+        spans = self.chunk_cache.get(key)
+        if spans is None:
+            spans = self.cleaner.split_text_spans(text)
+            self.chunk_cache.set(key, spans)
+        return spans
+
+    async def _chunk(self, documents: asyncio.Queue, chunks: asyncio.Queue):
+        while (item := await documents.get()) is not _DONE:
+            file_path, pages = item
+            text, page_starts = join_pages(pages)
+            for chunk, char_start, char_end in await asyncio.to_thread(
+                self._split, text
+            ):
+                page_start, page_end = page_span(page_starts, char_start, char_end)
+                provenance = {
+                    "page_start": page_start,
+                    "page_end": page_end,
+                    "char_start": char_start,
+                    "char_end": char_end,
+                }
+                await chunks.put((file_path, chunk, provenance))
+        if self.chunk_cache is not None:
+            logger.info(self.chunk_cache.report("Chunk"))
+        await chunks.put(_DONE)
+
+    async def _schedule(self, chunks: asyncio.Queue, tasks: asyncio.Queue):
+        if self.topics is not None:
+            # Fixed topics: every chunk can be classified right away.
+            index = 0
+            while (item := await chunks.get()) is not _DONE:
+                file_path, chunk, provenance = item
+                index += 1
+                await tasks.put(
+                    {
+                        "index": index,
+                        "chunk": chunk,
+                        "source_file": file_path,
+                        **{k: v for k, v in provenance.items() if v is not None},
+                        "shortlist": None,
+                    }
+                )
+        else:
+            all_chunks = ChunkTable()
+            while (item := await chunks.get()) is not _DONE:
+                file_path, chunk, provenance = item
+                all_chunks.add(chunk, file_path, **provenance)
+            if all_chunks:
+                self.topics, shortlists = await asyncio.to_thread(
+                    build_topics, self.params, all_chunks, self.llm, logger.info
+                )
+                for task in classification_tasks(all_chunks, shortlists):
+                    await tasks.put(task)
+        await tasks.put(_DONE)
+
+    async def _classify(
+        self,
+        tasks: asyncio.Queue,
+        results: asyncio.Queue,
+        window: asyncio.Semaphore,
+        running: List[int],
+    ):
+        while True:
+            # Limits how far classification runs ahead of the next record to
+            # yield; released once a record is yielded.
+            await window.acquire()
+            task = await tasks.get()
+            if task is _DONE:
+                window.release()
+                await tasks.put(_DONE)  # for the other classifiers
+                break
+            output_data = await asyncio.to_thread(
+                classify_task, self.llm, task, self.topics
+            )
+            results.put_nowait((task["index"], {"index": task["index"], **output_data}))
+        running[0] -= 1
+        if running[0] == 0:
+            results.put_nowait(_DONE)
+
+    @staticmethod
+    async def _guard(stage, results: asyncio.Queue):
+        try:
+            await stage
+        except Exception as e:
+            results.put_nowait(_Failure(e))
+
+    async def run(self) -> AsyncIterator[dict]:
+        """
+        Run the pipeline, yielding each tagged chunk record once the sinks
+        have written it.
+
+        :raises Exception: The first error of any stage.
+        :return: Records in chunk order.
+        :rtype: AsyncIterator[dict]
+        """
+        if self.llm is None:
+            self.llm = make_llm(self.params)
+        documents = asyncio.Queue(self.queue_size)
+        chunks = asyncio.Queue(self.queue_size)
+        tasks = asyncio.Queue(self.queue_size)
+        # Unbounded, but holds at most queue_size records thanks to the window.
+        results = asyncio.Queue()
+        window = asyncio.Semaphore(self.queue_size)
+        running = [self.concurrency]
+        stages = [
+            self._extract(documents),
+            self._chunk(documents, chunks),
+            self._schedule(chunks, tasks),
+        ] + [
+            self._classify(tasks, results, window, running)
+            for _ in range(self.concurrency)
+        ]
+        workers = [asyncio.create_task(self._guard(stage, results)) for stage in stages]
+
+        pending = {}
+        next_index = 1
+        try:
+            while (item := await results.get()) is not _DONE:
+                if isinstance(item, _Failure):
+                    raise item.error
+                index, record = item
+                pending[index] = record
+                while next_index in pending:
+                    record = pending.pop(next_index)
+                    for sink in self.sinks:
+                        await sink.write(record)
+                    yield record
+                    window.release()
+                    next_index += 1
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for sink in self.sinks:
+                await sink.close()
+
+
+def tag_pdfs(params: dict, **options) -> AsyncIterator[dict]:
+    """
+    Tag the chunks of the PDFs in ``params["pdf_folder"]``.
+
+    Example::
+
+        params = pipeline_params("/path/to/pdfs", model_choice="sk", n_components=10)
+        async for record in tag_pdfs(params, sinks=[JsonFolderSink("out")]):
+            print(record["index"], record["classification"])
+
+    A caller that may stop iterating early should wrap the iterator in
+    :func:`contextlib.aclosing`, so the stages are stopped and the sinks
+    closed right away.
+
+    :param params: Pipeline parameters, see :func:`pipeline_params`.
+    :type params: dict
+    :param options: Other :class:`TaggingPipeline` arguments.
+    :return: Tagged chunk records, in chunk order.
+    :rtype: AsyncIterator[dict]
+    """
+    return TaggingPipeline(params, **options).run()
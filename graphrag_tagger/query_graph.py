@@ -0,0 +1,65 @@
+import argparse
+import json
+
+from .graph.query import GraphQueryEngine
+
+
+def run_query(engine: GraphQueryEngine, args: argparse.Namespace):
+    """
+    Run the query selected on the command line and return JSON-serializable results.
+
+    :param engine: Query engine to use.
+    :type engine: GraphQueryEngine
+    :param args: Parsed command line arguments.
+    :type args: argparse.Namespace
+    :return: List of result records.
+    :rtype: list
+    """
+    if args.topic is not None:
+        ids = engine.chunks_by_topic(args.topic, limit=args.limit)
+        return [engine.describe(i) for i in ids]
+    if args.neighbours is not None:
+        pairs = engine.neighbours(args.neighbours, limit=args.limit)
+        return [{**engine.describe(i), "weight": w} for i, w in pairs]
+    if args.component is not None:
+        ids = engine.same_component(args.component, limit=args.limit)
+        return [engine.describe(i) for i in ids]
+    if args.community is not None:
+        ids = engine.same_community(args.community, limit=args.limit)
+        return [engine.describe(i) for i in ids]
+    if args.expand is not None:
+        pairs = engine.expand(args.expand, hops=args.hops, limit=args.limit)
+        return [{**engine.describe(i), "hop": h} for i, h in pairs]
+    raise ValueError("No query given.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query a saved chunk graph store.")
+    parser.add_argument(
+        "--graph_folder",
+        type=str,
+        required=True,
+        help="Folder written by build_graph --save_graph_store.",
+    )
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--topic", type=str, help="List chunks tagged with a topic.")
+    query.add_argument(
+        "--neighbours", type=int, help="List neighbours of a chunk by edge weight."
+    )
+    query.add_argument(
+        "--component", type=int, help="List chunks in the same component."
+    )
+    query.add_argument(
+        "--community", type=int, help="List chunks in the same Louvain community."
+    )
+    query.add_argument("--expand", type=int, help="K-hop expansion from a chunk.")
+    parser.add_argument("--hops", type=int, default=2, help="Hops for --expand.")
+    parser.add_argument(
+        "--limit", type=int, default=10, help="Maximum number of results."
+    )
+    args = parser.parse_args()
+
+    engine = GraphQueryEngine.from_folder(
+        args.graph_folder, communities=args.community is not None
+    )
+    print(json.dumps(run_query(engine, args), ensure_ascii=False, indent=2))
@@ -1,61 +1,175 @@
 import argparse
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 
-import fitz
 from tqdm import tqdm
 
-from .chat.llm import LLM, LLMService
+from .chat.llm import LLM, LLMService, classify_system_prompt
+from .chat.pool import LLMPool
+from .chat.prompts import CLASSIFY_USER_PROMPT
+from .chat.scheduler import TokenBatchScheduler
+from .lda.consolidation import consolidate_topics
 from .lda.kt_modelling import KtrainTopicExtractor
+from .lda.model_selection import format_curve, select_n_components
+from .lda.sampling import check_convergence, stratified_sample
+from .lda.shortlist import shortlist_topics
 from .lda.sk_modelling import SklearnTopicExtractor
+from .utilities.cache import DiskCache
+from .utilities.pdf_loader import load_pdf_texts  # noqa: F401 (public API)
+from .utilities.pdf_loader import (
+    join_pages,
+    load_pdf_pages,
+    page_span,
+    parse_page_range,
+)
+from .utilities.records import ChunkTable
 from .utilities.text_cleaner import TextCleaner
 
 
-def load_pdf_texts(folder_path: str):
+def make_caches(params: dict) -> Tuple[Optional[DiskCache], Optional[DiskCache]]:
     """
-    Loads text from all PDFs in a given folder.
+    Open the extraction and chunk caches under ``cache_folder``, if any.
 
-    :param folder_path: Path to the folder containing PDF files.
-    :type folder_path: str
-    :return: Dictionary where keys are file paths and values are extracted text.
-    :rtype: dict
+    :param params: Dictionary containing processing parameters.
+    :type params: dict
+    :return: The extraction and chunk caches, None without a cache folder.
+    :rtype: Tuple[Optional[DiskCache], Optional[DiskCache]]
     """
-    texts = {}
-    for file_name in os.listdir(folder_path):
-        if file_name.lower().endswith(".pdf"):
-            file_path = os.path.join(folder_path, file_name)
-            doc = fitz.open(file_path)
-            pdf_text = ""
-            for page in doc:
-                pdf_text += page.get_text() + "\n\n"
-            texts[file_path] = pdf_text
-    return texts
+    cache_folder = params.get("cache_folder")
+    if not cache_folder:
+        return None, None
+    max_mb = params.get("cache_max_mb")
+    max_bytes = int(max_mb * 2**20) if max_mb else None
+    return (
+        DiskCache(os.path.join(cache_folder, "extraction"), max_bytes),
+        DiskCache(os.path.join(cache_folder, "chunks"), max_bytes),
+    )
 
 
-def main(params: dict):
+def extract_chunks(params: dict) -> ChunkTable:
     """
-    Main function to extract text from PDFs, perform topic modeling, clean topics using LLM, and save results.
+    Extract the text of the PDFs and split it into chunks.
 
     :param params: Dictionary containing processing parameters.
     :type params: dict
+    :return: The chunks with their source file, page and offset metadata.
+    :rtype: ChunkTable
     """
-    # Load PDFs from folder
-    pdf_texts = load_pdf_texts(params["pdf_folder"])
+    # Load PDFs from folder, keeping the offset where each page starts
+    pdf_texts, page_starts = {}, {}
+    extraction_cache, chunk_cache = make_caches(params)
+    pdf_pages = load_pdf_pages(
+        params["pdf_folder"],
+        layout=params.get("layout", False),
+        page_range=params.get("page_range"),
+        max_pages=params.get("max_pages"),
+        cache=extraction_cache,
+        cache_key=params.get("cache_key", "mtime"),
+    )
+    for file_path, pages in pdf_pages.items():
+        pdf_texts[file_path], page_starts[file_path] = join_pages(pages)
     cleaner = TextCleaner(params["chunk_size"], params["chunk_overlap"])
 
-    # Split texts into chunks along with source file metadata
-    all_chunks = []  # each element is dict: {"chunk": str, "source_file": str}
+    # Split texts into chunks along with source file, page and offset metadata
+    all_chunks = ChunkTable()
+    for file_path, chunk, char_start, char_end in cleaner.split_document_spans(
+        pdf_texts, n_workers=params.get("chunk_workers", 1), cache=chunk_cache
+    ):
+        page_start, page_end = page_span(page_starts[file_path], char_start, char_end)
+        all_chunks.add(
+            chunk,
+            file_path,
+            page_start=page_start,
+            page_end=page_end,
+            char_start=char_start,
+            char_end=char_end,
+        )
+    return all_chunks
 
-    # Split texts into chunks along with source file metadata
-    for file_path, text in pdf_texts.items():
-        for chunk in cleaner.split_text(text):
-            all_chunks.append({"chunk": chunk, "source_file": file_path})
 
-    if not all_chunks:
-        print("No texts extracted from PDFs.")
-        return
+def make_llm(params: dict, api_url: Optional[str] = None) -> LLM:
+    """
+    Build the LLM wrapper configured by the ``llm_*`` parameters.
 
-    print(f"Total chunk texts: {len(all_chunks)}")
+    With several ``llm_endpoints`` (and no ``api_url``), requests are spread
+    over an :class:`LLMPool` of one service per endpoint, whose health is
+    checked in the background.
+
+    :param params: Dictionary containing processing parameters.
+    :type params: dict
+    :param api_url: Endpoint of the LLM backend, None for the provider default.
+    :type api_url: Optional[str]
+    :rtype: LLM
+    """
+    service_options = {
+        "timeout": params.get("llm_timeout", 120.0),
+        "keep_alive": params.get("keep_alive"),
+        "latency_target": params.get("llm_latency_target"),
+    }
+    endpoints = params.get("llm_endpoints")
+    if endpoints and not api_url:
+        llm_service = LLMPool.from_specs(
+            [f"{params['llm_model']}@{url.strip()}" for url in endpoints.split(",")],
+            strategy=params.get("llm_routing", "least_outstanding"),
+            max_retries=params.get("llm_max_retries", 3),
+            **service_options,
+        )
+        llm_service.start_health_checks()
+    else:
+        if api_url:
+            service_options["api_url"] = api_url
+        llm_service = LLMService(
+            model=params["llm_model"],
+            max_retries=params.get("llm_max_retries", 3),
+            **service_options,
+        )
+    llm_options = {}
+    if params.get("structured_output"):
+        llm_options["structured"] = True
+    return LLM(llm_service, **llm_options)
+
+
+def build_topics(
+    params: dict,
+    all_chunks: ChunkTable,
+    llm: LLM,
+    log: Callable[[str], None] = print,
+) -> Tuple[List[str], Optional[List[List[int]]]]:
+    """
+    Fit the topic model, clean its topics with the LLM and save them to
+    ``topics.json`` in the output folder, if any.
+
+    :param params: Dictionary containing processing parameters.
+    :type params: dict
+    :param all_chunks: Chunks to fit the topics on.
+    :type all_chunks: ChunkTable
+    :param llm: LLM used to clean the topics.
+    :type llm: LLM
+    :param log: Function the progress messages and topics are passed to.
+    :type log: Callable[[str], None]
+    :return: The cleaned topics, and the indices of each chunk's shortlisted
+             topics (None when every chunk is offered all topics).
+    :rtype: Tuple[List[str], Optional[List[List[int]]]]
+    """
+    texts_for_fitting = [record.chunk for record in all_chunks]
+
+    # Pick the number of topics among candidate counts if asked to
+    n_components = params["n_components"]
+    if n_components is None and params.get("topic_candidates"):
+        n_components, curve = select_n_components(
+            texts_for_fitting,
+            params["topic_candidates"],
+            n_features=params["n_features"],
+            min_df=params["min_df"],
+            max_df=params["max_df"],
+            metric=params.get("selection_metric", "perplexity"),
+            sample_size=params.get("selection_sample"),
+            n_jobs=params.get("selection_workers", 1),
+        )
+        log("Topic count selection:")
+        log(format_curve(curve, n_components))
 
     # Choose the topic extractor based on model_choice parameter
     topic_class = (
@@ -64,72 +178,316 @@ def main(params: dict):
         else KtrainTopicExtractor
     )
     topic_extractor = topic_class(
-        n_components=params["n_components"],
+        n_components=n_components,
         n_features=params["n_features"],
         min_df=params["min_df"],
         max_df=params["max_df"],
     )
 
-    # Fit topic extractor on available chunk texts
-    texts_for_fitting = [item["chunk"] for item in all_chunks]
-    topic_extractor.fit(texts_for_fitting)
+    # Fit topic extractor on available chunk texts, or on a sample of them
+    sample_size = params.get("fit_sample_size")
+    sampled = bool(sample_size) and sample_size < len(texts_for_fitting)
+    if sampled:
+        sources = [record.source_id for record in all_chunks]
+        if params.get("check_convergence"):
+
+            def fit_model(texts, n_topics):
+                # Without a set topic count, the larger sample's count is used
+                # for both samples.
+                return topic_class(
+                    n_components=topic_extractor.n_components or n_topics,
+                    n_features=params["n_features"],
+                    min_df=params["min_df"],
+                    max_df=params["max_df"],
+                ).fit(texts)
+
+            # The larger convergence sample is the fitting sample: keep its model.
+            converged, report, topic_extractor = check_convergence(
+                fit_model, texts_for_fitting, sources, sample_size
+            )
+            log(
+                f"Topic similarity between samples of {report['small_size']} and "
+                f"{report['large_size']} chunks: {report['similarity']:.2f}"
+            )
+            if not converged:
+                log("Topics have not converged, consider a larger --fit_sample_size.")
+            log(f"Fitted topics on a sample of {report['large_size']} chunks.")
+        else:
+            sample = stratified_sample(sources, sample_size)
+            log(f"Fitting topics on a sample of {len(sample)} chunks.")
+            topic_extractor.fit([texts_for_fitting[i] for i in sample])
+    else:
+        topic_extractor.fit(texts_for_fitting)
     topics = topic_extractor.get_topics()
 
-    print("Topics extracted:")
-    print("\n".join(topics))
+    log("Topics extracted:")
+    log("\n".join(topics))
 
-    # Configure model using LLMService
-    llm_service = LLMService(model=params["llm_model"])
     # Clean topics using LLM
-    llm = LLM(llm_service)
-    cleaned_topics = llm.clean_topics(topics)
+    clean_options = {}
+    if params.get("topic_batch_size"):
+        clean_options["batch_size"] = params["topic_batch_size"]
+    cleaned_topics = llm.clean_topics(topics, **clean_options)
+
+    topic_map = None
+    if params.get("consolidate_threshold") and isinstance(cleaned_topics, list):
+        cleaned_topics, topic_map = consolidate_topics(
+            cleaned_topics, topics, threshold=params["consolidate_threshold"]
+        )
+        log(f"Topics after consolidation: {len(cleaned_topics)}")
 
-    print("Saving topics at:", params["output_folder"] + "/topics.json")
+    # Save topics when there is an output folder
+    if params.get("output_folder"):
+        os.makedirs(params["output_folder"], exist_ok=True)
+        log("Saving topics at: " + params["output_folder"] + "/topics.json")
 
-    with open(os.path.join(params["output_folder"], "topics.json"), "w") as f:
-        json.dump(
-            {"topics": cleaned_topics, "lda_topic": topics},
-            f,
-            ensure_ascii=False,
-            indent=2,
+        with open(os.path.join(params["output_folder"], "topics.json"), "w") as f:
+            json.dump(
+                {"topics": cleaned_topics, "lda_topic": topics, "topic_map": topic_map},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+    log("Topics cleaned:")
+    log("\n".join(cleaned_topics))
+
+    # Restrict each chunk's candidate topics to its most likely ones
+    shortlists = None
+    if params.get("top_k_topics"):
+        if sampled:
+            doc_topic = topic_extractor.transform(texts_for_fitting)
+        else:
+            # Distributions of the fitted chunks, reusing their document-term matrix
+            doc_topic = topic_extractor.transform()
+        shortlists = shortlist_topics(
+            doc_topic, cleaned_topics, params["top_k_topics"], topic_map
         )
+        if shortlists is None:
+            log("Topic shortlist disabled, using all topics.")
+    return cleaned_topics, shortlists
 
-    print("Topics cleaned:")
-    print("\n".join(cleaned_topics))
 
-    # Ensure output folder exists
-    os.makedirs(params["output_folder"], exist_ok=True)
+def classification_tasks(
+    all_chunks: ChunkTable, shortlists: Optional[List[List[int]]] = None
+) -> List[dict]:
+    """
+    Describe the classification of every chunk as a JSON serializable task.
 
-    # Classify and save each text chunk with metadata including source_file
-    for i, entry in enumerate(tqdm(all_chunks, desc="Generating Tags")):
-        classification = llm.classify(entry["chunk"], cleaned_topics)
-        output_data = {
-            "chunk": entry["chunk"],
-            "source_file": entry["source_file"],
-            "classification": classification,
+    :param all_chunks: Chunks to classify.
+    :type all_chunks: ChunkTable
+    :param shortlists: Indices of each chunk's candidate topics, see
+                       :func:`build_topics`.
+    :type shortlists: Optional[List[List[int]]]
+    :return: One task per chunk with its 1-based ``index``, the chunk fields of
+             the output file and its ``shortlist``.
+    :rtype: List[dict]
+    """
+    return [
+        {
+            "index": i + 1,
+            "chunk": record.chunk,
+            "source_file": all_chunks.source_of(record),
+            **all_chunks.provenance_of(record),
+            "shortlist": shortlists[i] if shortlists is not None else None,
         }
-        output_path = os.path.join(params["output_folder"], f"chunk_{i + 1}.json")
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        for i, record in enumerate(all_chunks)
+    ]
+
+
+def classify_task(llm: LLM, task: dict, topics: List[str]) -> dict:
+    """
+    Classify the chunk of a task.
+
+    :param llm: LLM used to classify the chunk.
+    :type llm: LLM
+    :param task: Task from :func:`classification_tasks`.
+    :type task: dict
+    :param topics: Cleaned topics.
+    :type topics: List[str]
+    :return: The content of the chunk output file.
+    :rtype: dict
+    """
+    shortlist = task.get("shortlist")
+    if shortlist is None:
+        classification = llm.classify(task["chunk"], topics)
+    else:
+        classification = llm.classify(
+            task["chunk"],
+            [topics[k] for k in shortlist],
+            topic_numbers=[k + 1 for k in shortlist],
+        )
+    output_data = {
+        "chunk": task["chunk"],
+        "source_file": task["source_file"],
+        "classification": classification,
+    }
+    output_data.update((key, task[key]) for key in ChunkTable.PROVENANCE if key in task)
+    return output_data
+
+
+def write_chunk(output_folder: str, index: int, output_data: dict):
+    """
+    Write ``chunk_<index>.json``, replacing it atomically if it exists.
+    """
+    output_path = os.path.join(output_folder, f"chunk_{index}.json")
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, output_path)
+
+
+def main(params: dict):
+    """
+    Main function to extract text from PDFs, perform topic modeling, clean topics using LLM, and save results.
+
+    :param params: Dictionary containing processing parameters.
+    :type params: dict
+    """
+    all_chunks = extract_chunks(params)
+    if not all_chunks:
+        print("No texts extracted from PDFs.")
+        return
+
+    print(f"Total chunk texts: {len(all_chunks)}")
+
+    llm = make_llm(params)
+    cleaned_topics, shortlists = build_topics(params, all_chunks, llm)
+
+    def classify_and_write(task: dict):
+        output_data = classify_task(llm, task, cleaned_topics)
+        write_chunk(params["output_folder"], task["index"], output_data)
+
+    # Classify and save each text chunk with metadata including source_file
+    tasks = classification_tasks(all_chunks, shortlists)
+    if params.get("token_budget"):
+        # Chunks of similar length are kept in flight, up to the token budget.
+        # The prompt of the full topic list bounds that of any shortlist.
+        scheduler = TokenBatchScheduler(
+            token_budget=params["token_budget"],
+            max_in_flight=params.get("classify_workers", 1),
+            encoding_name=TextCleaner.encoding_name,
+            prompt=classify_system_prompt(tuple(cleaned_topics))
+            + CLASSIFY_USER_PROMPT.format(text=""),
+        )
+        for _ in tqdm(
+            scheduler.map(classify_and_write, tasks),
+            total=len(tasks),
+            desc="Generating Tags",
+        ):
+            pass
+        print(scheduler.report())
+    else:
+        with ThreadPoolExecutor(
+            max_workers=params.get("classify_workers", 1)
+        ) as executor:
+            for _ in tqdm(
+                executor.map(classify_and_write, tasks),
+                total=len(tasks),
+                desc="Generating Tags",
+            ):
+                pass
     print(f"Saved {len(all_chunks)} chunk files to {params['output_folder']}")
 
 
-if __name__ == "__main__":
+def build_parser(add_help: bool = True) -> argparse.ArgumentParser:
+    """
+    Command line options of the pipeline, one per ``params`` key of :func:`main`.
+    """
     parser = argparse.ArgumentParser(
-        description="Pipeline to load PDFs, split text, extract topics, and classify chunks."
+        description="Pipeline to load PDFs, split text, extract topics, and classify chunks.",
+        add_help=add_help,
     )
     parser.add_argument(
         "--pdf_folder", type=str, required=True, help="Path to folder containing PDFs"
     )
+    parser.add_argument(
+        "--layout",
+        action="store_true",
+        help="Layout-aware extraction: drop repeated headers/footers and skip TOC/index pages",
+    )
+    parser.add_argument(
+        "--page_range",
+        type=parse_page_range,
+        default=None,
+        help='Pages to extract from each PDF, e.g. "3-40" or "5-" (1-based, inclusive)',
+    )
+    parser.add_argument(
+        "--max_pages",
+        type=int,
+        default=None,
+        help="Maximum number of pages to extract from each PDF",
+    )
+    parser.add_argument(
+        "--cache_folder",
+        type=str,
+        default=None,
+        help="Folder caching extracted PDF text and document chunks between runs",
+    )
+    parser.add_argument(
+        "--cache_max_mb",
+        type=float,
+        default=None,
+        help="Size limit in MB of each cache, least recently used entries are evicted",
+    )
+    parser.add_argument(
+        "--cache_key",
+        type=str,
+        choices=["mtime", "hash"],
+        default="mtime",
+        help='Identify cached PDFs by "mtime" (path, mtime and size) or content "hash"',
+    )
     parser.add_argument(
         "--chunk_size", type=int, default=512, help="Chunk size for text splitter"
     )
     parser.add_argument(
         "--chunk_overlap", type=int, default=25, help="Chunk overlap for text splitter"
     )
+    parser.add_argument(
+        "--chunk_workers",
+        type=int,
+        default=1,
+        help="Number of processes used to split documents into chunks",
+    )
     parser.add_argument(
         "--n_components", type=int, default=None, help="Number of topics to extract"
     )
+    parser.add_argument(
+        "--topic_candidates",
+        type=lambda value: [int(k) for k in value.split(",")],
+        default=None,
+        help='Without --n_components, pick the topic count among these, e.g. "5,10,20"',
+    )
+    parser.add_argument(
+        "--selection_metric",
+        type=str,
+        choices=["perplexity", "coherence"],
+        default="perplexity",
+        help="Score used to pick the topic count",
+    )
+    parser.add_argument(
+        "--selection_sample",
+        type=int,
+        default=None,
+        help="Number of chunks sampled to pick the topic count",
+    )
+    parser.add_argument(
+        "--selection_workers",
+        type=int,
+        default=1,
+        help="Number of processes fitting candidate topic counts",
+    )
+    parser.add_argument(
+        "--fit_sample_size",
+        type=int,
+        default=None,
+        help="Fit topics on at most this many chunks, sampled per source file",
+    )
+    parser.add_argument(
+        "--check_convergence",
+        action="store_true",
+        help="Compare topics fitted on the sample and on half of it",
+    )
     parser.add_argument(
         "--n_features", type=int, default=512, help="Max features for TopicExtractor"
     )
@@ -148,6 +506,80 @@ if __name__ == "__main__":
     parser.add_argument(
         "--llm_model", type=str, default="ollama:phi4", help="LLM model to use"
     )
+    parser.add_argument(
+        "--llm_timeout",
+        type=float,
+        default=120.0,
+        help="Timeout in seconds of each LLM request",
+    )
+    parser.add_argument(
+        "--llm_max_retries",
+        type=int,
+        default=3,
+        help="Retries of an LLM request failing with a timeout, connection error or 5xx",
+    )
+    parser.add_argument(
+        "--llm_latency_target",
+        type=float,
+        default=None,
+        help="Latency in seconds above which fewer LLM requests are sent at once",
+    )
+    parser.add_argument(
+        "--keep_alive",
+        type=str,
+        default=None,
+        help='How long the LLM backend keeps the model loaded, e.g. "30m"',
+    )
+    parser.add_argument(
+        "--llm_endpoints",
+        type=str,
+        default=None,
+        help="Comma-separated endpoints of several LLM servers to spread requests "
+        'over, e.g. "http://gpu1:11434,http://gpu2:11434"',
+    )
+    parser.add_argument(
+        "--llm_routing",
+        type=str,
+        choices=["least_outstanding", "latency"],
+        default="least_outstanding",
+        help="How requests are routed between the --llm_endpoints",
+    )
+    parser.add_argument(
+        "--classify_workers",
+        type=int,
+        default=1,
+        help="Number of chunks classified concurrently",
+    )
+    parser.add_argument(
+        "--token_budget",
+        type=int,
+        default=None,
+        help="Classify chunks longest first, keeping at most this many prompt and "
+        "chunk tokens in flight, within --classify_workers requests",
+    )
+    parser.add_argument(
+        "--topic_batch_size",
+        type=int,
+        default=None,
+        help="Clean topics in concurrent batches of this size, then merge them",
+    )
+    parser.add_argument(
+        "--consolidate_threshold",
+        type=float,
+        default=None,
+        help="Merge cleaned topic labels whose similarity reaches this value (0-1)",
+    )
+    parser.add_argument(
+        "--top_k_topics",
+        type=int,
+        default=None,
+        help="Only offer each chunk its K most likely topics when classifying",
+    )
+    parser.add_argument(
+        "--structured_output",
+        action="store_true",
+        help="Request schema-constrained JSON from the LLM and validate it",
+    )
     parser.add_argument(
         "--output_folder",
         type=str,
@@ -162,6 +594,9 @@ if __name__ == "__main__":
         help='Choose topic extractor: "ktrain" for ktrain modeller or "sk" for sklearn model',
     )
     # ...existing argument definitions if any...
+    return parser
 
-    args = parser.parse_args()
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
     main(vars(args))
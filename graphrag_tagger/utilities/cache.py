@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from typing import Any, List, Optional, Tuple
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Return the SHA-256 hex digest of a file's content.
+
+    :param path: Path of the file.
+    :type path: str
+    :param block_size: Number of bytes read at a time.
+    :type block_size: int
+    :return: Hex digest.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Folder of zlib-compressed JSON values addressed by string keys.
+
+    Each entry is one file named after the SHA-256 of its key, written to a
+    temporary file and renamed into place, so concurrent runs never read a
+    partial entry. Hits and misses are counted for reporting.
+
+    With ``max_bytes``, the cache is a least recently used cache on disk: a hit
+    refreshes the modification time of its file, and when the folder grows
+    past ``max_bytes`` the files with the oldest modification times are
+    removed.
+    """
+
+    SUFFIX = ".json.z"
+
+    def __init__(self, folder: str, max_bytes: Optional[int] = None):
+        """
+        :param folder: Cache folder, created if needed.
+        :type folder: str
+        :param max_bytes: Maximum total size of the entries, None for no limit.
+        :type max_bytes: Optional[int]
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None  # total size, scanned when first needed
+
+    def _path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, name + self.SUFFIX)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        # (mtime, size, path) of every entry.
+        entries = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.name.endswith(self.SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # removed by another process
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the value stored under ``key``, None if there is none (or it is
+        unreadable).
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.max_bytes is not None:
+            try:
+                os.utime(path)  # mark as recently used
+            except OSError:
+                pass
+        return value
+
+    def set(self, key: str, value: Any):
+        """
+        Store a JSON serializable ``value`` under ``key``.
+        """
+        data = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        path = self._path(key)
+        if self.max_bytes is not None and self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        if self.max_bytes is not None:
+            self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self.evict(keep=path)
+
+    def evict(self, keep: Optional[str] = None):
+        """
+        Remove the least recently used entries until the cache fits in
+        ``max_bytes``.
+
+        :param keep: Path of an entry that is never removed (the one just set).
+        :type keep: Optional[str]
+        """
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self, name: str) -> str:
+        """
+        Describe the hits of this cache, e.g. ``"extraction cache: 3/4 hits (75%)"``.
+        """
+        lookups = self.hits + self.misses
+        return f"{name} cache: {self.hits}/{lookups} hits ({self.hit_rate:.0%})"
@@ -1,62 +1,121 @@
 import json
 import re
+from dataclasses import dataclass
+from typing import Any, Optional
 
+_DECODER = json.JSONDecoder()
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
 
-def parse_json(json_str: str):
+
+@dataclass
+class ParseResult:
     """
-    Parses a JSON object from a string that may contain extra text.
+    Outcome of :func:`parse_json_result`.
 
-    This function attempts three approaches to extract JSON:
+    :ivar value: The parsed JSON value, None on failure.
+    :ivar error: Description of the first decoding error, None on success.
+    :ivar position: Offset where the JSON value starts, or where decoding
+                    failed.
+    """
 
-    1. Directly parsing the entire string.
-    2. Extracting JSON enclosed within triple backticks (```json ... ```).
-    3. Extracting content between the first '{' and the last '}' or between '[' and ']'.
+    value: Any = None
+    error: Optional[str] = None
+    position: Optional[int] = None
 
-    :param json_str: The input string potentially containing a JSON object.
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _first_value(json_str: str, opening: str, start: int, stop: int):
+    # First value decoded at an ``opening`` character in [start, stop), with
+    # its span, and the first decoding error met on the way.
+    error: Optional[json.JSONDecodeError] = None
+    position = json_str.find(opening, start, stop)
+    while position != -1:
+        try:
+            value, end = _DECODER.raw_decode(json_str, position)
+            return value, position, end, error
+        except json.JSONDecodeError as e:
+            error = error or e
+        position = json_str.find(opening, position + 1, stop)
+    return None, None, None, error
+
+
+def _scan(json_str: str, scan_from: int) -> ParseResult:
+    # Preferred JSON value from ``scan_from`` on, see parse_json_result.
+    obj, obj_start, obj_end, obj_error = _first_value(
+        json_str, "{", scan_from, len(json_str)
+    )
+    # Only an array starting before the object can take precedence over it.
+    array_stop = obj_start if obj_start is not None else len(json_str)
+    array, array_start, array_end, array_error = _first_value(
+        json_str, "[", scan_from, array_stop
+    )
+    if obj_start is not None and (array_start is None or array_end < obj_end):
+        return ParseResult(value=obj, position=obj_start)
+    if array_start is not None:
+        return ParseResult(value=array, position=array_start)
+
+    errors = [e for e in (obj_error, array_error) if e is not None]
+    if errors:
+        first_error = min(errors, key=lambda e: e.pos)
+        return ParseResult(error=first_error.msg, position=first_error.pos)
+    return ParseResult(error="no JSON object or array found", position=scan_from)
+
+
+def parse_json_result(json_str: str) -> ParseResult:
+    """
+    Locate and parse the JSON value in a string that may contain extra text.
+
+    1. If the string is a JSON value surrounded only by whitespace, that
+       value is returned.
+    2. Otherwise the search starts after the first code fence (```json or
+       ```) if it comes before the first ``{`` or ``[``, else at the
+       beginning.
+    3. ``JSONDecoder.raw_decode`` is tried at each ``{`` in turn, ignoring any
+       trailing text, and the first object that decodes is returned, unless an
+       array starting before it decodes and encloses it (e.g. a list of
+       objects). Without an object, the first array that decodes is returned.
+
+    Objects are preferred because model answers often mention bracketed
+    numbers or notes before the JSON object, e.g. ``topics [1, 3]: {...}``.
+
+    :param json_str: The input string potentially containing a JSON value.
     :type json_str: str
-    :return: The parsed JSON object if successfully extracted, otherwise None.
-    :rtype: dict or list or None
+    :return: The parsed value, or the first error and its position.
+    :rtype: ParseResult
     """
-    # Attempt 1: Try to load the entire string as JSON.
+    if not json_str:
+        return ParseResult(error="empty input", position=0)
+
+    start = len(json_str) - len(json_str.lstrip())
     try:
-        return json.loads(json_str)
+        value, end = _DECODER.raw_decode(json_str, start)
+        if not json_str[end:].strip():
+            return ParseResult(value=value, position=start)
     except json.JSONDecodeError:
         pass
 
-    # Attempt 2: Look for a JSON block delimited by ```json and ```.
-    match = re.search(r"```json\s*(.*?)\s*```", json_str, re.DOTALL)
-    if match:
-        json_block = match.group(1)
-        try:
-            return json.loads(json_block)
-        except json.JSONDecodeError as e:
-            print("Error parsing JSON block:", e)
-            return
-
-    # Attempt 3: Fallback to extracting text between the first '{' and the last '}'.
-    start = json_str.find("{")
-    end = json_str.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        json_block = json_str[start : end + 1]
-        try:
-            return json.loads(json_block)
-        except json.JSONDecodeError as e:
-            print("Error parsing fallback JSON block:", e)
-            return
-
-    # Attempt 3: Fallback to extracting text between the first '{' and the last '}'.
-    start = json_str.find("[")
-    end = json_str.rfind("]")
-    if start != -1 and end != -1 and end > start:
-        json_block = json_str[start : end + 1]
-        try:
-            return json.loads(json_block)
-        except json.JSONDecodeError as e:
-            print("Error parsing fallback JSON block:", e)
-            return
+    fence = _FENCE.search(json_str)
+    brackets = [p for p in (json_str.find("{"), json_str.find("[")) if p != -1]
+    # A fence after the JSON (e.g. around code in an explanation) is ignored.
+    fenced = fence and (not brackets or fence.start() < min(brackets))
+    return _scan(json_str, fence.end() if fenced else 0)
 
-    # If no JSON could be parsed, return None.
-    return
+
+def parse_json(json_str: str):
+    """
+    Parses a JSON object from a string that may contain extra text.
+
+    See :func:`parse_json_result` for how the JSON value is located.
+
+    :param json_str: The input string potentially containing a JSON object.
+    :type json_str: str
+    :return: The parsed JSON object if successfully extracted, otherwise None.
+    :rtype: dict or list or None
+    """
+    return parse_json_result(json_str).value
 
 
 # --- Example Usage ---
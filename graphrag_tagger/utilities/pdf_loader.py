@@ -0,0 +1,322 @@
+import json
+import math
+import os
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import fitz
+
+from .cache import DiskCache, file_digest
+
+PAGE_SEPARATOR = "\n\n"
+
+# Layout mode: blocks in the top or bottom MARGIN fraction of a page are
+# header/footer candidates, dropped when the same text (digits ignored) is
+# found on at least REPEAT_RATIO of the pages.
+MARGIN = 0.08
+REPEAT_RATIO = 0.5
+# A page is a table of contents or index page when it starts with such a
+# heading, or when TOC_RATIO of its lines (at least TOC_MIN_LINES) end with a
+# page reference after dot leaders. Numbers alone are not enough: table rows
+# often end with one.
+TOC_RATIO = 0.6
+TOC_MIN_LINES = 5
+
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+_TOC_HEADING = re.compile(r"^(table of )?contents$|^index$", re.IGNORECASE)
+_PAGE_REFERENCE = re.compile(r"(\.\s?){3,}\s*\d+(\s*[-–,]\s*\d+)*$|…\s*\d+$")
+
+
+def parse_page_range(value: str) -> Tuple[int, Optional[int]]:
+    """
+    Parse a 1-based inclusive page range such as ``"3-40"``, ``"3-"`` or ``"7"``.
+
+    :param value: Page range.
+    :type value: str
+    :return: First and last page, the last page is None for an open range.
+    :rtype: Tuple[int, Optional[int]]
+    :raises ValueError: If the range is malformed or empty.
+    """
+    first, sep, last = value.partition("-")
+    first_page = int(first) if first.strip() else 1
+    last_page = (int(last) if last.strip() else None) if sep else first_page
+    if first_page < 1 or (last_page is not None and last_page < first_page):
+        raise ValueError(f"invalid page range: {value!r}")
+    return first_page, last_page
+
+
+def _margin_key(block, height: float) -> Optional[str]:
+    # Normalised text of a block lying in the header or footer band.
+    x0, y0, x1, y1, text = block[:5]
+    if y1 > height * MARGIN and y0 < height * (1 - MARGIN):
+        return None
+    key = _SPACES.sub(" ", _DIGITS.sub("#", text)).strip().lower()
+    return key or None
+
+
+def _is_toc_page(text: str) -> bool:
+    lines = [line for line in map(str.strip, text.splitlines()) if line]
+    if not lines:
+        return False
+    if _TOC_HEADING.match(lines[0]):
+        return True
+    if len(lines) < TOC_MIN_LINES:
+        return False
+    references = sum(1 for line in lines if _PAGE_REFERENCE.search(line))
+    return references >= TOC_RATIO * len(lines)
+
+
+def _layout_texts(pages: Iterable) -> List[str]:
+    """
+    Extract page texts from text blocks, dropping repeated headers and footers
+    and emptying table of contents and index pages.
+    """
+    page_blocks = []
+    for page in pages:
+        height = page.rect.height
+        page_blocks.append(
+            [
+                (block[4], _margin_key(block, height))
+                for block in page.get_text("blocks", sort=True)
+                if block[6] == 0  # text blocks only
+            ]
+        )
+
+    counts = Counter(
+        key for blocks in page_blocks for key in {key for _, key in blocks if key}
+    )
+    min_repeats = max(2, math.ceil(REPEAT_RATIO * len(page_blocks)))
+
+    texts = []
+    for blocks in page_blocks:
+        text = "".join(
+            block_text if block_text.endswith("\n") else block_text + "\n"
+            for block_text, key in blocks
+            if key is None or counts[key] < min_repeats
+        )
+        texts.append("" if _is_toc_page(text) else text)
+    return texts
+
+
+def extract_pages(
+    doc,
+    layout: bool = False,
+    page_range: Optional[Tuple[int, Optional[int]]] = None,
+    max_pages: Optional[int] = None,
+) -> List[str]:
+    """
+    Extract the page texts of an open PDF document.
+
+    In layout mode the text is read block by block: blocks repeated in the
+    header or footer band of many pages are dropped, and table of contents and
+    index pages are left empty, so they are never chunked or classified.
+
+    Pages outside ``page_range`` and skipped pages are returned as empty
+    strings (up to the last extracted page), so that list index ``i`` is
+    always page ``i + 1``. A range starting after the last page of the
+    document gives no pages.
+
+    :param doc: Document opened with ``fitz.open``.
+    :param layout: Use layout-aware extraction.
+    :type layout: bool
+    :param page_range: First and last page to extract (1-based, inclusive,
+                       last page None for the end of the document).
+    :type page_range: Optional[Tuple[int, Optional[int]]]
+    :param max_pages: Maximum number of pages to extract from the first page.
+    :type max_pages: Optional[int]
+    :return: Page texts.
+    :rtype: List[str]
+    """
+    first, last = page_range or (1, None)
+    if first == 1 and last is None and max_pages is None:
+        pages = doc
+    else:
+        page_count = len(doc)
+        if first > page_count:
+            # The range starts after the last page: nothing to extract.
+            return []
+        stop = page_count if last is None else min(last, page_count)
+        if max_pages is not None:
+            stop = min(stop, first - 1 + max_pages)
+        pages = doc.pages(first - 1, stop)
+    if layout:
+        texts = _layout_texts(pages)
+    else:
+        texts = [page.get_text() for page in pages]
+    return [""] * (first - 1) + texts
+
+
+def extraction_key(
+    file_path: str,
+    key_by: str = "mtime",
+    layout: bool = False,
+    page_range: Optional[Tuple[int, Optional[int]]] = None,
+    max_pages: Optional[int] = None,
+) -> str:
+    """
+    Build the extraction cache key of a PDF.
+
+    The key identifies the file either by path, modification time and size
+    (``key_by="mtime"``, no read needed) or by content hash (``key_by="hash"``,
+    survives copies and touches), plus the extraction options and the PyMuPDF
+    version.
+
+    :param file_path: Path of the PDF.
+    :type file_path: str
+    :param key_by: ``"mtime"`` or ``"hash"``.
+    :type key_by: str
+    :return: Cache key.
+    :rtype: str
+    """
+    if key_by == "hash":
+        source = file_digest(file_path)
+    elif key_by == "mtime":
+        stat = os.stat(file_path)
+        source = f"{os.path.abspath(file_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+    else:
+        raise ValueError(f"unknown cache key type: {key_by!r}")
+    options = [layout, page_range, max_pages, fitz.VersionBind]
+    return json.dumps(["pages", source, options])
+
+
+def pdf_files(folder_path: str) -> List[str]:
+    """
+    Paths of the PDF files in a folder, in directory listing order.
+    """
+    return [
+        os.path.join(folder_path, file_name)
+        for file_name in os.listdir(folder_path)
+        if file_name.lower().endswith(".pdf")
+    ]
+
+
+def load_pdf_file(
+    file_path: str,
+    layout: bool = False,
+    page_range: Optional[Tuple[int, Optional[int]]] = None,
+    max_pages: Optional[int] = None,
+    cache: Optional[DiskCache] = None,
+    cache_key: str = "mtime",
+) -> List[str]:
+    """
+    Loads the text of every page of one PDF, see :func:`load_pdf_pages`.
+
+    :return: Page texts, in page order.
+    :rtype: List[str]
+    """
+    key = None
+    if cache is not None:
+        key = extraction_key(file_path, cache_key, layout, page_range, max_pages)
+        pages = cache.get(key)
+        if pages is not None:
+            return pages
+    doc = fitz.open(file_path)
+    pages = extract_pages(doc, layout, page_range, max_pages)
+    if key is not None:
+        cache.set(key, pages)
+    return pages
+
+
+def load_pdf_pages(
+    folder_path: str,
+    layout: bool = False,
+    page_range: Optional[Tuple[int, Optional[int]]] = None,
+    max_pages: Optional[int] = None,
+    cache: Optional[DiskCache] = None,
+    cache_key: str = "mtime",
+) -> Dict[str, List[str]]:
+    """
+    Loads the text of every page of all PDFs in a given folder.
+
+    See :func:`extract_pages` for the extraction options. With a ``cache``,
+    PDFs extracted by an earlier run with the same options are not opened
+    again, and the cache hit rate is printed.
+
+    :param folder_path: Path to the folder containing PDF files.
+    :type folder_path: str
+    :param layout: Use layout-aware extraction.
+    :type layout: bool
+    :param page_range: First and last page to extract (1-based, inclusive).
+    :type page_range: Optional[Tuple[int, Optional[int]]]
+    :param max_pages: Maximum number of pages to extract per PDF.
+    :type max_pages: Optional[int]
+    :param cache: Cache of extracted page texts.
+    :type cache: Optional[DiskCache]
+    :param cache_key: How cached PDFs are identified, see :func:`extraction_key`.
+    :type cache_key: str
+    :return: Dictionary where keys are file paths and values are page texts.
+    :rtype: Dict[str, List[str]]
+    """
+    pages = {
+        file_path: load_pdf_file(
+            file_path, layout, page_range, max_pages, cache, cache_key
+        )
+        for file_path in pdf_files(folder_path)
+    }
+    if cache is not None:
+        print(cache.report("Extraction"))
+    return pages
+
+
+def join_pages(pages: List[str]) -> Tuple[str, List[int]]:
+    """
+    Join page texts into one document text.
+
+    Each page is followed by :data:`PAGE_SEPARATOR`, as in
+    :func:`load_pdf_texts`.
+
+    :param pages: Page texts, in page order.
+    :type pages: List[str]
+    :return: The document text and the offset where each page starts in it.
+    :rtype: Tuple[str, List[int]]
+    """
+    page_starts = []
+    offset = 0
+    for page in pages:
+        page_starts.append(offset)
+        offset += len(page) + len(PAGE_SEPARATOR)
+    return "".join(page + PAGE_SEPARATOR for page in pages), page_starts
+
+
+def page_span(
+    page_starts: List[int], char_start: int, char_end: int
+) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Map a character range of a joined document to its first and last page.
+
+    :param page_starts: Page start offsets returned by :func:`join_pages`.
+    :type page_starts: List[int]
+    :param char_start: Offset of the first character of the range.
+    :type char_start: int
+    :param char_end: Offset just past the last character of the range.
+    :type char_end: int
+    :return: 1-based first and last page numbers, None if there are no pages.
+    :rtype: Tuple[Optional[int], Optional[int]]
+    """
+    if not page_starts:
+        return None, None
+    first = bisect_right(page_starts, char_start)
+    last = bisect_right(page_starts, max(char_start, char_end - 1))
+    return max(first, 1), max(last, 1)
+
+
+def load_pdf_texts(
+    folder_path: str, cache: Optional[DiskCache] = None, cache_key: str = "mtime"
+):
+    """
+    Loads text from all PDFs in a given folder.
+
+    :param folder_path: Path to the folder containing PDF files.
+    :type folder_path: str
+    :param cache: Cache of extracted texts, see :func:`load_pdf_pages`.
+    :type cache: Optional[DiskCache]
+    :param cache_key: How cached PDFs are identified, ``"mtime"`` or ``"hash"``.
+    :type cache_key: str
+    :return: Dictionary where keys are file paths and values are extracted text.
+    :rtype: dict
+    """
+    pages = load_pdf_pages(folder_path, cache=cache, cache_key=cache_key)
+    return {file_path: join_pages(texts)[0] for file_path, texts in pages.items()}
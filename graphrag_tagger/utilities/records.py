@@ -0,0 +1,177 @@
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+_PROVENANCE = ("page_start", "page_end", "char_start", "char_end")
+
+
+@dataclass(slots=True)
+class ChunkRecord:
+    """
+    A text chunk with its source and topics stored as ids into a :class:`ChunkTable`.
+
+    ``page_start``/``page_end`` are the 1-based pages the chunk spans and
+    ``char_start``/``char_end`` its character range in the extracted document
+    text, when known.
+    """
+
+    chunk: str
+    source_id: int
+    topic_ids: array = field(default_factory=lambda: array("I"))
+    content_type: Optional[str] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    char_start: Optional[int] = None
+    char_end: Optional[int] = None
+
+
+class ChunkTable:
+    """
+    Compact collection of chunk records sharing source file and topic tables.
+
+    Source paths and topic labels are stored once in the tables and referenced
+    by integer id from each :class:`ChunkRecord`, whose topic list is an
+    ``array('I')``. ``raw`` optionally holds the full classification of every
+    record, aligned with ``records``.
+    """
+
+    PROVENANCE = _PROVENANCE
+
+    def __init__(self):
+        self.sources: List[str] = []
+        self.topics: List[str] = []
+        self.records: List[ChunkRecord] = []
+        self.raw: Optional[List[dict]] = None
+        self._source_ids: Dict[str, int] = {}
+        self._topic_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[ChunkRecord]:
+        return iter(self.records)
+
+    def __getitem__(self, index: int) -> ChunkRecord:
+        return self.records[index]
+
+    def source_id(self, source_file: str) -> int:
+        """
+        Return the id of a source file, adding it to the table if needed.
+        """
+        source_id = self._source_ids.get(source_file)
+        if source_id is None:
+            source_id = self._source_ids[source_file] = len(self.sources)
+            self.sources.append(source_file)
+        return source_id
+
+    def topic_id(self, topic: str) -> int:
+        """
+        Return the id of a topic label, adding it to the table if needed.
+        """
+        topic_id = self._topic_ids.get(topic)
+        if topic_id is None:
+            topic_id = self._topic_ids[topic] = len(self.topics)
+            self.topics.append(topic)
+        return topic_id
+
+    def add(
+        self,
+        chunk: str,
+        source_file: str,
+        topics: Iterable[str] = (),
+        content_type: Optional[str] = None,
+        page_start: Optional[int] = None,
+        page_end: Optional[int] = None,
+        char_start: Optional[int] = None,
+        char_end: Optional[int] = None,
+    ) -> ChunkRecord:
+        """
+        Append a chunk to the table.
+
+        :param chunk: Chunk text.
+        :type chunk: str
+        :param source_file: Path of the document the chunk comes from.
+        :type source_file: str
+        :param topics: Ordered topic labels of the chunk.
+        :type topics: Iterable[str]
+        :param content_type: Content type returned by the classifier, if any.
+        :type content_type: Optional[str]
+        :param page_start: First page of the chunk (1-based).
+        :type page_start: Optional[int]
+        :param page_end: Last page of the chunk (1-based).
+        :type page_end: Optional[int]
+        :param char_start: Start offset of the chunk in the document text.
+        :type char_start: Optional[int]
+        :param char_end: End offset of the chunk in the document text.
+        :type char_end: Optional[int]
+        :return: The new record.
+        :rtype: ChunkRecord
+        """
+        record = ChunkRecord(
+            chunk,
+            self.source_id(source_file),
+            array("I", [self.topic_id(t) for t in topics]),
+            sys.intern(content_type) if content_type else None,
+            page_start,
+            page_end,
+            char_start,
+            char_end,
+        )
+        self.records.append(record)
+        return record
+
+    def set_topics(self, record: ChunkRecord, topics: Iterable[str]):
+        record.topic_ids = array("I", [self.topic_id(t) for t in topics])
+
+    def source_of(self, record: ChunkRecord) -> str:
+        return self.sources[record.source_id]
+
+    def topics_of(self, record: ChunkRecord) -> List[str]:
+        return [self.topics[t] for t in record.topic_ids]
+
+    def topic_lists(self) -> Iterator[List[str]]:
+        """
+        Yield the topic labels of every record, in table order.
+        """
+        for record in self.records:
+            yield self.topics_of(record)
+
+    def to_dict(self, record: ChunkRecord) -> dict:
+        """
+        Expand a record to the ``chunk``/``source_file``/``classification`` dict
+        used by the chunk JSON files (with ``classification`` as a topic list),
+        plus the page and offset fields when they are known.
+        """
+        data = {
+            "chunk": record.chunk,
+            "source_file": self.source_of(record),
+            "classification": self.topics_of(record),
+        }
+        data.update(self.provenance_of(record))
+        return data
+
+    @staticmethod
+    def provenance_of(record: ChunkRecord) -> Dict[str, int]:
+        """
+        Return the known ``page_start``/``page_end``/``char_start``/``char_end``
+        fields of a record.
+        """
+        fields = ((key, getattr(record, key)) for key in _PROVENANCE)
+        return {key: value for key, value in fields if value is not None}
+
+    @classmethod
+    def from_dicts(cls, raws: Iterable[dict]) -> "ChunkTable":
+        """
+        Build a table from ``chunk``/``source_file``/``classification`` dicts.
+        """
+        table = cls()
+        for raw in raws:
+            table.add(
+                raw["chunk"],
+                raw["source_file"],
+                raw.get("classification") or [],
+                raw.get("content_type"),
+                *(raw.get(key) for key in _PROVENANCE),
+            )
+        return table
@@ -0,0 +1,56 @@
+from typing import List
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+    "null": type(None),
+}
+
+
+def validate(instance, schema: dict, path: str = "$") -> List[str]:
+    """
+    Validate ``instance`` against a small subset of JSON Schema.
+
+    Supported keywords are ``type``, ``properties``, ``required``, ``items``,
+    ``enum``, ``minItems`` and ``maxItems``, which covers the schemas sent to
+    the LLM for structured output.
+
+    :param instance: Parsed JSON value.
+    :param schema: JSON schema.
+    :type schema: dict
+    :param path: Location of ``instance`` used in error messages.
+    :type path: str
+    :return: Human readable errors, empty if ``instance`` is valid.
+    :rtype: List[str]
+    """
+    expected = schema.get("type")
+    if expected is not None:
+        python_type = _TYPES[expected]
+        # bool is a subclass of int but not a JSON integer or number.
+        is_bool = isinstance(instance, bool) and expected in ("integer", "number")
+        if not isinstance(instance, python_type) or is_bool:
+            return [f"{path}: expected {expected}, got {type(instance).__name__}"]
+
+    errors = []
+    if "enum" in schema and instance not in schema["enum"]:
+        errors.append(f"{path}: {instance!r} is not one of {schema['enum']}")
+    if isinstance(instance, dict):
+        for key in schema.get("required", []):
+            if key not in instance:
+                errors.append(f"{path}: missing required key {key!r}")
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in instance:
+                errors.extend(validate(instance[key], sub_schema, f"{path}.{key}"))
+    if isinstance(instance, list):
+        if "minItems" in schema and len(instance) < schema["minItems"]:
+            errors.append(f"{path}: expected at least {schema['minItems']} items")
+        if "maxItems" in schema and len(instance) > schema["maxItems"]:
+            errors.append(f"{path}: expected at most {schema['maxItems']} items")
+        if "items" in schema:
+            for i, item in enumerate(instance):
+                errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
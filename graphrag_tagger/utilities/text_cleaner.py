@@ -1,13 +1,46 @@
+import hashlib
+import json
+import logging
 import re
 import string
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import tiktoken
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from .cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = frozenset(".?!")
+_PUNCTUATION = tuple(string.punctuation)
+_NUMBERED_LINE = re.compile(r"\d+\.")
+# Number of TOC, citation or title lines at which a chunk is rejected.
+_MAX_FLAGGED_LINES = 5
+# Part of the chunk cache key: bump when splitting or cleaning rules change.
+CHUNK_CACHE_VERSION = 1
+
+# Cleaner built once per worker process by ``_init_worker``.
+_worker_cleaner: Optional["TextCleaner"] = None
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int):
+    global _worker_cleaner
+    _worker_cleaner = TextCleaner(chunk_size, chunk_overlap)
+
+
+def _split_worker(text: str) -> List[Tuple[str, int, int]]:
+    return _worker_cleaner.split_text_spans(text)
+
 
 class TextCleaner:
+    encoding_name = "cl100k_base"
+
     def __init__(self, chunk_size=512, chunk_overlap=75):
-        encoding = tiktoken.get_encoding("cl100k_base")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        encoding = tiktoken.get_encoding(self.encoding_name)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -15,10 +48,126 @@ class TextCleaner:
         )
 
     def split_text(self, text):
-        texts = self.text_splitter.split_text(text)
-        print(texts)
-        texts = [self.merge_sentences(i) for i in texts if self.is_valid_file(i)]
-        return texts
+        return [chunk for chunk, _, _ in self.split_text_spans(text)]
+
+    def split_text_spans(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Split a text into cleaned chunks with the character range each one
+        was taken from.
+
+        Splitter chunks are ordered substrings of ``text``, so each one is
+        located by searching forward from the start of the previous chunk,
+        which only rescans the overlap between consecutive chunks. A chunk
+        that cannot be found in ``text`` is skipped with a logged warning,
+        since its offsets would be wrong.
+
+        :param text: Document text.
+        :type text: str
+        :return: ``(chunk, char_start, char_end)`` for every valid chunk, where
+                 the offsets delimit the raw chunk in ``text`` (before
+                 sentence merging).
+        :rtype: List[Tuple[str, int, int]]
+        """
+        spans = []
+        start = -1
+        for raw in self.text_splitter.split_text(text):
+            found = text.find(raw, start + 1)
+            if found == -1:
+                found = text.find(raw)
+            if found == -1:
+                logger.warning(
+                    "Skipping a chunk of %d characters not found in its text.",
+                    len(raw),
+                )
+                continue
+            start = found
+            if self.is_valid_file(raw):
+                spans.append((self.merge_sentences(raw), start, start + len(raw)))
+        return spans
+
+    def cache_key(self, text: str) -> str:
+        """
+        Chunk cache key of a document: its hash plus the splitter parameters and
+        encoding name.
+        """
+        digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        params = [self.chunk_size, self.chunk_overlap, self.encoding_name]
+        return json.dumps(["chunks", CHUNK_CACHE_VERSION, digest, params])
+
+    def split_documents(
+        self, documents: Dict[str, str], n_workers: int = 1
+    ) -> List[Tuple[str, str]]:
+        """
+        Split many documents into cleaned chunks, optionally in a process pool.
+
+        See :meth:`split_document_spans`.
+
+        :return: ``(source_file, chunk)`` pairs, ordered by document (in the
+                 order of ``documents``) and by position within each document.
+        :rtype: List[Tuple[str, str]]
+        """
+        return [
+            (source, chunk)
+            for source, chunk, _, _ in self.split_document_spans(documents, n_workers)
+        ]
+
+    def split_document_spans(
+        self,
+        documents: Dict[str, str],
+        n_workers: int = 1,
+        cache: Optional[DiskCache] = None,
+    ) -> List[Tuple[str, str, int, int]]:
+        """
+        Split many documents into cleaned chunks, optionally in a process pool.
+
+        Each worker process builds its own encoder and splitter once. Validation
+        and sentence merging run inside the workers.
+
+        With a ``cache``, documents whose chunks were stored by an earlier run
+        with the same splitter parameters (see :meth:`cache_key`) are not split
+        again, and the cache hit rate is printed.
+
+        :param documents: Mapping of source file path to document text.
+        :type documents: Dict[str, str]
+        :param n_workers: Number of worker processes. 1 splits in this process.
+        :type n_workers: int
+        :param cache: Cache of document chunks.
+        :type cache: Optional[DiskCache]
+        :return: ``(source_file, chunk, char_start, char_end)`` tuples, ordered
+                 by document (in the order of ``documents``) and by position
+                 within each document. See :meth:`split_text_spans`.
+        :rtype: List[Tuple[str, str, int, int]]
+        """
+        sources = list(documents)
+        span_lists: List[Optional[list]] = [None] * len(sources)
+        keys = []
+        if cache is not None:
+            keys = [self.cache_key(documents[source]) for source in sources]
+            span_lists = [cache.get(key) for key in keys]
+        missing = [i for i, spans in enumerate(span_lists) if spans is None]
+        texts = [documents[sources[i]] for i in missing]
+
+        if n_workers <= 1 or len(texts) <= 1:
+            new_span_lists = list(map(self.split_text_spans, texts))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_worker,
+                initargs=(self.chunk_size, self.chunk_overlap),
+            ) as executor:
+                new_span_lists = list(executor.map(_split_worker, texts))
+
+        for i, spans in zip(missing, new_span_lists):
+            span_lists[i] = spans
+            if cache is not None:
+                cache.set(keys[i], spans)
+        if cache is not None:
+            print(cache.report("Chunk"))
+        return [
+            (source, *span)
+            for source, spans in zip(sources, span_lists)
+            for span in spans
+        ]
 
     @staticmethod
     def merge_sentences(text: str) -> str:
@@ -41,71 +190,85 @@ class TextCleaner:
         Returns:
             str: The cleaned and merged text.
         """
-        punctuation = {".", "?", "!"}
-        # Split text into non-empty, stripped lines.
-        lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+        # Split text into non-empty, stripped lines (each line stripped once).
+        lines = [line for line in map(str.strip, text.splitlines()) if line]
         if not lines:
             return ""
 
         merged = [lines[0]]
         for line in lines[1:]:
-            last_line = merged[-1]
+            last_line = merged[-1]  # never empty
+            last_char = last_line[-1]
             # If the last line ends with a hyphen, remove it and merge without a space.
-            if last_line.endswith("-"):
+            if last_char == "-":
                 merged[-1] = last_line[:-1] + line
             # If the last line ends with sentence punctuation, start a new line.
-            elif last_line and last_line[-1] in punctuation:
-                merged.append(line)
-            # If the current line is all uppercase, treat it as a title or heading.
-            elif line.isupper():
+            elif last_char in _SENTENCE_END:
                 merged.append(line)
-            # If the current line starts with uppercase and the previous line doesn't end with punctuation,
-            # assume it's a new sentence/paragraph.
-            elif (
-                line
-                and line[0].isupper()
-                and (not last_line or last_line[-1] not in punctuation)
-            ):
+            # If the current line is all uppercase (a title or heading) or starts
+            # with uppercase, assume it's a new sentence/paragraph.
+            elif line[0].isupper() or line.isupper():
                 merged.append(line)
             # Otherwise, join the current line with a space.
             else:
                 merged[-1] = last_line + " " + line
 
-        return "\n".join(merged).strip()
+        return "\n".join(merged)
 
     @staticmethod
-    def _is_potential_title(line: str) -> bool:
-        line = line.strip()  # Remove leading and trailing whitespace
-
+    def _is_title_line(line: str) -> bool:
+        """
+        Same as :meth:`_is_potential_title` for a non-empty, stripped line.
+        """
         # Check if the line starts with a number followed by a period (e.g., "19.")
-        if re.match(r"^\d+\.", line):
+        if _NUMBERED_LINE.match(line):
             return True
 
-        # Other heuristics to identify if it's likely a title
-        if len(line.split()) <= 10 and not line.endswith(
-            tuple(string.punctuation)
-        ):  # Short and no ending punctuation
-            if line[0].isupper():  # Starts with an uppercase letter
-                words = line.split()
-                # Optional: Check for capitalized words in the title
-                capitalized_words = sum(1 for word in words if word[0].isupper())
-                # Allow a few lowercase words if there are capitalized ones
-                if capitalized_words >= len(words) / 2:
-                    return True
+        # Other heuristics to identify if it's likely a title: short, no ending
+        # punctuation, starts with an uppercase letter and at least half of the
+        # words are capitalized.
+        if not line[0].isupper() or line.endswith(_PUNCTUATION):
+            return False
+        words = line.split()
+        if len(words) > 10:
+            return False
+        capitalized_words = sum(1 for word in words if word[0].isupper())
+        return capitalized_words >= len(words) / 2
 
-        return False
+    @staticmethod
+    def _is_potential_title(line: str) -> bool:
+        line = line.strip()  # Remove leading and trailing whitespace
+        return bool(line) and TextCleaner._is_title_line(line)
 
     @staticmethod
     def is_valid_file(raw: str):
-        lines = [i for i in raw.split("\n") if i.strip()]
-        count = [i for i in lines if "........" in i]  # potential title
-        count2 = [i for i in lines if "—." in i]  # potential citation
-        count3 = [
-            1 for i in lines if TextCleaner._is_potential_title(i)
-        ]  # potential citation part
-        return (
-            (len(lines) > 3) and len(count) < 5 and len(count2) < 5 and len(count3) < 5
-        )
+        """
+        Check whether a chunk is worth keeping.
+
+        A chunk is rejected if it has 3 non-empty lines or fewer, or if 5 or more
+        of its lines look like a table of contents entry ("........"), a
+        citation ("—.") or a title. Lines are scanned once and the scan stops as
+        soon as one of these counts reaches the limit.
+        """
+        n_lines = dotted = citations = titles = 0
+        for line in raw.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            n_lines += 1
+            if "........" in line:  # potential table of contents entry
+                dotted += 1
+                if dotted >= _MAX_FLAGGED_LINES:
+                    return False
+            if "—." in line:  # potential citation
+                citations += 1
+                if citations >= _MAX_FLAGGED_LINES:
+                    return False
+            if TextCleaner._is_title_line(line):  # potential title
+                titles += 1
+                if titles >= _MAX_FLAGGED_LINES:
+                    return False
+        return n_lines > 3
 
     @staticmethod
     def split_text_into_large_chunks(text: str, target_word_count=300):
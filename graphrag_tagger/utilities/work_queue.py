@@ -0,0 +1,257 @@
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+@dataclass
+class Task:
+    """
+    A task claimed from a :class:`WorkQueue`.
+
+    :ivar id: Task id.
+    :ivar payload: The JSON value published for the task.
+    :ivar attempts: Number of times the task has been claimed, this one included.
+    """
+
+    id: int
+    payload: Any
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Task queue with leases, stored in an SQLite database.
+
+    Workers :meth:`claim` tasks for ``lease_seconds``. A task whose lease
+    expires before it is completed (its worker died or hung) can be claimed
+    again by any worker. After ``max_attempts`` claims a task that still fails
+    or times out is marked failed.
+
+    Every method runs in its own transaction, so several processes can share
+    the database file. The database must be on a local disk, or on a network
+    file system with working file locks.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, timeout: float = 30.0):
+        """
+        :param path: Path of the SQLite database, created if needed.
+        :type path: str
+        :param max_attempts: Claims of a task before it is marked failed.
+        :type max_attempts: int
+        :param timeout: Seconds to wait for a lock held by another process.
+        :type timeout: float
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent claims
+        # never select the same tasks.
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def reset(self):
+        """
+        Remove every task and setting.
+        """
+        self._transaction()
+        self.conn.execute("DELETE FROM tasks")
+        self.conn.execute("DELETE FROM meta")
+        self.conn.execute("COMMIT")
+
+    def set_meta(self, key: str, value: Any):
+        """
+        Store a JSON serializable job setting shared with the workers.
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False)),
+        )
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def publish(
+        self, payloads: Iterable[Any], meta: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Add one pending task per JSON serializable payload.
+
+        :param meta: Job settings stored in the same transaction, so workers
+                     never see the tasks without them, or them without the
+                     tasks.
+        :type meta: Optional[Dict[str, Any]]
+        :return: Number of tasks added.
+        :rtype: int
+        """
+        rows = [(json.dumps(payload, ensure_ascii=False),) for payload in payloads]
+        self._transaction()
+        self.conn.executemany("INSERT INTO tasks (payload) VALUES (?)", rows)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [
+                (key, json.dumps(value, ensure_ascii=False))
+                for key, value in (meta or {}).items()
+            ],
+        )
+        self.conn.execute("COMMIT")
+        return len(rows)
+
+    def claim(
+        self, owner: str, lease_seconds: float = 300.0, limit: int = 1
+    ) -> List[Task]:
+        """
+        Lease up to ``limit`` pending tasks, or tasks whose lease has expired.
+
+        :param owner: Identifier of the claiming worker.
+        :type owner: str
+        :param lease_seconds: Lease duration.
+        :type lease_seconds: float
+        :param limit: Maximum number of tasks.
+        :type limit: int
+        :return: The claimed tasks, in id order. Empty when there is nothing to do
+                 right now.
+        :rtype: List[Task]
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            # Expired leases of tasks out of attempts are failures.
+            self.conn.execute(
+                "UPDATE tasks SET status = ?, lease_owner = NULL, "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, self.max_attempts),
+            )
+            rows = self.conn.execute(
+                "SELECT id, payload, attempts FROM tasks "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY id LIMIT ?",
+                (PENDING, LEASED, now, limit),
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                [(LEASED, owner, now + lease_seconds, row[0]) for row in rows],
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [Task(row[0], json.loads(row[1]), row[2] + 1) for row in rows]
+
+    def _update_leased(self, sql: str, params: tuple) -> bool:
+        cursor = self.conn.execute(
+            sql + " WHERE id = ? AND status = ? AND lease_owner = ?", params
+        )
+        return cursor.rowcount == 1
+
+    def renew(self, task_id: int, owner: str, lease_seconds: float = 300.0) -> bool:
+        """
+        Extend the lease of a task still held by ``owner``.
+
+        :return: False if the lease was lost (expired and reclaimed).
+        :rtype: bool
+        """
+        return self._update_leased(
+            "UPDATE tasks SET lease_expires = ?",
+            (time.time() + lease_seconds, task_id, LEASED, owner),
+        )
+
+    def complete(self, task_id: int, owner: str, result: Any = None) -> bool:
+        """
+        Mark a task held by ``owner`` as done and store its JSON ``result``.
+
+        :return: False if the lease was lost, in which case the result is
+                 discarded.
+        :rtype: bool
+        """
+        return self._update_leased(
+            "UPDATE tasks SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+            "result = ?, error = NULL",
+            (DONE, json.dumps(result, ensure_ascii=False), task_id, LEASED, owner),
+        )
+
+    def fail(self, task_id: int, owner: str, error: str) -> bool:
+        """
+        Release a task held by ``owner`` after an error. It becomes pending
+        again, or failed once it has been claimed ``max_attempts`` times.
+
+        :return: False if the lease was lost.
+        :rtype: bool
+        """
+        return self._update_leased(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "lease_owner = NULL, lease_expires = NULL, error = ?",
+            (self.max_attempts, FAILED, PENDING, error, task_id, LEASED, owner),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of tasks in each status.
+        """
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for status, count in self.conn.execute(
+            "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+    def is_finished(self) -> bool:
+        """
+        True when no task is pending or leased.
+        """
+        counts = self.counts()
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def results(self) -> Iterator[Any]:
+        """
+        Yield the results of the done tasks, in task order.
+        """
+        for (result,) in self.conn.execute(
+            "SELECT result FROM tasks WHERE status = ? ORDER BY id", (DONE,)
+        ):
+            yield json.loads(result)
+
+    def errors(self) -> Dict[int, Optional[str]]:
+        """
+        Last error of each failed task, by task id.
+        """
+        return dict(
+            self.conn.execute(
+                "SELECT id, error FROM tasks WHERE status = ? ORDER BY id", (FAILED,)
+            ).fetchall()
+        )
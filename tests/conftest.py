@@ -0,0 +1,42 @@
+import pytest
+
+PAGE = """Retrieval augmented generation (RAG) is an established approach to using
+LLMs on private text corpora. Our approach uses an LLM to build a graph index in two
+stages: first, to derive an entity knowledge graph from the source documents, then to
+pre-generate community summaries for all groups of closely related entities.
+"""
+
+
+class DummyPage:
+    def get_text(self):
+        return PAGE * 3
+
+
+class DummyTopicExtractor:
+    def fit(self, texts):
+        return self
+
+    def get_topics(self):
+        return ["graph words", "retrieval words"]
+
+
+@pytest.fixture
+def pdf_folder(tmp_path, monkeypatch):
+    """
+    Folder of three two-page PDFs, read with a stubbed fitz and tagged with a
+    stubbed topic model and no LLM service. Tests patch
+    ``graphrag_tagger.tagger.LLM`` with the LLM they need.
+    """
+    import fitz
+
+    monkeypatch.setattr(fitz, "open", lambda path: [DummyPage(), DummyPage()])
+    monkeypatch.setattr(
+        "graphrag_tagger.tagger.SklearnTopicExtractor",
+        lambda **kwargs: DummyTopicExtractor(),
+    )
+    monkeypatch.setattr("graphrag_tagger.tagger.LLMService", lambda **kwargs: None)
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.pdf"):
+        (pdf_dir / name).write_text("pdf")
+    return str(pdf_dir)
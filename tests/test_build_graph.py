@@ -47,8 +47,42 @@ def test_load_raw_files(tmp_path, data1, data2):
     raws = graph_manager.load_raw_files(str(tmp_path))
     assert len(raws) == 2
     # Basic checks on loaded data
-    assert raws[0]["chunk"] == "doc1"
-    assert raws[1]["classification"] == ["b", "c"]
+    assert raws[0].chunk == "doc1"
+    assert raws.topics_of(raws[1]) == ["b", "c"]
+
+
+def test_load_raw_files_filters_content_type(tmp_path):
+    records = [
+        {"content_type": "paragraph", "topics": ["a"]},
+        {"content_type": "footer", "topics": ["b"]},
+        None,
+    ]
+    for i, classification in enumerate(records, start=1):
+        (tmp_path / f"chunk_{i}.json").write_text(
+            json.dumps(
+                {
+                    "chunk": f"doc{i}",
+                    "source_file": "f",
+                    "classification": classification,
+                }
+            )
+        )
+
+    graph_manager = GraphManager(n_workers=2)
+    raws = graph_manager.load_raw_files(str(tmp_path), content_type_filter="paragraph")
+    assert [raw.chunk for raw in raws] == ["doc1"]
+
+    raws = graph_manager.load_raw_files(str(tmp_path))
+    assert list(raws.topic_lists()) == [["a"], ["b"], []]
+    assert raws[1].content_type == "footer"
+
+    records = list(graph_manager.iter_raw_files(str(tmp_path), keep_raw=True))
+    assert records[1]["all_raw"]["content_type"] == "footer"
+
+    raws = graph_manager.load_raw_files(str(tmp_path), keep_raw=True)
+    assert [raws.to_dict(raw)["chunk"] for raw in raws] == ["doc1", "doc2", "doc3"]
+    assert raws.raw == [record["all_raw"] for record in records]
+    assert graph_manager.load_raw_files(str(tmp_path)).raw is None
 
 
 def test_compute_scores(data1, data2):
@@ -102,6 +136,26 @@ def test_prune_and_update_components():
     assert component_map[2] != component_map[0]
 
 
+def test_prune_edges_matches_prune_graph():
+    raws = [
+        {"chunk": f"doc{i}", "source_file": "f", "classification": topics}
+        for i, topics in enumerate(
+            [["a", "b"], ["b", "c"], ["a", "c"], ["c", "a", "b"], ["d"], ["b", "d"]]
+        )
+    ]
+    graph_manager = GraphManager()
+    scores_map = graph_manager.compute_scores(raws)
+    G_pruned = graph_manager.prune_graph(
+        graph_manager.build_graph(raws, scores_map), 60
+    )
+
+    topic_table, edges = graph_manager.compute_edge_arrays(raws, scores_map)
+    edges = graph_manager.prune_edges(edges, 60)
+    G = graph_manager.graph_from_edges(raws, topic_table, edges)
+    assert G.number_of_nodes() == G_pruned.number_of_nodes() == 6
+    assert sorted(G.edges(data=True)) == sorted(G_pruned.edges(data=True))
+
+
 def test_process_graph(tmp_path, data1, data2, data3):
     # Create temporary directories for input and output
     input_dir = tmp_path / "input"
@@ -0,0 +1,49 @@
+import os
+
+from graphrag_tagger.utilities.cache import DiskCache, file_digest
+
+
+def test_round_trip_and_hit_rate(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache"))
+    assert cache.get("a") is None
+    cache.set("a", ["page one", "page two é"])
+    assert cache.get("a") == ["page one", "page two é"]
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+    assert cache.report("Extraction") == "Extraction cache: 1/2 hits (50%)"
+    # Entries persist across instances and no temporary files are left.
+    assert DiskCache(str(tmp_path / "cache")).get("a") == ["page one", "page two é"]
+    assert not [n for n in os.listdir(tmp_path / "cache") if n.endswith(".tmp")]
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set("a", {"x": 1})
+    with open(cache._path("a"), "wb") as f:
+        f.write(b"not zlib")
+    assert cache.get("a") is None
+
+
+def test_file_digest(tmp_path):
+    path = tmp_path / "f.bin"
+    path.write_bytes(b"x" * 3000)
+    digest = file_digest(str(path), block_size=1024)
+    assert digest == file_digest(str(path))
+    path.write_bytes(b"y" * 3000)
+    assert file_digest(str(path)) != digest
+    assert file_digest(str(path)) == file_digest(str(path), block_size=7)
+
+
+def test_lru_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=6_000)
+    for i, key in enumerate("abc"):
+        cache.set(key, os.urandom(1500).hex())  # ~1.7 KB compressed each
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    assert cache.get("a") is not None  # "a" becomes the most recently used
+    cache.set("d", os.urandom(1500).hex())
+
+    assert cache.evictions == 1
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    total = sum(os.path.getsize(cache._path(key)) for key in "acd")
+    assert total <= 6_000
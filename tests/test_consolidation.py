@@ -0,0 +1,31 @@
+from graphrag_tagger.lda.consolidation import consolidate_topics
+
+
+def test_merges_near_duplicate_labels():
+    labels = ["Renewable Energy", "Renewable Energies", "Sports", "Football Sports"]
+    merged, mapping = consolidate_topics(labels, threshold=0.7)
+    assert merged == ["Renewable Energy", "Sports", "Football Sports"]
+    assert mapping[0]["labels"] == ["Renewable Energy", "Renewable Energies"]
+    assert mapping[0]["lda_topics"] == []
+
+
+def test_keeps_mapping_to_lda_topics():
+    labels = ["Solar Power", "Sun Energy", "Elections"]
+    lda_topics = [
+        "solar panel energy power",
+        "solar energy panel sun",
+        "vote election party",
+    ]
+    # The labels share no words; only the LDA topic words make them similar.
+    merged, mapping = consolidate_topics(labels, lda_topics, threshold=0.15)
+    assert merged == ["Solar Power", "Elections"]
+    assert mapping[0]["lda_topics"] == [0, 1]
+    assert mapping[1] == {
+        "label": "Elections",
+        "labels": ["Elections"],
+        "lda_topics": [2],
+    }
+
+
+def test_empty_labels():
+    assert consolidate_topics([]) == ([], [])
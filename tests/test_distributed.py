@@ -0,0 +1,175 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from graphrag_tagger.distributed import run_coordinator, run_worker
+from graphrag_tagger.utilities.work_queue import WorkQueue
+
+
+class DummyLLM:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def clean_topics(self, topics):
+        return ["Graphs", "Retrieval"]
+
+
+class StubLLM:
+    """Picklable classifier answering with the first candidate topic."""
+
+    def classify(self, document_chunk, topics, topic_numbers=None):
+        return {"content_type": "paragraph", "topics": [topics[0]], "pid": os.getpid()}
+
+
+class FailingLLM:
+    def classify(self, document_chunk, topics, topic_numbers=None):
+        raise RuntimeError("backend down")
+
+
+@pytest.fixture
+def params(tmp_path, pdf_folder, monkeypatch):
+    monkeypatch.setattr("graphrag_tagger.tagger.LLM", DummyLLM)
+    return {
+        "pdf_folder": pdf_folder,
+        "chunk_size": 100,
+        "chunk_overlap": 0,
+        "n_components": 2,
+        "n_features": 100,
+        "min_df": 1,
+        "max_df": 1.0,
+        "llm_model": "ollama:phi4",
+        "output_folder": str(tmp_path / "output"),
+        "model_choice": "sk",
+    }
+
+
+@pytest.fixture
+def job(tmp_path, params):
+    queue_path = str(tmp_path / "queue.db")
+    n_tasks = run_coordinator(params, queue_path)
+    return queue_path, n_tasks, tmp_path / "output"
+
+
+def test_coordinator_publishes_tasks(job):
+    queue_path, n_tasks, output = job
+    assert n_tasks > 3
+    with WorkQueue(queue_path) as queue:
+        assert queue.counts()["pending"] == n_tasks
+        assert queue.get_meta("topics") == ["Graphs", "Retrieval"]
+        assert queue.get_meta("output_folder") == str(output)
+        assert queue.get_meta("llm")["llm_model"] == "ollama:phi4"
+    assert json.loads((output / "topics.json").read_text())["topics"] == [
+        "Graphs",
+        "Retrieval",
+    ]
+
+
+def test_workers_build_their_llm_with_their_defaults(job, monkeypatch):
+    queue_path, n_tasks, output = job
+    with WorkQueue(queue_path) as queue:
+        assert queue.get_meta("llm") == {"llm_model": "ollama:phi4"}
+
+    services = []
+    monkeypatch.setattr(
+        "graphrag_tagger.tagger.LLMService", lambda **kwargs: services.append(kwargs)
+    )
+    monkeypatch.setattr("graphrag_tagger.tagger.LLM", lambda service: StubLLM())
+    assert run_worker(queue_path, poll_interval=0.01) == n_tasks
+    assert services[0]["max_retries"] == 3
+    assert services[0]["timeout"] == 120.0
+
+
+def test_workers_in_processes_share_the_queue(job):
+    queue_path, n_tasks, output = job
+    # A worker that died holding a task: its lease expires and is reclaimed.
+    with WorkQueue(queue_path) as queue:
+        (orphan,) = queue.claim("dead-worker", lease_seconds=0.2)
+
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(
+            target=run_worker,
+            args=(queue_path,),
+            kwargs=dict(
+                llm=StubLLM(), worker_id=f"w{i}", batch_size=2, poll_interval=0.05
+            ),
+        )
+        for i in range(3)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    with WorkQueue(queue_path) as queue:
+        assert queue.counts()["done"] == n_tasks
+        results = list(queue.results())
+    files = sorted(output.glob("chunk_*.json"))
+    assert len(files) == n_tasks
+    data = json.loads((output / f"chunk_{orphan.payload['index']}.json").read_text())
+    assert data["classification"]["topics"] == ["Graphs"]
+    assert data["chunk"] == orphan.payload["chunk"]
+    assert data["page_start"] >= 1
+    assert [r["chunk"] for r in results][:2] == [
+        json.loads((output / f"chunk_{i}.json").read_text())["chunk"] for i in (1, 2)
+    ]
+
+
+def test_failing_worker_marks_tasks_failed(job):
+    queue_path, n_tasks, _ = job
+    completed = run_worker(queue_path, llm=FailingLLM(), poll_interval=0.01)
+    assert completed == 0
+    with WorkQueue(queue_path) as queue:
+        counts = queue.counts()
+        assert counts["done"] == 0 and counts["failed"] == n_tasks
+        assert set(queue.errors().values()) == {"RuntimeError: backend down"}
+
+
+def test_worker_started_before_the_coordinator(tmp_path, params):
+    queue_path = str(tmp_path / "queue.db")
+    WorkQueue(queue_path).close()
+    completed = []
+    worker = threading.Thread(
+        target=lambda: completed.append(
+            run_worker(queue_path, llm=StubLLM(), poll_interval=0.01)
+        )
+    )
+    worker.start()
+    time.sleep(0.1)
+    # An empty queue is not a finished job: the worker waits for one.
+    assert worker.is_alive()
+
+    n_tasks = run_coordinator(params, queue_path)
+    worker.join(timeout=60)
+    assert completed == [n_tasks]
+    assert len(list((tmp_path / "output").glob("chunk_*.json"))) == n_tasks
+
+
+def test_worker_follows_a_new_job(tmp_path, params):
+    queue_path = str(tmp_path / "queue.db")
+    run_coordinator(params, queue_path)
+    second = {**params, "output_folder": str(tmp_path / "second")}
+
+    class RepublishingLLM(StubLLM):
+        republished = False
+
+        def classify(self, document_chunk, topics, topic_numbers=None):
+            # The coordinator replaces the job while a task is in progress.
+            if not self.republished:
+                self.republished = True
+                run_coordinator(second, queue_path)
+            return super().classify(document_chunk, topics, topic_numbers)
+
+    completed = run_worker(queue_path, llm=RepublishingLLM(), poll_interval=0.01)
+    with WorkQueue(queue_path) as queue:
+        n_tasks = queue.counts()["done"]
+    # Only the task in progress when the job was replaced went to the old
+    # folder, and its result was discarded; the new job goes to its folder.
+    assert completed == n_tasks
+    assert len(list((tmp_path / "output").glob("chunk_*.json"))) == 1
+    assert len(list((tmp_path / "second").glob("chunk_*.json"))) == n_tasks
@@ -0,0 +1,92 @@
+import random
+
+import numpy as np
+
+from graphrag_tagger.graph.edges import (
+    compute_edges,
+    encode_classifications,
+    select_edges,
+)
+from graphrag_tagger.graph.graph_manager import GraphManager
+
+
+def naive_edges(classifications, scores_map):
+    edges = {}
+    for i in range(len(classifications)):
+        for j in range(i + 1, len(classifications)):
+            common = set(classifications[i]).intersection(classifications[j])
+            if common:
+                edges[(i, j)] = sum(
+                    1.0 / (classifications[i].index(t) + 1)
+                    + 1.0 / (classifications[j].index(t) + 1)
+                    + scores_map[t]
+                    for t in common
+                )
+    return edges
+
+
+def random_corpus(n=60, n_topics=8, seed=0):
+    rng = random.Random(seed)
+    topics = [f"t{k}" for k in range(n_topics)]
+    classifications = [rng.sample(topics, rng.randint(0, 3)) for _ in range(n)]
+    scores_map = {t: rng.random() for t in topics}
+    return classifications, scores_map
+
+
+def test_matches_pairwise_reference():
+    classifications, scores_map = random_corpus()
+    _, offsets, topic_ids, scores = encode_classifications(classifications, scores_map)
+    edges = compute_edges(offsets, topic_ids, scores, shard_size=7)
+    expected = naive_edges(classifications, scores_map)
+    got = {
+        (i, j): w
+        for i, j, w in zip(edges["edge_src"], edges["edge_dst"], edges["edge_weight"])
+    }
+    assert got.keys() == expected.keys()
+    for key, weight in expected.items():
+        assert abs(got[key] - weight) < 1e-9
+    assert edges["edge_detail_offsets"][-1] == len(edges["detail_topic"])
+
+
+def test_parallel_is_deterministic():
+    classifications, scores_map = random_corpus(n=120, seed=1)
+    encoded = encode_classifications(classifications, scores_map)[1:]
+    serial = compute_edges(*encoded, n_jobs=1)
+    parallel = compute_edges(*encoded, n_jobs=2, shard_size=5)
+    assert serial.keys() == parallel.keys()
+    for name in serial:
+        np.testing.assert_array_equal(serial[name], parallel[name])
+
+
+def test_build_graph_details_follow_rank_order():
+    raws = [
+        {"chunk": "doc1", "source_file": "f1", "classification": ["b", "a"]},
+        {"chunk": "doc2", "source_file": "f2", "classification": ["a", "b"]},
+        {"chunk": "doc3", "source_file": "f3", "classification": []},
+    ]
+    scores_map = {"a": 1.0, "b": 2.0}
+    G = GraphManager().build_graph(raws, scores_map, n_jobs=2)
+    assert G.number_of_nodes() == 3
+    assert list(G.edges()) == [(0, 1)]
+    common = G.get_edge_data(0, 1)["common"]
+    assert [d["topic"] for d in common] == ["b", "a"]
+    assert (common[0]["rank_i"], common[0]["rank_j"]) == (0, 1)
+
+
+def test_select_edges_keeps_details_aligned():
+    classifications, scores_map = random_corpus(seed=2)
+    _, offsets, topic_ids, scores = encode_classifications(classifications, scores_map)
+    edges = compute_edges(offsets, topic_ids, scores)
+    keep = edges["edge_weight"] >= np.median(edges["edge_weight"])
+    selected = select_edges(edges, keep)
+
+    kept = np.flatnonzero(keep)
+    np.testing.assert_array_equal(selected["edge_src"], edges["edge_src"][kept])
+    offsets = edges["edge_detail_offsets"]
+    for k, edge in enumerate(kept):
+        lo, hi = selected["edge_detail_offsets"][k : k + 2]
+        np.testing.assert_array_equal(
+            selected["detail_topic"][lo:hi],
+            edges["detail_topic"][offsets[edge] : offsets[edge + 1]],
+        )
+    assert selected["edge_detail_offsets"][-1] == len(selected["detail_topic"])
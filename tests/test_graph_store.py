@@ -0,0 +1,111 @@
+import json
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from graphrag_tagger.build_graph import process_graph
+from graphrag_tagger.graph.graph_manager import GraphManager
+from graphrag_tagger.graph.graph_store import (
+    FORMAT_VERSION,
+    GraphStore,
+    load_graph,
+    read_meta,
+    save_graph,
+)
+from graphrag_tagger.utilities.records import ChunkTable
+
+
+@pytest.fixture()
+def graph():
+    raws = [
+        {"chunk": "doc1 é", "source_file": "f1", "classification": ["a", "b"]},
+        {"chunk": "doc2", "source_file": "f2", "classification": ["a", "c"]},
+        {"chunk": "doc3", "source_file": "f1", "classification": ["c", "b"]},
+    ]
+    scores_map = {"a": 1.0, "b": 0.5, "c": 0.25}
+    G = GraphManager().build_graph(raws, scores_map)
+    nx.set_node_attributes(G, {0: 0, 1: 0, 2: 0}, "component_id")
+    return G, scores_map
+
+
+def test_round_trip(tmp_path, graph):
+    G, scores_map = graph
+    save_graph(G, str(tmp_path), scores_map)
+    store = load_graph(str(tmp_path))
+
+    assert isinstance(store.arrays["edge_src"], np.memmap)
+    assert store.num_nodes == 3
+    assert store.num_edges == G.number_of_edges()
+    assert store.chunk_text(0) == "doc1 é"
+    assert store.source(2) == "f1"
+    assert store.classifications(1) == ["a", "c"]
+    assert store.sources == ["f1", "f2"]
+
+    G2 = store.to_networkx()
+    assert set(G2.edges()) == set(G.edges())
+    for u, v, data in G.edges(data=True):
+        data2 = G2.get_edge_data(u, v)
+        assert abs(data2["weight"] - data["weight"]) < 1e-9
+        assert [d["topic"] for d in data2["common"]] == [
+            d["topic"] for d in data["common"]
+        ]
+    assert G2.nodes[1]["component_id"] == 0
+
+
+def test_version_check(tmp_path, graph):
+    G, _ = graph
+    save_graph(G, str(tmp_path))
+    assert read_meta(str(tmp_path))["version"] == FORMAT_VERSION
+
+    meta_file = tmp_path / "meta.json"
+    meta = json.loads(meta_file.read_text())
+    meta["version"] = FORMAT_VERSION + 1
+    meta_file.write_text(json.dumps(meta))
+    with pytest.raises(ValueError):
+        GraphStore.load(str(tmp_path))
+
+
+def test_process_graph_writes_store(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for i, topics in enumerate([["a", "b"], ["b", "c"], ["a", "c"]], start=1):
+        (input_dir / f"chunk_{i}.json").write_text(
+            json.dumps(
+                {
+                    "chunk": f"doc{i}",
+                    "source_file": "f",
+                    "classification": {"topics": topics},
+                }
+            )
+        )
+    output_dir = tmp_path / "output"
+    G = process_graph(str(input_dir), str(output_dir), save_graph_store=True)
+    store = load_graph(str(output_dir / "graph"))
+    assert store.num_nodes == G.number_of_nodes()
+    assert store.num_edges == G.number_of_edges()
+    assert store.topic_scores is not None
+
+
+def test_from_edges_matches_from_networkx(graph):
+    G, scores_map = graph
+    raws = ChunkTable.from_dicts(
+        {
+            "chunk": data["chunk_text"],
+            "source_file": data["source"],
+            "classification": data["classifications"],
+        }
+        for _, data in G.nodes(data=True)
+    )
+    graph_manager = GraphManager()
+    topic_table, edges = graph_manager.compute_edge_arrays(raws, scores_map)
+    store = GraphStore.from_edges(
+        raws, topic_table, edges, scores_map, {0: 0, 1: 0, 2: 0}
+    )
+    expected = GraphStore.from_networkx(G, scores_map)
+    assert store.topics == expected.topics
+    assert store.topic_scores == expected.topic_scores
+    assert store.sources == expected.sources
+    for name, array in expected.arrays.items():
+        np.testing.assert_array_equal(store.arrays[name], array)
+        assert store.arrays[name].dtype == array.dtype
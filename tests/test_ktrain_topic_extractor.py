@@ -45,3 +45,20 @@ def test_get_topics():
     extractor.fit(texts)
     topics = extractor.get_topics()
     assert topics == ["topic1", "topic2"]
+
+
+def test_transform():
+    texts = ["document one", "document two"]
+    extractor = KtrainTopicExtractor(n_components=2)
+    with pytest.raises(ValueError):
+        extractor.transform(texts)
+    extractor.fit(texts)
+    assert extractor.transform(texts).shape == (2, 2)
+
+
+def test_transform_caches_training_texts():
+    texts = ["document one", "document two"]
+    extractor = KtrainTopicExtractor(n_components=2).fit(texts)
+    doc_topic = extractor.transform()
+    assert doc_topic.shape == (2, 2)
+    assert extractor.transform() is doc_topic
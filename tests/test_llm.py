@@ -33,3 +33,68 @@ def test_classify():
     llm = DummyLLM(llm_service)
     result = llm.classify("Some document text", ["TopicA", "TopicB", "TopicC"])
     assert result == ["TopicA", "TopicC"]
+
+
+class RecordingLLMService(LLMService):
+    def __init__(self, model="test-model"):
+        self.model_name = model
+        self.requests = []
+
+    def __call__(self, messages: list):
+        self.requests.append(messages)
+        return '{"content_type": "paragraph", "is_sufficient": true, "topics": []}'
+
+
+def test_classify_shares_system_prefix():
+    llm_service = RecordingLLMService()
+    llm = DummyLLM(llm_service)
+    topics = ["TopicA", "TopicB"]
+    llm.classify("first chunk", topics)
+    llm.classify("second chunk", topics)
+    first, second = llm_service.requests
+    assert first[0] == second[0]
+    assert first[0]["role"] == "system"
+    assert "first chunk" not in first[0]["content"]
+    assert "Topic 2: TopicB" in first[0]["content"]
+    assert first[1]["role"] == "user"
+    assert "second chunk" in second[1]["content"]
+
+
+def test_keep_alive_only_for_ollama():
+    assert LLMService("ollama:phi4", keep_alive="30m").request_kwargs == {
+        "keep_alive": "30m"
+    }
+    service = LLMService("openai:gpt-4o", timeout=None, keep_alive="30m")
+    assert service.request_kwargs == {}
+
+
+class BatchLLMService(LLMService):
+    def __init__(self, model="test-model"):
+        self.model_name = model
+        self.prompts = []
+
+    def __call__(self, messages: list):
+        prompt = messages[0]["content"]
+        self.prompts.append(prompt)
+        if "transform a list of messy topics" in prompt:
+            topics = prompt.split("<topics>\n")[1].split("\n</topics>")[0]
+            return str(["Label " + t.split()[0] for t in topics.splitlines()]).replace(
+                "'", '"'
+            )
+        return '["Merged"]'
+
+
+def test_clean_topics_in_batches():
+    llm_service = BatchLLMService()
+    llm = DummyLLM(llm_service)
+    result = llm.clean_topics(["a x", "b y", "c z", "a w", "d v"], batch_size=2)
+    assert result == ["Merged"]
+    # Three cleaning batches plus one merge request.
+    assert len(llm_service.prompts) == 4
+    merge_prompt = llm_service.prompts[-1]
+    assert merge_prompt.count("Label a") == 1
+
+
+def test_merge_topics_falls_back_to_deduplicated():
+    llm = DummyLLM(DummyLLMService())
+    assert llm.merge_topics(["Sports", " sports", "Politics"]) == ["Sports", "Politics"]
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from graphrag_tagger.lda.model_selection import (
+    format_curve,
+    select_n_components,
+    umass_coherence,
+)
+
+THEMES = [
+    "graph node edge community cluster network",
+    "pdf page text extraction layout header",
+    "model token prompt answer language inference",
+]
+
+
+def make_texts(n_per_theme=30, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(n_per_theme):
+        for theme in THEMES:
+            words = theme.split()
+            texts.append(" ".join(rng.choice(words, size=12)))
+    return texts
+
+
+def test_selection_reports_full_curve():
+    texts = make_texts()
+    best, curve = select_n_components(texts, [1, 3, 6], min_df=1, metric="coherence")
+    assert [point["n_components"] for point in curve] == [1, 3, 6]
+    assert best in (1, 3, 6)
+    assert best == max(curve, key=lambda point: point["coherence"])["n_components"]
+    assert all(point["perplexity"] > 0 for point in curve)
+    table = format_curve(curve, best)
+    assert len(table.splitlines()) == 4 and "*" in table
+
+
+def test_parallel_selection_matches_serial():
+    texts = make_texts()
+    serial = select_n_components(texts, [2, 3, 4], min_df=1, sample_size=60)
+    parallel = select_n_components(texts, [2, 3, 4], min_df=1, sample_size=60, n_jobs=2)
+    assert parallel == serial
+
+
+def test_umass_coherence_prefers_co_occurring_words():
+    # Words 0 and 1 always appear together, word 2 never with them.
+    doc_term = sparse.csr_matrix(np.array([[1, 1, 0], [1, 1, 0], [0, 0, 1]]))
+    coherent = umass_coherence(np.array([[5.0, 4.0, 0.1]]), doc_term, n_top_words=2)
+    mixed = umass_coherence(np.array([[5.0, 0.1, 4.0]]), doc_term, n_top_words=2)
+    assert coherent > mixed
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        select_n_components(make_texts(), [])
+    with pytest.raises(ValueError):
+        select_n_components(make_texts(), [2], metric="bleu")
@@ -1,4 +1,4 @@
-from graphrag_tagger.utilities.parser import parse_json
+from graphrag_tagger.utilities.parser import parse_json, parse_json_result
 
 
 def test_parse_valid_json():
@@ -35,3 +35,50 @@ def test_parse_invalid():
     json_str = "Not a json string"
     result = parse_json(json_str)
     assert result is None
+
+
+def test_parse_skips_non_json_brackets():
+    json_str = 'See [Note 1] for details. {"topics": ["a"]}'
+    assert parse_json(json_str) == {"topics": ["a"]}
+
+
+def test_parse_plain_fence_and_trailing_text():
+    json_str = '```\n["a", "b"]\n```\nThe list above contains ["c"].'
+    assert parse_json(json_str) == ["a", "b"]
+
+
+def test_parse_result_reports_error():
+    result = parse_json_result('Answer: {"key": "value",}')
+    assert not result.ok
+    assert result.value is None
+    assert result.position is not None and result.position > 0
+
+    result = parse_json_result("no json here")
+    assert not result.ok and result.error
+
+    result = parse_json_result('  {"key": 1}  ')
+    assert result.ok and result.position == 2
+
+
+def test_parse_prefers_object_over_earlier_array():
+    json_str = 'topics [1, 3]: {"content_type": "paragraph", "topics": [1, 3]}'
+    assert parse_json(json_str) == {"content_type": "paragraph", "topics": [1, 3]}
+    # An array enclosing the objects is kept whole.
+    assert parse_json('Result: [{"a": 1}, {"b": 2}] done') == [{"a": 1}, {"b": 2}]
+
+
+def test_parse_many_brackets_before_json():
+    json_str = " ".join(f"[{i}" for i in range(100)) + ' {"topics": ["a"]}'
+    assert parse_json(json_str) == {"topics": ["a"]}
+    json_str = " ".join("{x" for _ in range(100)) + ' ["a"]'
+    assert parse_json(json_str) == ["a"]
+
+
+def test_parse_json_before_a_code_fence():
+    text = '{"topics": ["a"]}\nExplanation:\n```\ncode\n```'
+    assert parse_json(text) == {"topics": ["a"]}
+
+
+def test_parse_fenced_json_followed_by_another_fence():
+    text = '```json\n{"topics": ["a"]}\n```\nUsage:\n```\nrun({"x": 1})\n```'
+    assert parse_json(text) == {"topics": ["a"]}
@@ -0,0 +1,170 @@
+import os
+
+import pytest
+
+from graphrag_tagger.utilities.cache import DiskCache
+from graphrag_tagger.utilities.pdf_loader import (
+    _is_toc_page,
+    extract_pages,
+    join_pages,
+    load_pdf_pages,
+    load_pdf_texts,
+    page_span,
+    parse_page_range,
+)
+from graphrag_tagger.utilities.text_cleaner import TextCleaner
+
+
+class DummyPage:
+    def __init__(self, text):
+        self.text = text
+
+    def get_text(self):
+        return self.text
+
+
+def dummy_fitz_open(file_path):
+    return [DummyPage("first page"), DummyPage("second page")]
+
+
+def test_load_pdf_pages_keeps_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "listdir", lambda folder: ["a.pdf", "notes.txt"])
+    import fitz
+
+    monkeypatch.setattr(fitz, "open", dummy_fitz_open)
+    path = os.path.join(str(tmp_path), "a.pdf")
+    assert load_pdf_pages(str(tmp_path)) == {path: ["first page", "second page"]}
+    assert load_pdf_texts(str(tmp_path)) == {path: "first page\n\nsecond page\n\n"}
+
+
+def test_join_pages_and_page_span():
+    text, starts = join_pages(["abc", "", "defgh"])
+    assert text == "abc\n\n\n\ndefgh\n\n"
+    assert starts == [0, 5, 7]
+    assert page_span(starts, 0, 3) == (1, 1)
+    assert page_span(starts, 2, 9) == (1, 3)
+    assert page_span(starts, 7, 12) == (3, 3)
+    assert page_span([], 0, 3) == (None, None)
+
+
+def test_chunk_spans_map_back_to_pages():
+    pages = [
+        f"Page {n} talks about graph retrieval and topic models in detail.\n" * 6
+        for n in range(1, 4)
+    ]
+    text, starts = join_pages(pages)
+    cleaner = TextCleaner(chunk_size=40, chunk_overlap=10)
+    spans = cleaner.split_text_spans(text)
+    assert [chunk for chunk, _, _ in spans] == cleaner.split_text(text)
+    previous = -1
+    for chunk, char_start, char_end in spans:
+        assert char_start > previous
+        previous = char_start
+        raw = text[char_start:char_end]
+        assert cleaner.merge_sentences(raw) == chunk
+        first, last = page_span(starts, char_start, char_end)
+        assert f"Page {first} " in raw and f"Page {last} " in raw
+
+
+def _write_pdf(path, pages):
+    import fitz
+
+    doc = fitz.open()
+    for number, body in enumerate(pages, start=1):
+        page = doc.new_page()
+        page.insert_text((72, 30), "ACME Annual Report")
+        page.insert_text((72, 100), body)
+        page.insert_text((72, 820), f"Page {number}")
+    doc.save(str(path))
+
+
+def test_layout_mode_drops_headers_footers_and_toc(tmp_path):
+    import fitz
+
+    toc = "Contents\nIntroduction ........ 2\nMethods ........ 3"
+    bodies = [toc] + [f"Section {n} body about graph retrieval." for n in (2, 3, 4)]
+    _write_pdf(tmp_path / "report.pdf", bodies)
+    doc = fitz.open(str(tmp_path / "report.pdf"))
+
+    plain = extract_pages(doc)
+    assert "ACME Annual Report" in plain[1] and "Page 2" in plain[1]
+
+    pages = extract_pages(doc, layout=True)
+    assert pages[0] == ""  # table of contents
+    for number, text in enumerate(pages[1:], start=2):
+        assert f"Section {number} body" in text
+        assert "ACME" not in text and f"Page {number}" not in text
+
+
+def test_page_range_and_max_pages_keep_page_numbers(tmp_path):
+    import fitz
+
+    _write_pdf(tmp_path / "doc.pdf", [f"Body {n}" for n in range(1, 7)])
+    doc = fitz.open(str(tmp_path / "doc.pdf"))
+
+    pages = extract_pages(doc, page_range=(3, 5))
+    assert pages[:2] == ["", ""] and len(pages) == 5
+    assert "Body 3" in pages[2] and "Body 5" in pages[4]
+    assert len(extract_pages(doc, page_range=(2, None), max_pages=2)) == 3
+    assert len(extract_pages(doc, max_pages=10)) == 6
+
+
+def test_page_range_past_the_end(tmp_path):
+    import fitz
+
+    _write_pdf(tmp_path / "short.pdf", [f"Body {n}" for n in range(1, 4)])
+    doc = fitz.open(str(tmp_path / "short.pdf"))
+
+    assert extract_pages(doc, page_range=(5, None)) == []
+    assert extract_pages(doc, page_range=(5, 8), layout=True) == []
+    pages = extract_pages(doc, page_range=(2, 8), max_pages=5)
+    assert len(pages) == 3 and "Body 3" in pages[2]
+
+
+def test_numeric_tables_are_not_toc_pages():
+    table = "Revenue by region\n" + "\n".join(
+        f"Region {n}   {2020 + n}   {1000 * n}" for n in range(1, 8)
+    )
+    assert not _is_toc_page(table)
+    toc = "\n".join(f"Chapter {n} . . . . . {10 * n}" for n in range(1, 8))
+    assert _is_toc_page(toc)
+    assert _is_toc_page("Index\ngraph, 12, 45\nretrieval, 3")
+
+
+def test_parse_page_range():
+    assert parse_page_range("3-40") == (3, 40)
+    assert parse_page_range("5-") == (5, None)
+    assert parse_page_range("7") == (7, 7)
+    with pytest.raises(ValueError):
+        parse_page_range("9-2")
+
+
+def test_cached_extraction_skips_fitz(tmp_path, monkeypatch, capsys):
+    import fitz
+
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    _write_pdf(pdf_dir / "a.pdf", ["Body one"])
+    _write_pdf(pdf_dir / "b.pdf", ["Body two"])
+    opened = []
+    real_open = fitz.open
+
+    def counting_open(path):
+        opened.append(path)
+        return real_open(path)
+
+    monkeypatch.setattr(fitz, "open", counting_open)
+    for key_by in ("mtime", "hash"):
+        cache = DiskCache(str(tmp_path / key_by))
+        first = load_pdf_texts(str(pdf_dir), cache=cache, cache_key=key_by)
+        assert len(opened) == 2
+        second = load_pdf_texts(
+            str(pdf_dir), cache=DiskCache(str(tmp_path / key_by)), cache_key=key_by
+        )
+        assert len(opened) == 2
+        assert second == first
+        assert "Extraction cache: 2/2 hits (100%)" in capsys.readouterr().out
+        # Other extraction options are cached separately.
+        load_pdf_pages(str(pdf_dir), layout=True, cache=cache, cache_key=key_by)
+        assert len(opened) == 4
+        opened.clear()
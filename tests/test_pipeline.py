@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from contextlib import aclosing
+
+import pytest
+
+from graphrag_tagger.pipeline import (
+    JsonFolderSink,
+    QueueSink,
+    Sink,
+    TaggingPipeline,
+    pipeline_params,
+    tag_pdfs,
+)
+from graphrag_tagger.tagger import main
+
+
+class StubLLM:
+    """Answers after a random delay, so classifications finish out of order."""
+
+    def __init__(self, *args, delay=0.0, **kwargs):
+        self.delay = delay
+
+    def clean_topics(self, topics):
+        return ["Graphs", "Retrieval"]
+
+    def classify(self, document_chunk, topics, topic_numbers=None):
+        time.sleep(random.uniform(0, self.delay))
+        topic = topics[len(document_chunk) % len(topics)]
+        return {"content_type": "paragraph", "topics": [topic]}
+
+
+class FailingLLM(StubLLM):
+    def classify(self, document_chunk, topics, topic_numbers=None):
+        raise RuntimeError("backend down")
+
+
+class ListSink(Sink):
+    def __init__(self):
+        self.records = []
+        self.closed = False
+
+    async def write(self, record):
+        self.records.append(record)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def params(pdf_folder, monkeypatch):
+    monkeypatch.setattr("graphrag_tagger.tagger.LLM", StubLLM)
+    return pipeline_params(
+        pdf_folder,
+        chunk_size=100,
+        chunk_overlap=0,
+        n_components=2,
+        min_df=1,
+        max_df=1.0,
+        model_choice="sk",
+    )
+
+
+def collect(iterator):
+    async def run():
+        return [record async for record in iterator]
+
+    return asyncio.run(run())
+
+
+def test_pipeline_params_defaults(params):
+    assert params["output_folder"] is None
+    assert params["llm_model"] == "ollama:phi4"
+    assert params["chunk_size"] == 100
+
+
+def test_matches_tagger_main(params, tmp_path):
+    main({**params, "output_folder": str(tmp_path / "main")})
+    sink = JsonFolderSink(str(tmp_path / "pipeline"))
+    records = collect(
+        tag_pdfs(params, llm=StubLLM(delay=0.01), sinks=[sink], concurrency=4)
+    )
+
+    assert [record["index"] for record in records] == list(range(1, len(records) + 1))
+    assert len(records) > 3
+    for record in records:
+        name = f"chunk_{record['index']}.json"
+        expected = json.loads((tmp_path / "main" / name).read_text())
+        assert json.loads((tmp_path / "pipeline" / name).read_text()) == expected
+        assert {k: v for k, v in record.items() if k != "index"} == expected
+    # Without an output folder, no topics file is written.
+    assert not (tmp_path / "pipeline" / "topics.json").exists()
+
+
+def test_token_budget_writes_the_same_files(params, tmp_path, capsys):
+    main({**params, "output_folder": str(tmp_path / "plain")})
+    main(
+        {
+            **params,
+            "output_folder": str(tmp_path / "budget"),
+            "token_budget": 2000,
+            "classify_workers": 3,
+        }
+    )
+    assert "in flight" in capsys.readouterr().out
+    names = sorted(path.name for path in (tmp_path / "plain").glob("chunk_*.json"))
+    assert names
+    assert names == sorted(
+        path.name for path in (tmp_path / "budget").glob("chunk_*.json")
+    )
+    for name in names:
+        assert (tmp_path / "budget" / name).read_text() == (
+            tmp_path / "plain" / name
+        ).read_text()
+
+
+def test_progress_is_logged_not_printed(params, tmp_path, capsys, caplog):
+    params = {**params, "cache_folder": str(tmp_path / "cache")}
+    with caplog.at_level(logging.INFO, logger="graphrag_tagger.pipeline"):
+        records = collect(tag_pdfs(params, llm=StubLLM()))
+    assert records
+    assert capsys.readouterr().out == ""
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Topics cleaned:" in messages
+    assert any(message.startswith("Extraction cache") for message in messages)
+    assert any(message.startswith("Chunk cache") for message in messages)
+
+
+def test_fixed_topics_stream_in_order(params):
+    queue = asyncio.Queue()
+    sink = ListSink()
+    pipeline = TaggingPipeline(
+        params,
+        llm=StubLLM(delay=0.02),
+        topics=["Graphs", "Retrieval"],
+        sinks=[sink, QueueSink(queue)],
+        concurrency=3,
+        queue_size=4,
+    )
+
+    async def run():
+        records = [record async for record in pipeline.run()]
+        queued = [queue.get_nowait() for _ in range(queue.qsize())]
+        return records, queued
+
+    records, queued = asyncio.run(run())
+    assert [r["index"] for r in records] == list(range(1, len(records) + 1))
+    assert sink.records == records == queued
+    assert sink.closed
+    assert {r["source_file"].rsplit("/", 1)[1] for r in records} == {
+        "a.pdf",
+        "b.pdf",
+        "c.pdf",
+    }
+    assert all(r["page_start"] >= 1 for r in records)
+
+
+def test_error_is_raised_and_sinks_closed(params):
+    sink = ListSink()
+    with pytest.raises(RuntimeError, match="backend down"):
+        collect(tag_pdfs(params, llm=FailingLLM(), topics=["Graphs"], sinks=[sink]))
+    assert sink.records == []
+    assert sink.closed
+
+
+def test_consumer_can_stop_early(params):
+    sink = ListSink()
+
+    async def run():
+        async with aclosing(
+            tag_pdfs(params, llm=StubLLM(), topics=["Graphs"], sinks=[sink])
+        ) as records:
+            async for record in records:
+                return record
+
+    assert asyncio.run(run())["index"] == 1
+    assert sink.closed
+
+
+def test_sink_without_write_fails_on_creation():
+    class NoWriteSink(Sink):
+        async def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        NoWriteSink()
@@ -0,0 +1,247 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from graphrag_tagger.chat.llm import LLMService
+from graphrag_tagger.chat.pool import LLMPool, ollama_health_check
+from graphrag_tagger.chat.resilience import CircuitOpenError, RetryPolicy
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class StubOllama:
+    """
+    Local HTTP server answering the Ollama chat and version endpoints.
+    """
+
+    def __init__(self, name, delay=0.0, status=200, fail_first=0):
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.fail_first = fail_first
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._reply(stub.status, {"version": "0.0.0"})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                stub.requests += 1
+                time.sleep(stub.delay)
+                status = 500 if stub.requests <= stub.fail_first else stub.status
+                self._reply(status, {"message": {"content": stub.name}})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    servers = []
+
+    def start(name, **kwargs):
+        server = StubOllama(name, **kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def make_pool(*servers, **kwargs):
+    return LLMPool.from_specs(
+        [f"ollama:stub@{server.url}" for server in servers], timeout=5, **kwargs
+    )
+
+
+def test_from_specs():
+    pool = LLMPool.from_specs(["ollama:a@http://h1:11434", "ollama:b"])
+    assert [b.service.model_name for b in pool.backends] == ["ollama:a", "ollama:b"]
+    assert [b.service.api_url for b in pool.backends] == ["http://h1:11434", None]
+    assert pool.backends[0].service.retry_policy.max_retries == 0
+    assert pool.retry_policy.max_retries == 3
+    assert LLMPool.from_specs(["ollama:a"], max_retries=1).retry_policy.max_retries == 1
+    with pytest.raises(ValueError):
+        LLMPool([])
+    with pytest.raises(ValueError):
+        LLMPool.from_specs(["ollama:a"], strategy="random")
+
+
+def test_least_outstanding_spreads_requests(stubs):
+    servers = [stubs(f"s{i}", delay=0.05) for i in range(3)]
+    pool = make_pool(*servers)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        answers = list(executor.map(lambda _: pool(MESSAGES), range(30)))
+    assert sorted(set(answers)) == ["s0", "s1", "s2"]
+    # Six requests in flight over three servers: each holds about two at a time.
+    assert all(server.requests >= 5 for server in servers)
+    assert sum(b["requests"] for b in pool.stats()) == 30
+    assert all(b["outstanding"] == 0 for b in pool.stats())
+
+
+def test_latency_routing_prefers_fast_backend(stubs):
+    fast, slow = stubs("fast"), stubs("slow", delay=0.1)
+    pool = make_pool(slow, fast, strategy="latency")
+    answers = [pool(MESSAGES) for _ in range(10)]
+    # Both are measured once, then the fast one gets the traffic.
+    assert slow.requests == 1
+    assert answers.count("fast") == 9
+
+
+def test_failover_on_server_error(stubs):
+    broken, good = stubs("broken", status=500), stubs("good")
+    pool = make_pool(broken, good)
+    assert [pool(MESSAGES) for _ in range(4)] == ["good"] * 4
+    stats = pool.stats()
+    assert stats[0]["failures"] >= 1
+    assert stats[1]["failures"] == 0
+
+
+def test_failover_on_unreachable_server(stubs):
+    down, good = stubs("down"), stubs("good")
+    down.stop()
+    pool = make_pool(down, good, failure_threshold=1)
+    assert pool(MESSAGES) == "good"
+    # The breaker of the dead server opened: it is skipped from now on.
+    assert pool.stats()[0]["circuit_open"]
+    assert [pool(MESSAGES) for _ in range(3)] == ["good"] * 3
+    assert pool.stats()[0]["requests"] == 1
+
+
+def test_all_backends_failing_raises_last_error(stubs):
+    pool = make_pool(stubs("a", status=500), stubs("b", status=500), max_retries=0)
+    with pytest.raises(Exception):
+        pool(MESSAGES)
+    assert [b["failures"] for b in pool.stats()] == [1, 1]
+
+
+def test_client_error_is_not_retried(stubs):
+    servers = [stubs("a", status=400), stubs("b", status=400)]
+    pool = make_pool(*servers)
+    with pytest.raises(Exception):
+        pool(MESSAGES)
+    # A bad request would fail anywhere: no failover, retry or breaker failure.
+    assert sum(server.requests for server in servers) == 1
+    assert [b["failures"] for b in pool.stats()] == [0, 0]
+
+
+def test_health_checks(stubs):
+    up, flaky = stubs("up"), stubs("flaky")
+    pool = make_pool(up, flaky)
+    assert pool.check_health() == [True, True]
+
+    flaky.status = 503
+    assert pool.check_health() == [True, False]
+    assert [pool(MESSAGES) for _ in range(3)] == ["up"] * 3
+    assert flaky.requests == 0
+
+    flaky.status = 200
+    pool.backends[1].service.breaker.record_failure()
+    pool.backends[1].service.breaker.opened_at = time.monotonic()
+    pool.start_health_checks(interval=0.01)
+    try:
+        deadline = time.monotonic() + 2
+        while not pool.backends[1].healthy and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.close()
+    # Passing the health check also closes the breaker.
+    assert pool.stats()[1]["healthy"]
+    assert not pool.stats()[1]["circuit_open"]
+
+
+def test_no_available_backend(stubs):
+    server = stubs("down")
+    server.stop()
+    pool = make_pool(server, max_retries=0)
+    assert not ollama_health_check(pool.backends[0].service, timeout=0.5)
+    pool.check_health()
+    with pytest.raises(CircuitOpenError):
+        pool(MESSAGES)
+
+
+def test_health_check_ignores_other_providers():
+    assert ollama_health_check(LLMService(model="openai:gpt-4o", timeout=None))
+
+
+def test_retry_rounds_after_every_backend_failed(stubs):
+    first, second = stubs("first", fail_first=1), stubs("second", fail_first=1)
+    pool = make_pool(first, second, max_retries=1)
+    pool.retry_policy = RetryPolicy(max_retries=1, base_delay=0.0)
+    assert pool(MESSAGES) in ("first", "second")
+    assert [b["failures"] for b in pool.stats()] == [1, 1]
+
+    flaky = stubs("flaky", fail_first=1)
+    with pytest.raises(Exception):
+        make_pool(flaky, max_retries=0)(MESSAGES)
+
+
+def test_single_probe_of_a_half_open_backend(stubs):
+    broken, good = stubs("broken", status=500, delay=0.3), stubs("good")
+    pool = make_pool(broken, good, failure_threshold=1, reset_timeout=0.2)
+    assert pool(MESSAGES) == "good"
+    assert pool.stats()[0]["circuit_open"]
+    time.sleep(0.25)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        answers = list(executor.map(lambda _: pool(MESSAGES), range(8)))
+    # One request probed the broken backend; the others did not wait for it.
+    assert answers == ["good"] * 8
+    assert broken.requests == 2
+    assert time.monotonic() - start < 1.0
+    assert pool.stats()[0]["failures"] == 2
+
+
+def test_waits_for_a_breaker_reset(stubs):
+    server = stubs("late", fail_first=1)
+    pool = make_pool(server, failure_threshold=1, reset_timeout=0.3, max_retries=0)
+    with pytest.raises(Exception):
+        pool(MESSAGES)
+    assert pool.stats()[0]["circuit_open"]
+
+    # Every breaker is open: the request waits for the reset, then probes.
+    start = time.monotonic()
+    assert pool(MESSAGES) == "late"
+    assert time.monotonic() - start >= 0.2
+    assert not pool.stats()[0]["circuit_open"]
+
+
+def test_gives_up_after_max_wait(stubs):
+    pool = make_pool(
+        stubs("broken", status=500),
+        failure_threshold=1,
+        reset_timeout=10,
+        max_retries=0,
+        max_wait=0.2,
+    )
+    with pytest.raises(Exception):
+        pool(MESSAGES)
+    start = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        pool(MESSAGES)
+    assert 0.15 <= time.monotonic() - start < 2
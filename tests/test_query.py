@@ -0,0 +1,54 @@
+import networkx as nx
+import pytest
+
+from graphrag_tagger.graph.graph_store import save_graph
+from graphrag_tagger.graph.query import GraphQueryEngine
+
+
+@pytest.fixture()
+def graph():
+    G = nx.Graph()
+    for i, topics in enumerate([["a", "b"], ["b", "a"], ["a"], ["c"], ["c"]]):
+        G.add_node(i, chunk_text=f"doc{i}", source="f", classifications=topics)
+    G.add_edge(0, 1, weight=3.0)
+    G.add_edge(0, 2, weight=5.0)
+    G.add_edge(1, 2, weight=1.0)
+    G.add_edge(3, 4, weight=2.0)
+    components = {0: 0, 1: 0, 2: 0, 3: 1, 4: 1}
+    nx.set_node_attributes(G, components, "component_id")
+    return G
+
+
+def test_chunks_by_topic(graph):
+    engine = GraphQueryEngine.from_networkx(graph)
+    # Chunks with "a" as first topic come before chunk 1 where it is second.
+    assert engine.chunks_by_topic("a") == [0, 2, 1]
+    assert engine.chunks_by_topic("a", limit=1) == [0]
+    assert engine.chunks_by_topic("unknown") == []
+
+
+def test_neighbours_ranked_by_weight(graph):
+    engine = GraphQueryEngine.from_networkx(graph)
+    assert engine.neighbours(0) == [(2, 5.0), (1, 3.0)]
+    assert engine.neighbours(1, limit=1) == [(0, 3.0)]
+    with pytest.raises(KeyError):
+        engine.neighbours(42)
+
+
+def test_components_and_communities(graph):
+    engine = GraphQueryEngine.from_networkx(graph, communities=True)
+    assert engine.same_component(0) == [1, 2]
+    assert engine.same_component(3) == [4]
+    assert 4 in engine.same_community(3)
+    assert 0 not in engine.same_community(3)
+    assert engine.describe(3)["component_id"] == 1
+
+
+def test_expand_from_saved_store(tmp_path, graph):
+    save_graph(graph, str(tmp_path))
+    engine = GraphQueryEngine.from_folder(str(tmp_path))
+    assert engine.expand(1, hops=1) == [(0, 1), (2, 1)]
+    assert engine.expand(3, hops=3) == [(4, 1)]
+    assert engine.expand(1, hops=2, limit=1) == [(0, 1)]
+    with pytest.raises(ValueError):
+        engine.same_community(0)
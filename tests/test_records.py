@@ -0,0 +1,45 @@
+from graphrag_tagger.utilities.records import ChunkRecord, ChunkTable
+
+
+def test_tables_are_shared():
+    table = ChunkTable()
+    first = table.add("doc1", "a.pdf", ["x", "y"])
+    second = table.add("doc2", "a.pdf", ["y"], content_type="paragraph")
+    table.add("doc3", "b.pdf")
+
+    assert len(table) == 3
+    assert table.sources == ["a.pdf", "b.pdf"]
+    assert table.topics == ["x", "y"]
+    assert first.source_id == second.source_id
+    assert list(second.topic_ids) == [1]
+    assert table.topics_of(first) == ["x", "y"]
+    assert second.content_type == "paragraph"
+    assert not hasattr(first, "__dict__")
+
+
+def test_dict_round_trip():
+    raws = [
+        {"chunk": "doc1", "source_file": "f1", "classification": ["a", "b"]},
+        {"chunk": "doc2", "source_file": "f2", "classification": []},
+    ]
+    table = ChunkTable.from_dicts(raws)
+    assert [table.to_dict(record) for record in table] == raws
+    assert isinstance(table[0], ChunkRecord)
+    table.set_topics(table[1], ["c"])
+    assert list(table.topic_lists()) == [["a", "b"], ["c"]]
+
+
+def test_provenance_round_trip():
+    raw = {
+        "chunk": "doc1",
+        "source_file": "f1",
+        "classification": ["a"],
+        "page_start": 2,
+        "page_end": 3,
+        "char_start": 140,
+        "char_end": 610,
+    }
+    table = ChunkTable.from_dicts([raw])
+    assert table.to_dict(table[0]) == raw
+    assert table.provenance_of(table[0])["page_end"] == 3
+    assert ChunkTable.provenance_of(table.add("doc2", "f1")) == {}
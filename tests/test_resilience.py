@@ -0,0 +1,161 @@
+import threading
+
+import httpx
+import pytest
+from aisuite.provider import LLMError
+
+from graphrag_tagger.chat.llm import LLMService
+from graphrag_tagger.chat.resilience import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    is_transient,
+)
+
+
+def test_retry_delay_is_bounded():
+    policy = RetryPolicy(base_delay=1.0, max_delay=3.0)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt) <= min(3.0, 2**attempt)
+
+
+def test_limiter_aimd():
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=8, latency_target=1.0)
+    for _ in range(8):
+        limiter.acquire()
+        limiter.release(latency=0.1, success=True)
+    assert 5 <= limiter.limit <= 8
+
+    before = limiter.limit
+    limiter.acquire()
+    limiter.release(latency=0.1, success=False)
+    assert limiter.limit == pytest.approx(before / 2)
+    # A second failure in the same window does not shrink the limit again.
+    limiter.acquire()
+    limiter.release(latency=5.0, success=True)
+    assert limiter.limit == pytest.approx(before / 2)
+
+
+def test_limiter_blocks_above_limit():
+    limiter = AdaptiveLimiter(initial_limit=1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def worker():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not acquired.wait(0.05)
+    limiter.release(latency=0.0, success=True)
+    assert acquired.wait(1.0)
+    thread.join()
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow() == 0
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.allow() > 0
+    with pytest.raises(CircuitOpenError):
+        breaker.wait(max_wait=0.01)
+    breaker.wait(max_wait=1.0)  # half-open trial
+    breaker.record_success()
+    assert not breaker.is_open
+
+
+def provider_error(error):
+    # Providers such as aisuite's Ollama wrap the errors of their HTTP client.
+    try:
+        raise error
+    except Exception:
+        try:
+            raise LLMError("Ollama request failed")
+        except LLMError as wrapped:
+            return wrapped
+
+
+def status_error(status):
+    request = httpx.Request("POST", "http://llm/api/chat")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError("failed", request=request, response=response)
+
+
+@pytest.mark.parametrize(
+    "error, transient",
+    [
+        (httpx.ReadTimeout("timed out"), True),
+        (httpx.ConnectError("refused"), True),
+        (TimeoutError(), True),
+        (ConnectionResetError(), True),
+        (status_error(503), True),
+        (status_error(400), False),
+        (provider_error(status_error(502)), True),
+        (provider_error(status_error(404)), False),
+        (provider_error(httpx.ConnectError("refused")), True),
+        (ValueError("invalid JSON"), False),
+        (LLMError("An error occurred: unexpected response"), False),
+    ],
+)
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+def test_service_retries_transient_errors():
+    service = LLMService(model="ollama:phi4", max_retries=2)
+    service.retry_policy = RetryPolicy(max_retries=2, base_delay=0.0)
+    calls = []
+
+    def flaky(messages, **kwargs):
+        calls.append(messages)
+        if len(calls) < 3:
+            raise provider_error(status_error(503))
+        return "ok"
+
+    service._create = flaky
+    assert service([{"role": "user", "content": "hi"}]) == "ok"
+    assert len(calls) == 3
+    assert service.limiter.in_flight == 0
+
+
+def test_service_raises_after_retries():
+    service = LLMService(model="ollama:phi4", max_retries=1)
+    service.retry_policy = RetryPolicy(max_retries=1, base_delay=0.0)
+
+    def failing(messages, **kwargs):
+        raise httpx.ConnectError("refused")
+
+    service._create = failing
+    with pytest.raises(httpx.ConnectError):
+        service([{"role": "user", "content": "hi"}])
+    assert service.breaker.failures == 2
+
+
+def test_service_does_not_retry_other_errors():
+    service = LLMService(model="ollama:phi4", max_retries=3)
+    service.retry_policy = RetryPolicy(max_retries=3, base_delay=0.0)
+    calls = []
+
+    def rejected(messages, **kwargs):
+        calls.append(messages)
+        raise provider_error(status_error(400))
+
+    service._create = rejected
+    with pytest.raises(LLMError):
+        service([{"role": "user", "content": "hi"}])
+    assert len(calls) == 1
+    assert service.breaker.failures == 0
+    assert service.limiter.in_flight == 0
+
+
+def test_service_creates_client_on_first_use():
+    # An unknown provider only fails once a request needs the client.
+    service = LLMService(model="nosuchprovider:model", timeout=5)
+    assert service._client is None
+    with pytest.raises(Exception):
+        service.model
+    assert LLMService(model="ollama:phi4").model is not None
@@ -0,0 +1,117 @@
+import numpy as np
+
+from graphrag_tagger.lda.sampling import (
+    check_convergence,
+    nested_samples,
+    stratified_sample,
+    topic_similarity,
+)
+from graphrag_tagger.tagger import build_topics
+from graphrag_tagger.utilities.records import ChunkTable
+
+
+def test_stratified_sample_is_proportional():
+    strata = [0] * 80 + [1] * 15 + [2] * 5
+    sample = stratified_sample(strata, 20)
+    assert len(sample) == 20
+    assert np.all(np.diff(sample) > 0)
+    counts = np.bincount(np.asarray(strata)[sample], minlength=3)
+    assert counts.tolist() == [15, 3, 2]
+    assert np.array_equal(stratified_sample(strata, 20), sample)
+    assert len(stratified_sample(strata, 500)) == 100
+
+
+def test_every_source_is_represented():
+    strata = [0] * 97 + [1, 2, 3]
+    counts = np.bincount(np.asarray(strata)[stratified_sample(strata, 10)])
+    assert counts.tolist() == [7, 1, 1, 1]
+    assert len(stratified_sample(strata, 2)) == 2
+
+
+def test_samples_are_nested():
+    strata = [i % 4 for i in range(200)]
+    small, large = nested_samples(strata, [40, 80])
+    assert set(small) <= set(large)
+
+
+def test_topic_similarity():
+    topics = ["graph node edge", "pdf page text"]
+    assert topic_similarity(topics, topics[::-1]) == 1.0
+    assert topic_similarity(topics, ["graph node edge"]) == 0.5
+    assert topic_similarity(topics, ["llm prompt token", "model answer"]) == 0.0
+    assert topic_similarity([], topics) == 0.0
+
+
+class FixedTopics:
+    def __init__(self, topics):
+        self.topics = topics
+
+    def get_topics(self):
+        return self.topics
+
+
+def test_check_convergence():
+    texts = [f"text {i}" for i in range(100)]
+    strata = [i % 5 for i in range(100)]
+    samples, counts = [], []
+
+    def stable_model(sample, n_topics):
+        samples.append(sample)
+        counts.append(n_topics)
+        return FixedTopics(["graph node edge", "pdf page text"])
+
+    converged, report, model = check_convergence(stable_model, texts, strata, 40)
+    assert converged and report["similarity"] == 1.0
+    assert [len(sample) for sample in samples] == [40, 20]
+    # The smaller sample gets as many topics as the larger one.
+    assert counts == [None, 2]
+    # The returned model was fitted on the fitting sample of that size.
+    assert samples[0] == [texts[i] for i in stratified_sample(strata, 40)]
+    assert model.get_topics() == ["graph node edge", "pdf page text"]
+
+    def drifting_model(sample, n_topics):
+        return FixedTopics([f"word{len(sample)} other{len(sample)}"])
+
+    converged, _, _ = check_convergence(drifting_model, texts, strata, 40)
+    assert not converged
+
+
+def test_build_topics_fits_both_samples_with_one_topic_count(monkeypatch):
+    counts = []
+
+    class RecordingExtractor:
+        def __init__(self, n_components=None, **kwargs):
+            self.n_components = n_components
+
+        def fit(self, texts):
+            counts.append(self.n_components)
+            # Like the sklearn extractor, choose a count from the sample size.
+            self.n_topics = self.n_components or int(len(texts) ** 0.5)
+            return self
+
+        def get_topics(self):
+            return [f"word{k} other{k}" for k in range(self.n_topics)]
+
+    class StubLLM:
+        def clean_topics(self, topics):
+            return topics
+
+    monkeypatch.setattr(
+        "graphrag_tagger.tagger.SklearnTopicExtractor", RecordingExtractor
+    )
+    chunks = ChunkTable()
+    for i in range(100):
+        chunks.add(f"text {i}", f"f{i % 4}")
+    params = {
+        "n_components": None,
+        "n_features": 10,
+        "min_df": 1,
+        "max_df": 1.0,
+        "model_choice": "sk",
+        "fit_sample_size": 64,
+        "check_convergence": True,
+        "output_folder": None,
+    }
+    topics, _ = build_topics(params, chunks, StubLLM(), log=lambda message: None)
+    assert counts == [None, 8]
+    assert len(topics) == 8
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from graphrag_tagger.chat.scheduler import TokenBatchScheduler
+
+
+def test_invalid_budget():
+    with pytest.raises(ValueError):
+        TokenBatchScheduler(token_budget=0)
+    with pytest.raises(ValueError):
+        TokenBatchScheduler(max_in_flight=0)
+
+
+def test_count_tokens_matches_encoding():
+    scheduler = TokenBatchScheduler()
+    texts = ["short", "a somewhat longer sentence with more tokens in it"]
+    assert scheduler.count_tokens(texts) == [
+        len(scheduler.encoding.encode(text)) for text in texts
+    ]
+
+
+class Recorder:
+    """Records the tokens and requests in flight while each request runs."""
+
+    def __init__(self, scheduler, delays):
+        self.scheduler = scheduler
+        self.delays = delays
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak_requests = 0
+        self.peak_tokens = 0
+        self.order = []
+
+    def __call__(self, item):
+        tokens = self.scheduler.count_tokens([item["chunk"]])[0]
+        tokens += self.scheduler.prompt_tokens
+        with self.lock:
+            self.order.append(item["index"])
+            self.running[item["index"]] = tokens
+            self.peak_requests = max(self.peak_requests, len(self.running))
+            self.peak_tokens = max(self.peak_tokens, sum(self.running.values()))
+        time.sleep(self.delays.get(item["index"], 0.02))
+        with self.lock:
+            del self.running[item["index"]]
+        return item["index"] * 10
+
+
+def test_map_keeps_requests_in_flight_within_budget():
+    texts = ["word " * n for n in (3, 40, 5, 38, 4, 41)]
+    items = [{"chunk": text, "index": i} for i, text in enumerate(texts)]
+    scheduler = TokenBatchScheduler(token_budget=90, max_in_flight=8)
+    recorder = Recorder(scheduler, {})
+
+    results = dict(scheduler.map(recorder, items))
+    assert results == {i: i * 10 for i in range(len(items))}
+
+    lengths = scheduler.count_tokens(texts)
+    assert recorder.peak_tokens <= 90
+    assert recorder.peak_requests > 1
+    # Longest first; requests sent together may start in either order.
+    assert sorted(lengths[i] for i in recorder.order[:2]) == sorted(lengths)[-2:]
+    assert len(scheduler.metrics) == len(items)
+    assert all(m.in_flight_tokens <= 90 for m in scheduler.metrics)
+    assert all(m.latency >= 0.02 for m in scheduler.metrics)
+
+    summary = scheduler.summary()
+    assert summary["requests"] == len(items)
+    assert summary["tokens"] == sum(lengths)
+    assert summary["failures"] == 0
+    assert "in flight" in scheduler.report()
+
+
+def test_map_refills_without_waiting_for_the_slowest_request():
+    items = [{"chunk": "word " * 10, "index": i} for i in range(6)]
+    scheduler = TokenBatchScheduler(token_budget=1000, max_in_flight=2)
+    recorder = Recorder(scheduler, {0: 0.3})
+
+    start = time.monotonic()
+    completed = [i for i, _ in scheduler.map(recorder, items)]
+    # The other five requests go through the second slot while the first runs.
+    assert time.monotonic() - start < 0.3 + 0.1
+    assert completed[-1] == 0
+    assert recorder.peak_requests == 2
+
+
+def test_prompt_tokens_count_against_the_budget():
+    prompt = "You classify text excerpts. " * 20
+    scheduler = TokenBatchScheduler(token_budget=300, prompt=prompt)
+    assert scheduler.prompt_tokens == scheduler.count_tokens([prompt])[0] > 100
+    items = [{"chunk": "word " * 5, "index": i} for i in range(6)]
+    recorder = Recorder(scheduler, {})
+    tokens = scheduler.prompt_tokens + scheduler.count_tokens(["word " * 5])[0]
+
+    assert len(list(scheduler.map(recorder, items))) == 6
+    assert recorder.peak_requests == 300 // tokens == 2
+    assert scheduler.summary()["tokens"] == 6 * tokens
+
+
+def test_oversized_request_runs_alone():
+    items = [{"chunk": "word " * n, "index": i} for i, n in enumerate((200, 5, 5))]
+    scheduler = TokenBatchScheduler(token_budget=100)
+    recorder = Recorder(scheduler, {})
+    assert sorted(i for i, _ in scheduler.map(recorder, items)) == [0, 1, 2]
+    assert scheduler.metrics[0].in_flight == 1
+
+
+def test_map_raises_and_counts_failures():
+    items = [{"chunk": "text"}, {"chunk": "more text"}, {"chunk": "the longest text"}]
+    scheduler = TokenBatchScheduler(max_in_flight=2)
+    calls = []
+
+    def fn(item):
+        calls.append(item["chunk"])
+        if item["chunk"] == "the longest text":
+            raise RuntimeError("backend down")
+        time.sleep(0.05)
+        return item["chunk"]
+
+    with pytest.raises(RuntimeError):
+        list(scheduler.map(fn, items))
+    # The request in flight finished; none was sent after the error.
+    assert sorted(calls) == ["more text", "the longest text"]
+    assert [m.failed for m in scheduler.metrics] == [True]
+
+
+def test_empty_summary():
+    scheduler = TokenBatchScheduler()
+    assert list(scheduler.map(lambda item: item, [])) == []
+    assert scheduler.summary() is None
+    assert scheduler.report() == "No requests sent."
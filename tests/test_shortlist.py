@@ -0,0 +1,34 @@
+import numpy as np
+
+from graphrag_tagger.chat.llm import classify_system_prompt
+from graphrag_tagger.lda.shortlist import shortlist_topics, topic_label_matrix
+
+
+def test_shortlist_aligned_labels():
+    doc_topic = np.array([[0.7, 0.1, 0.2], [0.15, 0.05, 0.8]])
+    labels = ["A", "B", "C"]
+    assert shortlist_topics(doc_topic, labels, 2) == [[0, 2], [0, 2]]
+    assert shortlist_topics(doc_topic, labels, 1) == [[0], [2]]
+
+
+def test_shortlist_with_topic_map():
+    doc_topic = np.array([[0.3, 0.3, 0.4], [0.9, 0.05, 0.05]])
+    labels = ["AB", "C"]
+    topic_map = [{"lda_topics": [0, 1]}, {"lda_topics": [2]}]
+    assert shortlist_topics(doc_topic, labels, 1, topic_map) == [[0], [0]]
+
+
+def test_shortlist_fallbacks():
+    doc_topic = np.ones((2, 3)) / 3
+    assert shortlist_topics(doc_topic, ["A", "B", "C"], None) is None
+    assert shortlist_topics(doc_topic, ["A", "B", "C"], 3) is None
+    # Four labels cannot be linked to three LDA topics.
+    assert shortlist_topics(doc_topic, ["A", "B", "C", "D"], 2) is None
+    assert topic_label_matrix(3, ["A"], [{"lda_topics": []}]) is None
+
+
+def test_prompt_keeps_global_topic_numbers():
+    prompt = classify_system_prompt(("B", "D"), (2, 4))
+    assert "Topic 2: B" in prompt
+    assert "Topic 4: D" in prompt
+    assert "Topic 1:" not in prompt
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from graphrag_tagger.lda.sk_modelling import SklearnTopicExtractor
@@ -20,3 +21,41 @@ def test_get_topics():
     topics = extractor.get_topics()
     assert isinstance(topics, list)
     assert all(isinstance(topic, str) for topic in topics)
+
+
+def test_transform():
+    texts = [
+        "this is a test document",
+        "another test document",
+        "yet another test document",
+    ]
+    extractor = SklearnTopicExtractor(n_components=2, n_features=20)
+    with pytest.raises(ValueError):
+        extractor.transform(texts)
+    extractor.fit(texts)
+    doc_topic = extractor.transform(texts)
+    assert doc_topic.shape == (3, 2)
+    assert np.allclose(doc_topic.sum(axis=1), 1.0)
+
+
+def test_transform_reuses_training_matrix(monkeypatch):
+    texts = [f"graph {w} retrieval {w}" for w in ("pdf", "llm", "lda", "edge")] * 6
+    extractor = SklearnTopicExtractor(n_components=3, n_features=20)
+    extractor.fit(texts)
+    assert extractor.doc_term.shape[0] == len(texts)
+
+    expected = extractor.transform(texts)
+    monkeypatch.setattr(
+        extractor.vectorizer, "transform", lambda texts: pytest.fail("vectorized")
+    )
+    doc_topic = extractor.transform()
+    assert np.allclose(doc_topic, expected)
+    assert extractor.transform() is doc_topic
+
+
+def test_batched_transform_matches_single_batch():
+    texts = [f"graph {w} retrieval {w}" for w in ("pdf", "llm", "lda", "edge")] * 6
+    extractor = SklearnTopicExtractor(n_components=3, n_features=20).fit(texts)
+    expected = extractor.transform(texts)
+    batched = extractor.transform(texts, n_jobs=2, batch_size=7)
+    assert np.allclose(batched, expected)
@@ -0,0 +1,62 @@
+from graphrag_tagger.chat.llm import LLM, LLMService
+from graphrag_tagger.chat.prompts import CLASSIFY_SCHEMA
+from graphrag_tagger.utilities.schema import validate
+
+
+class ScriptedLLMService(LLMService):
+    def __init__(self, answers, model="ollama:test"):
+        self.model_name = model
+        self.answers = list(answers)
+        self.requests = []
+
+    def __call__(self, messages: list, schema=None):
+        self.requests.append((messages, schema))
+        return self.answers.pop(0)
+
+
+def test_validate():
+    valid = {"content_type": "paragraph", "is_sufficient": True, "topics": ["a"]}
+    assert validate(valid, CLASSIFY_SCHEMA) == []
+    errors = validate(
+        {"content_type": "paragraph", "is_sufficient": 1}, CLASSIFY_SCHEMA
+    )
+    assert any("is_sufficient" in e for e in errors)
+    assert any("topics" in e for e in errors)
+    too_many = dict(valid, topics=["a", "b", "c", "d"])
+    assert validate(too_many, CLASSIFY_SCHEMA)
+
+
+def test_schema_kwargs_per_provider():
+    service = ScriptedLLMService([])
+    assert service._schema_kwargs(None) == {}
+    assert service._schema_kwargs(CLASSIFY_SCHEMA) == {"format": CLASSIFY_SCHEMA}
+    service.model_name = "openai:gpt-4o"
+    kwargs = service._schema_kwargs(CLASSIFY_SCHEMA)
+    assert kwargs["response_format"]["json_schema"]["schema"] == CLASSIFY_SCHEMA
+
+
+def test_classify_repairs_invalid_answer():
+    service = ScriptedLLMService(
+        [
+            '{"content_type": "paragraph", "topics": ["a"]}',
+            '{"content_type": "paragraph", "is_sufficient": true, "topics": ["a"]}',
+        ]
+    )
+    llm = LLM(service, structured=True)
+    result = llm.classify("text", ["a", "b"])
+    assert result["is_sufficient"] is True
+    assert len(service.requests) == 2
+    repair_messages, schema = service.requests[1]
+    assert schema == CLASSIFY_SCHEMA
+    assert repair_messages[-1]["role"] == "user"
+    assert "is_sufficient" in repair_messages[-1]["content"]
+
+
+def test_clean_topics_gives_up_after_max_repairs():
+    service = ScriptedLLMService(["not json", '{"topics": []}'])
+    llm = LLM(service, structured=True, max_repairs=1)
+    assert llm.clean_topics(["messy topic"]) is None
+    assert len(service.requests) == 2
+
+    service = ScriptedLLMService(['{"topics": ["A", "B"]}'])
+    assert LLM(service, structured=True).clean_topics(["messy"]) == ["A", "B"]
@@ -1,6 +1,6 @@
 import os
 
-from graphrag_tagger.tagger import load_pdf_texts
+from graphrag_tagger.tagger import load_pdf_texts, make_llm
 
 
 # Dummy classes to simulate a PDF document using fitz.
@@ -36,3 +36,12 @@ def test_load_pdf_texts_returns_text(tmp_path, monkeypatch):
     assert isinstance(texts, dict)
     assert expected_path in texts
     assert "dummy text" in texts[expected_path]
+
+
+def test_make_llm_passes_the_service_options():
+    llm = make_llm({"llm_model": "ollama:phi4", "llm_latency_target": 20.0})
+    assert llm.llm_service.limiter.latency_target == 20.0
+    assert (
+        make_llm({"llm_model": "ollama:phi4"}).llm_service.limiter.latency_target
+        is None
+    )
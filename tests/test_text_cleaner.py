@@ -0,0 +1,97 @@
+from graphrag_tagger.utilities.cache import DiskCache
+from graphrag_tagger.utilities.text_cleaner import TextCleaner
+
+PARAGRAPH = """focused summarization (QFS) task, rather than an explicit retrieval task. Prior
+QFS methods, meanwhile, do not scale to the quantities of text indexed by typ-
+ical RAG systems. To combine the strengths of these contrasting methods, we
+propose GraphRAG, a graph-based approach to question answering over private
+text corpora that scales with both the generality of user questions and the quantity
+of source text.
+"""
+
+
+def test_split_documents_keeps_order_and_sources(capsys):
+    documents = {"b.pdf": PARAGRAPH * 3, "a.pdf": PARAGRAPH, "empty.pdf": ""}
+    cleaner = TextCleaner(chunk_size=60, chunk_overlap=0)
+    chunks = cleaner.split_documents(documents)
+
+    assert chunks
+    sources = [source for source, _ in chunks]
+    assert sources == sorted(sources, key=list(documents).index)
+    assert "empty.pdf" not in sources
+    expected = [("b.pdf", c) for c in cleaner.split_text(documents["b.pdf"])]
+    assert chunks[: len(expected)] == expected
+    # Chunk contents are never printed.
+    assert "QFS" not in capsys.readouterr().out
+
+
+def test_split_text_spans_skips_chunks_not_in_text(capsys, caplog, monkeypatch):
+    cleaner = TextCleaner(chunk_size=60, chunk_overlap=0)
+    text = PARAGRAPH * 2
+    raws = cleaner.text_splitter.split_text(text)
+    monkeypatch.setattr(
+        cleaner.text_splitter,
+        "split_text",
+        lambda text: [raws[0], PARAGRAPH.upper(), *raws[1:]],
+    )
+    spans = cleaner.split_text_spans(text)
+
+    assert all(start >= 0 for _, start, _ in spans)
+    assert [text[start:end] for _, start, end in spans] == [
+        raw for raw in raws if cleaner.is_valid_file(raw)
+    ]
+    assert capsys.readouterr().out == ""
+    (message,) = [record.getMessage() for record in caplog.records]
+    assert "Skipping a chunk" in message and "QFS" not in message
+
+
+def test_split_documents_in_processes_matches_serial():
+    documents = {f"doc{i}.pdf": PARAGRAPH * (i + 1) for i in range(4)}
+    cleaner = TextCleaner(chunk_size=60, chunk_overlap=10)
+    assert cleaner.split_documents(documents, n_workers=2) == cleaner.split_documents(
+        documents
+    )
+
+
+def test_merge_sentences_rules():
+    text = "The graph is built from chun-\nks of text\nand summaries.\nNEW SECTION\n  Next line\nends here"
+    assert TextCleaner.merge_sentences(text) == (
+        "The graph is built from chunks of text and summaries.\n"
+        "NEW SECTION\nNext line ends here"
+    )
+    assert TextCleaner.merge_sentences(" \n\n ") == ""
+
+
+def test_is_valid_file_rejects_toc_and_short_chunks():
+    assert TextCleaner.is_valid_file(PARAGRAPH)
+    assert not TextCleaner.is_valid_file("one line\n\ntwo lines\n")
+    toc = "\n".join(f"{i}. Chapter {'.' * 10} {i}" for i in range(1, 8))
+    assert not TextCleaner.is_valid_file(toc)
+    citations = "\n".join(f"cited in work —. {i}" for i in range(6))
+    assert not TextCleaner.is_valid_file(citations)
+    titles = "\n".join(["Graph Retrieval Methods"] * 5 + ["body text."] * 3)
+    assert not TextCleaner.is_valid_file(titles)
+    assert not TextCleaner._is_potential_title("   ")
+    assert TextCleaner._is_potential_title(" 19. results")
+
+
+def test_chunk_cache_skips_splitter(tmp_path, monkeypatch, capsys):
+    documents = {"a.pdf": PARAGRAPH * 2, "b.pdf": PARAGRAPH}
+    cleaner = TextCleaner(chunk_size=60, chunk_overlap=10)
+    expected = cleaner.split_document_spans(documents)
+
+    cache = DiskCache(str(tmp_path))
+    assert cleaner.split_document_spans(documents, cache=cache) == expected
+    assert "Chunk cache: 0/2 hits (0%)" in capsys.readouterr().out
+
+    def fail(text):
+        raise AssertionError("splitter called for a cached document")
+
+    monkeypatch.setattr(cleaner, "split_text_spans", fail)
+    cached = cleaner.split_document_spans(documents, cache=DiskCache(str(tmp_path)))
+    assert [tuple(span) for span in cached] == expected
+    assert "Chunk cache: 2/2 hits (100%)" in capsys.readouterr().out
+
+    # Other splitter parameters do not reuse the cached chunks.
+    other = TextCleaner(chunk_size=80, chunk_overlap=10)
+    assert other.cache_key(PARAGRAPH) != cleaner.cache_key(PARAGRAPH)
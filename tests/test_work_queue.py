@@ -0,0 +1,76 @@
+import time
+
+from graphrag_tagger.utilities.work_queue import WorkQueue
+
+
+def test_claim_complete_and_results(tmp_path):
+    with WorkQueue(str(tmp_path / "q.db")) as queue:
+        assert queue.publish({"index": i} for i in range(5)) == 5
+        queue.set_meta("topics", ["A", "B"])
+        first = queue.claim("w1", limit=2)
+        second = queue.claim("w2", limit=10)
+        assert [t.payload["index"] for t in first] == [0, 1]
+        assert [t.payload["index"] for t in second] == [2, 3, 4]
+        assert queue.claim("w3") == []
+
+        assert not queue.complete(first[0].id, "w2", "stolen")  # not the owner
+        for task in first + second:
+            assert queue.complete(task.id, "w1" if task in first else "w2", task.id)
+        assert queue.is_finished()
+        assert list(queue.results()) == [t.id for t in first + second]
+        assert queue.get_meta("topics") == ["A", "B"]
+
+
+def test_publish_with_meta(tmp_path):
+    with WorkQueue(str(tmp_path / "q.db")) as queue:
+        queue.set_meta("job", "old")
+        assert queue.publish([{"index": 1}], meta={"job": "new", "topics": ["A"]}) == 1
+        assert queue.get_meta("job") == "new"
+        assert queue.get_meta("topics") == ["A"]
+
+
+def test_stale_lease_is_reclaimed(tmp_path):
+    with WorkQueue(str(tmp_path / "q.db")) as queue:
+        queue.publish([{"index": 1}])
+        (task,) = queue.claim("dead-worker", lease_seconds=0.05)
+        assert queue.claim("w2") == []
+        time.sleep(0.1)
+        (again,) = queue.claim("w2")
+        assert again.id == task.id and again.attempts == 2
+        # The first worker lost its lease and cannot complete the task.
+        assert not queue.complete(task.id, "dead-worker", "late")
+        assert queue.complete(again.id, "w2", "ok")
+        assert list(queue.results()) == ["ok"]
+
+
+def test_failures_retry_then_fail(tmp_path):
+    with WorkQueue(str(tmp_path / "q.db"), max_attempts=2) as queue:
+        queue.publish([{"index": 1}])
+        (task,) = queue.claim("w1")
+        assert queue.fail(task.id, "w1", "boom")
+        assert queue.counts()["pending"] == 1
+        (task,) = queue.claim("w1")
+        queue.fail(task.id, "w1", "boom again")
+        assert queue.counts()["failed"] == 1
+        assert queue.is_finished()
+        assert queue.errors() == {task.id: "boom again"}
+
+
+def test_expired_lease_out_of_attempts_fails(tmp_path):
+    with WorkQueue(str(tmp_path / "q.db"), max_attempts=1) as queue:
+        queue.publish([{"index": 1}])
+        queue.claim("w1", lease_seconds=0.01)
+        time.sleep(0.05)
+        assert queue.claim("w2") == []
+        assert queue.counts()["failed"] == 1
+
+
+def test_queue_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "q.db")
+    with WorkQueue(path) as coordinator, WorkQueue(path) as worker:
+        coordinator.publish([{"index": 1}, {"index": 2}])
+        claimed = worker.claim("w1", limit=5)
+        assert len(claimed) == 2
+        assert coordinator.counts()["leased"] == 2
+        coordinator.reset()
+        assert worker.counts() == {"pending": 0, "leased": 0, "done": 0, "failed": 0}